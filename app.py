@@ -1,7 +1,13 @@
+import json
+import click
 from flask import Flask
-from config import DEBUG, SECRET_KEY
+from config import DEBUG, SECRET_KEY, FORECAST_AGGREGATION, FORECAST_ENGINE, FORECAST_INTERVALS, CAMPAIGN_ENGINE
 from routes.main_routes import main
 from routes.impact_routes import impact
+from services.artifact_service import sweep_artifacts, start_artifact_sweeper
+from services.batch_service import run_batch, watch_directory
+from services.job_service import fail_stale_jobs
+from services.forecast_service import FORECAST_ENGINES, INTERVAL_STRATEGIES
 
 def create_app():
     """Create and configure the Flask application."""
@@ -12,6 +18,60 @@ def create_app():
     app.register_blueprint(main)
     app.register_blueprint(impact)
     
+    # Delete expired plots, forecasts and uploads in the background, once the app serves
+    # requests (so CLI commands such as `flask janitor` don't start it)
+    app.before_request(start_artifact_sweeper)
+    
+    # Jobs left queued or running by an earlier process that stopped checking in will never finish
+    fail_stale_jobs()
+    
+    @app.cli.command('janitor')
+    @click.option('--dry-run', is_flag=True, help='Only report what would be deleted.')
+    @click.option('--max-bytes', type=int, default=None, help='Size cap to enforce (default: ARTIFACT_MAX_BYTES).')
+    def janitor(dry_run, max_bytes):
+        """Delete expired and over-cap artifacts now."""
+        click.echo(json.dumps(sweep_artifacts(max_bytes=max_bytes, dry_run=dry_run), indent=2))
+    
+    @app.cli.command('forecast-batch')
+    @click.argument('input_dir', type=click.Path(exists=True, file_okay=False))
+    @click.argument('output_dir', type=click.Path(file_okay=False))
+    @click.option('--period', type=int, default=30, show_default=True, help='Days to forecast.')
+    @click.option('--metric', 'metrics', multiple=True, help='Metric to forecast where present (repeatable, default: all).')
+    @click.option('--aggregation', type=click.Choice(['D', 'W']), default=FORECAST_AGGREGATION, show_default=True)
+    @click.option('--engine', type=click.Choice(list(FORECAST_ENGINES)), default=FORECAST_ENGINE, show_default=True)
+    @click.option('--intervals', type=click.Choice(INTERVAL_STRATEGIES), default=FORECAST_INTERVALS, show_default=True)
+    @click.option('--budget-ratio', type=float, default=1.0, show_default=True,
+                  help='New budget as a ratio of each file\'s historical budget.')
+    @click.option('--bounds', is_flag=True, help='Include the forecast range columns.')
+    @click.option('--by-campaign', is_flag=True, help='Also write reconciled per-campaign forecasts.')
+    @click.option('--campaign-engine', type=click.Choice(list(FORECAST_ENGINES)), default=CAMPAIGN_ENGINE,
+                  show_default=True, help='Engine for campaigns with enough history.')
+    @click.option('--workers', type=int, default=None, help='Files forecast at once (default: BATCH_MAX_WORKERS).')
+    @click.option('--retry-failed', is_flag=True, help='Retry unchanged exports whose last attempt failed.')
+    @click.option('--watch', is_flag=True, help='Keep running and forecast new exports as they arrive.')
+    @click.option('--interval', type=int, default=None, help='Seconds between scans in watch mode.')
+    def forecast_batch(input_dir, output_dir, period, metrics, aggregation, engine, intervals, budget_ratio, bounds,
+                       by_campaign, campaign_engine, workers, retry_failed, watch, interval):
+        """Forecast every CSV export in INPUT_DIR into OUTPUT_DIR (resumable)."""
+        batch_options = {
+            'forecast_period': period,
+            'metrics': list(metrics) or None,
+            'aggregation': aggregation,
+            'engine': engine,
+            'intervals': intervals,
+            'budget_change_ratio': budget_ratio,
+            'include_bounds': bounds,
+            'by_campaign': by_campaign,
+            'campaign_engine': campaign_engine,
+            'max_workers': workers,
+            'retry_failed': retry_failed
+        }
+        
+        if watch:
+            watch_directory(input_dir, output_dir, interval=interval, **batch_options)
+        else:
+            click.echo(json.dumps(run_batch(input_dir, output_dir, **batch_options), indent=2))
+    
     # Custom Jinja filter for number formatting
     @app.template_filter('format_number')
     def format_number(value):
@@ -0,0 +1,89 @@
+"""
+Benchmark per-campaign forecasting with reconciliation to the account forecast.
+
+Writes a Google Ads export with --campaigns campaigns, where a share of them start
+late (too short for the main engine) or stop early (inactive), forecasts the account
+totals, then times generate_campaign_forecasts and checks that every period's campaign
+forecasts add up to the account forecast.
+
+Usage (from the project root):
+    python -m benchmarks.campaign_forecasts --campaigns 500 --days 180 --engine least_squares
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from benchmarks.generator import make_google_ads_frame
+from services import model_cache
+from services.file_service import process_uploaded_file
+from services.aggregation_service import aggregate_for_forecast
+from services.forecast_service import generate_forecast
+from services.campaign_service import generate_campaign_forecasts
+
+METRICS = ['Clicks', 'Cost', 'Conversions']
+
+def write_campaign_export(file_path, num_campaigns, num_days, seed=42):
+    """Write a Google Ads export where 20% of campaigns start late and 10% stopped early."""
+    rng = np.random.default_rng(seed)
+    df = make_google_ads_frame(num_campaigns * num_days, num_campaigns, seed)
+    
+    campaign_ids = df['Campaign'].str.rsplit(' ', n=1).str[1].astype(int) - 1
+    day_index = np.arange(len(df)) // num_campaigns
+    
+    # Late starters have a few weeks of history; stopped campaigns end halfway through
+    late = rng.random(num_campaigns) < 0.2
+    stopped = ~late & (rng.random(num_campaigns) < 0.1)
+    start_day = np.where(late, num_days - rng.integers(3, 42, num_campaigns), 0)
+    end_day = np.where(stopped, num_days // 2, num_days)
+    keep = (day_index >= start_day[campaign_ids]) & (day_index < end_day[campaign_ids])
+    
+    df = df[keep]
+    with open(file_path, 'w', newline='') as f:
+        f.write('Campaign performance\n')
+        f.write(f"{df['Day'].iloc[0]} - {df['Day'].iloc[-1]}\n")
+        df.to_csv(f, index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--campaigns', type=int, default=500, help='Number of campaigns in the export')
+    parser.add_argument('--days', type=int, default=180, help='Days of history')
+    parser.add_argument('--period', type=int, default=30, help='Forecast period in days')
+    parser.add_argument('--engine', default='least_squares', help="Engine for campaigns with enough history")
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: FORECAST_MAX_WORKERS)')
+    parser.add_argument('--batch-size', type=int, default=None, help='Series per worker task')
+    args = parser.parse_args()
+    
+    # Measure real fits, not model cache hits (worker processes read the environment)
+    model_cache.MODEL_CACHE_ENABLED = False
+    os.environ['MODEL_CACHE_ENABLED'] = '0'
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'campaigns.csv')
+        write_campaign_export(file_path, args.campaigns, args.days)
+        
+        df, date_cols, _, date_format, file_format = process_uploaded_file(file_path)
+        df, _ = aggregate_for_forecast(df, date_cols[0], METRICS)
+        results = generate_forecast(df, date_cols[0], METRICS, args.period, max_workers=args.workers,
+                                    engine=args.engine, intervals='none')
+        
+        start = time.perf_counter()
+        campaigns = generate_campaign_forecasts(file_path, file_format, date_cols[0], date_format, results,
+                                                engine=args.engine, max_workers=args.workers,
+                                                batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+    
+    num_series = len(campaigns['campaigns']) * len(campaigns['metrics'])
+    print(f"campaigns={len(campaigns['campaigns'])} days={args.days} period={args.period} engine={args.engine}")
+    print(f"{num_series} series in {elapsed:.2f}s ({num_series / elapsed:.0f} series/s)")
+    print(f"{'metric':12s} {'models':45s} {'gap before':>11s} {'max error after':>16s}")
+    
+    for metric_index, metric in enumerate(campaigns['metrics']):
+        total = np.array([row['yhat'] for row in results[metric]['forecast']])
+        error = np.abs(campaigns['forecasts'][metric_index].sum(axis=0) - total).max()
+        summary = results[metric]['campaigns']
+        models = ', '.join(f"{count} {name}" for name, count in sorted(summary['models'].items()))
+        print(f"{metric:12s} {models:45s} {summary['coherence_gap']:10.1%} {error:16.2e}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark the streaming CSV export against the original iterrows export.
+
+Builds saved-forecast data for --metrics metrics over a --period day horizon,
+checks both exports produce the same bytes and times them.
+
+Usage (from the project root):
+    python -m benchmarks.csv_export --metrics 50 --period 365
+"""
+import argparse
+import csv
+import io
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from utils.export_utils import generate_forecast_csv
+
+def make_forecast_data(num_metrics, forecast_period, seed=42):
+    """Build forecast data in the shape load_forecast_data returns it."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2025-01-01', periods=forecast_period, freq='D')
+    
+    results = {}
+    for i in range(num_metrics):
+        yhat = rng.uniform(10, 5000, forecast_period)
+        results[f'Metric {i + 1}'] = {'forecast': [
+            {'ds': ds.isoformat(), 'yhat': value, 'yhat_lower': value * 0.9, 'yhat_upper': value * 1.1}
+            for ds, value in zip(dates, yhat)
+        ]}
+    
+    metadata = {
+        'forecast_title': 'Benchmark', 'platform': 'Google Ads', 'budget': 1000.0, 'currency': '£',
+        'date_range': f"{dates[0].strftime('%d/%m/%Y')} - {dates[-1].strftime('%d/%m/%Y')}",
+        'created_at': '2025-01-01T00:00:00'
+    }
+    return {'metadata': metadata, 'results': results}
+
+def iterrows_reference(forecast_data):
+    """Original export: one writerow per DataFrame row, then a StringIO to BytesIO copy."""
+    metadata = forecast_data['metadata']
+    start_date, end_date = [date.strip() for date in metadata['date_range'].split('-')]
+    start_obj = pd.to_datetime(start_date, format='%d/%m/%Y')
+    end_obj = pd.to_datetime(end_date, format='%d/%m/%Y')
+    
+    csv_buffer = io.StringIO()
+    writer = csv.writer(csv_buffer)
+    writer.writerow(['forecast_title', metadata['forecast_title']])
+    writer.writerow(['platform', metadata['platform']])
+    writer.writerow(['budget', metadata['budget']])
+    writer.writerow(['currency', metadata['currency']])
+    writer.writerow(['forecast_period', f'{(end_obj - start_obj).days} days'])
+    writer.writerow(['start_date', start_obj.strftime('%Y-%m-%d')])
+    writer.writerow(['end_date', end_obj.strftime('%Y-%m-%d')])
+    writer.writerow(['generated_on', metadata['created_at']])
+    
+    results = {name: [{'date': row['ds'], 'value': float(row['yhat'])} for row in data['forecast']]
+               for name, data in forecast_data['results'].items()}
+    all_data = {'date': [item['date'] for item in next(iter(results.values()))]}
+    all_data['metric_type'] = ['forecast'] * len(all_data['date'])
+    for name, values in results.items():
+        all_data[name] = [item['value'] for item in values]
+    df = pd.DataFrame(all_data)
+    
+    column_names = ['date', 'metric_type'] + list(results)
+    writer.writerow(column_names)
+    for _, row in df.iterrows():
+        writer.writerow([row[col] for col in column_names])
+    
+    return io.BytesIO(csv_buffer.getvalue().encode()).getvalue()
+
+def measure(export):
+    """Return (seconds, peak traced bytes, output) for one export."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    output = export()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, output
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--metrics', type=int, default=50, help='Number of metrics in the forecast')
+    parser.add_argument('--period', type=int, default=365, help='Forecast period in days')
+    args = parser.parse_args()
+    
+    forecast_data = make_forecast_data(args.metrics, args.period)
+    
+    reference_time, reference_peak, reference = measure(lambda: iterrows_reference(forecast_data))
+    # Chunks are consumed one at a time, as the streaming response does
+    stream_time, stream_peak, streamed = measure(
+        lambda: b''.join(chunk.encode() for chunk in generate_forecast_csv(forecast_data)))
+    
+    print(f"metrics={args.metrics} period={args.period} ({len(reference) / 1e6:.2f} MB CSV)")
+    print(f"iterrows export:  {reference_time:7.3f}s, peak {reference_peak / 1e6:7.2f} MB")
+    print(f"streaming export: {stream_time:7.3f}s, peak {stream_peak / 1e6:7.2f} MB "
+          f"({reference_time / stream_time:.1f}x faster)")
+    
+    identical = reference == streamed
+    print(f"identical output: {identical}")
+    sys.exit(0 if identical else 1)
+
+if __name__ == '__main__':
+    main()
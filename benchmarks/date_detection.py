@@ -0,0 +1,64 @@
+"""
+Benchmark date format detection against full-column scoring.
+
+The reference scores all four formats by converting the whole column, as
+parse_dates_with_format_detection used to. Both must agree on the format
+and the parsed values.
+
+Usage (from the project root):
+    python -m benchmarks.date_detection --rows 500000
+"""
+import argparse
+import sys
+import time
+import pandas as pd
+from benchmarks.generator import make_google_ads_frame
+from utils.date_utils import parse_dates_with_format_detection
+
+def full_column_reference(series):
+    """Original detection: parse the full column with every format and count successes."""
+    candidates = [
+        ('%m/%d/%Y', pd.to_datetime(series, format='%m/%d/%Y', errors='coerce')),
+        ('%d/%m/%Y', pd.to_datetime(series, format='%d/%m/%Y', errors='coerce')),
+        ('%d.%m.%Y', pd.to_datetime(series, format='%d.%m.%Y', errors='coerce')),
+        ('auto', pd.to_datetime(series, errors='coerce')),
+    ]
+    # Ties go to the earlier format, as in the original if/elif chain
+    best = max(range(len(candidates)), key=lambda i: (candidates[i][1].notna().sum(), -i))
+    return candidates[best][1], candidates[best][0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500000, help='Rows in the generated column')
+    args = parser.parse_args()
+    
+    export = make_google_ads_frame(args.rows, num_campaigns=50)
+    days = pd.to_datetime(export['Day'])
+    columns = {
+        'ISO dates': export['Day'],
+        'MM/DD/YYYY': days.dt.strftime('%m/%d/%Y'),
+        'DD/MM/YYYY': days.dt.strftime('%d/%m/%Y'),
+        'DD.MM.YYYY': days.dt.strftime('%d.%m.%Y'),
+        'Campaign (text)': export['Campaign'],
+        'Cost (numeric text)': export['Cost'],
+    }
+    
+    failures = 0
+    for name, series in columns.items():
+        start = time.perf_counter()
+        expected, expected_format = full_column_reference(series.copy())
+        reference_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        parsed, detected_format = parse_dates_with_format_detection(pd.DataFrame({'col': series.copy()}), 'col')
+        sampled_time = time.perf_counter() - start
+        
+        ok = detected_format == expected_format and parsed.equals(expected)
+        failures += not ok
+        print(f"{name:>20}: full-column {reference_time * 1000:8.1f} ms, sampled {sampled_time * 1000:8.1f} ms "
+              f"({reference_time / sampled_time:5.1f}x) format={detected_format} {'ok' if ok else 'MISMATCH'}")
+    
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Compare the forecasting engines on speed and holdout accuracy.
+
+Each metric's last --holdout days are held back, every engine is fitted on
+the rest, and the held-back days are scored: MAPE, RMSE, the share of actual
+values inside the forecast interval, and the fitted budget coefficient.
+
+The width of each engine's forecast interval is also compared with Prophet's at
+every --ratios budget ratio; the run exits with status 1 when an engine's band
+is more than --max-band-ratio times wider or narrower than Prophet's.
+
+Usage (from the project root):
+    python -m benchmarks.forecast_engines --metrics 4 --days 730 --holdout 30
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from benchmarks.forecast_parallel import make_daily_frame
+from services import model_cache
+from services.forecast_service import FORECAST_ENGINES, fit_metric_model, predict_with_budget
+
+def score_holdout(forecast, holdout):
+    """Return (mape, rmse, interval coverage) of a forecast over the held-back rows."""
+    predicted = forecast.set_index('ds').loc[holdout['ds']]
+    actual = holdout['y'].values
+    errors = predicted['yhat'].values - actual
+    
+    nonzero = np.abs(actual) > 1e-9
+    mape = np.mean(np.abs(errors[nonzero] / actual[nonzero])) * 100 if nonzero.any() else float('nan')
+    rmse = np.sqrt(np.mean(errors ** 2))
+    coverage = np.mean((actual >= predicted['yhat_lower'].values) & (actual <= predicted['yhat_upper'].values)) * 100
+    
+    return mape, rmse, coverage
+
+def get_band_widths(model, train, metric, days, ratios, engine):
+    """Return the mean forecast interval width over the forecast days at each budget ratio."""
+    widths = {}
+    for ratio in ratios:
+        forecast, _ = predict_with_budget(model, train, metric, days, ratio, 'D', engine)
+        future = forecast[forecast['ds'] > train['ds'].max()]
+        widths[ratio] = float((future['yhat_upper'] - future['yhat_lower']).mean())
+    
+    return widths
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--metrics', type=int, default=4, help='Number of metrics to compare')
+    parser.add_argument('--days', type=int, default=730, help='Days of history per metric (including the holdout)')
+    parser.add_argument('--holdout', type=int, default=30, help='Days held back for scoring')
+    parser.add_argument('--engines', nargs='+', default=list(FORECAST_ENGINES), help='Engines to compare')
+    parser.add_argument('--ratios', nargs='+', type=float, default=[0.5, 1.0, 1.5],
+                        help='Budget ratios the interval widths are compared at')
+    parser.add_argument('--max-band-ratio', type=float, default=10.0,
+                        help="Largest allowed factor between an engine's interval width and Prophet's")
+    args = parser.parse_args()
+    
+    # Measure real fits, not model cache hits
+    model_cache.MODEL_CACHE_ENABLED = False
+    
+    df = make_daily_frame(args.metrics, args.days)
+    totals = {engine: {'seconds': 0.0, 'mape': [], 'coverage': []} for engine in args.engines}
+    band_widths = {}
+    
+    print(f"metrics={args.metrics} days={args.days} holdout={args.holdout}")
+    print(f"{'metric':>10} {'engine':>14} {'fit+predict':>12} {'MAPE %':>8} {'RMSE':>10} {'coverage %':>11} {'budget coef':>12}")
+    
+    for metric in [col for col in df.columns if col != 'Day']:
+        prophet_df = df[['Day', metric]].rename(columns={'Day': 'ds', metric: 'y'})
+        prophet_df['budget_normalized'] = 1.0
+        train, holdout = prophet_df.iloc[:-args.holdout], prophet_df.iloc[-args.holdout:]
+        
+        for engine in args.engines:
+            start = time.perf_counter()
+            model = fit_metric_model(train, engine)
+            forecast, _ = predict_with_budget(model, train, metric, args.holdout, 1.0, 'D', engine)
+            seconds = time.perf_counter() - start
+            
+            mape, rmse, coverage = score_holdout(forecast, holdout)
+            coefficient = FORECAST_ENGINES[engine].get_budget_coefficient(model)
+            band_widths[metric, engine] = get_band_widths(model, train, metric, args.holdout, args.ratios, engine)
+            
+            totals[engine]['seconds'] += seconds
+            totals[engine]['mape'].append(mape)
+            totals[engine]['coverage'].append(coverage)
+            print(f"{metric:>10} {engine:>14} {seconds:>11.3f}s {mape:>8.2f} {rmse:>10.2f} {coverage:>11.1f} "
+                  f"{coefficient:>12.2f}")
+    
+    print()
+    for engine, total in totals.items():
+        print(f"{engine:>14}: {total['seconds']:8.3f}s total, mean MAPE {np.mean(total['mape']):.2f}%, "
+              f"mean coverage {np.mean(total['coverage']):.1f}%")
+    
+    if 'prophet' not in args.engines:
+        return
+    
+    print(f"\nMean interval width by budget ratio (flagged beyond {args.max_band_ratio:g}x Prophet's):")
+    mismatches = 0
+    for (metric, engine), widths in band_widths.items():
+        reference = band_widths[metric, 'prophet']
+        factors = [widths[ratio] / reference[ratio] if reference[ratio] > 0 else float('inf') for ratio in args.ratios]
+        flagged = [not 1 / args.max_band_ratio <= factor <= args.max_band_ratio for factor in factors]
+        mismatches += any(flagged)
+        print(f"{metric:>10} {engine:>14} " + ' '.join(
+            f"{ratio:g}: {widths[ratio]:10.2f}{' !' if flag else '  '}" for ratio, flag in zip(args.ratios, flagged)))
+    
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == '__main__':
+    main()
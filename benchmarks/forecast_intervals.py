@@ -0,0 +1,67 @@
+"""
+Benchmark Prophet predict latency and interval accuracy per interval strategy.
+
+Fits one metric on all but the last --period days, then predicts history plus
+horizon with every strategy. Interval accuracy is measured on the held-out
+days: the gap between each strategy's bounds and a --reference-samples
+simulation (as a share of the reference band width) and the share of actual
+values inside the band.
+
+Usage (from the project root):
+    python -m benchmarks.forecast_intervals --days 730 --period 90
+"""
+import argparse
+import time
+import numpy as np
+from benchmarks.forecast_parallel import make_daily_frame
+from services import prophet_engine
+from services.forecast_service import INTERVAL_STRATEGIES, make_future_frame
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=730, help='Days of data, including the held-out period')
+    parser.add_argument('--period', type=int, default=90, help='Held-out forecast period in days')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed predictions per strategy (best is reported)')
+    parser.add_argument('--reference-samples', type=int, default=10000,
+                        help='Simulations for the reference intervals')
+    args = parser.parse_args()
+    
+    df = make_daily_frame(1, args.days).rename(columns={'Day': 'ds', 'Metric 1': 'y'})
+    df['budget_normalized'] = 1.0
+    train, actual = df.iloc[:-args.period], df['y'].values[-args.period:]
+    
+    model = prophet_engine.fit_model(train)
+    future = make_future_frame(train, args.period)
+    future['budget_normalized'] = 1.0
+    
+    # Reference bounds from a much larger simulation
+    full_samples = model.uncertainty_samples
+    model.uncertainty_samples = args.reference_samples
+    reference = prophet_engine.predict(model, future).tail(args.period)
+    model.uncertainty_samples = full_samples
+    reference_width = (reference['yhat_upper'] - reference['yhat_lower']).mean()
+    
+    print(f"days={args.days} period={args.period} rows predicted={len(future)} "
+          f"reference samples={args.reference_samples}")
+    print(f"{'strategy':10s} {'predict ms':>11s} {'bound error':>12s} {'coverage':>9s}")
+    
+    for intervals in INTERVAL_STRATEGIES:
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            forecast = prophet_engine.predict(model, future, intervals)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        
+        horizon = forecast.tail(args.period)
+        if horizon['yhat_lower'].isna().any():
+            print(f"{intervals:10s} {best * 1000:11.1f} {'n/a':>12s} {'n/a':>9s}")
+            continue
+        
+        bound_error = (np.abs(horizon['yhat_lower'].values - reference['yhat_lower'].values).mean()
+                       + np.abs(horizon['yhat_upper'].values - reference['yhat_upper'].values).mean()) / 2
+        coverage = np.mean((actual >= horizon['yhat_lower'].values) & (actual <= horizon['yhat_upper'].values))
+        print(f"{intervals:10s} {best * 1000:11.1f} {bound_error / reference_width:11.1%} {coverage:9.1%}")
+
+if __name__ == '__main__':
+    main()
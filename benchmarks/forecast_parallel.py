@@ -0,0 +1,62 @@
+"""
+Benchmark serial vs. parallel Prophet fitting in generate_forecast.
+
+Usage (from the project root):
+    python -m benchmarks.forecast_parallel --metrics 8 --days 365 --workers 4
+"""
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from services import model_cache
+from services.forecast_service import generate_forecast
+
+def make_daily_frame(num_metrics, num_days, seed=42):
+    """Build a daily DataFrame with a date column and num_metrics seasonal series."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=num_days, freq='D')
+    t = np.arange(num_days)
+    
+    data = {'Day': dates}
+    for i in range(num_metrics):
+        level = rng.uniform(50, 5000)
+        trend = level * rng.uniform(-0.0005, 0.002) * t
+        weekly = level * 0.15 * np.sin(2 * np.pi * t / 7 + rng.uniform(0, np.pi))
+        noise = rng.normal(0, level * 0.05, num_days)
+        data[f'Metric {i + 1}'] = np.maximum(level + trend + weekly + noise, 0)
+    
+    return pd.DataFrame(data)
+
+def time_forecast(df, metrics, forecast_period, max_workers):
+    """Return (seconds, results) for one generate_forecast run."""
+    start = time.perf_counter()
+    results = generate_forecast(df.copy(), 'Day', metrics, forecast_period, max_workers=max_workers)
+    return time.perf_counter() - start, results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--metrics', type=int, default=8, help='Number of metrics to forecast')
+    parser.add_argument('--days', type=int, default=365, help='Days of history per metric')
+    parser.add_argument('--period', type=int, default=30, help='Forecast period in days')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes for the parallel run')
+    args = parser.parse_args()
+    
+    # Measure real fits, not model cache hits (worker processes read the environment)
+    model_cache.MODEL_CACHE_ENABLED = False
+    os.environ['MODEL_CACHE_ENABLED'] = '0'
+    
+    df = make_daily_frame(args.metrics, args.days)
+    metrics = [col for col in df.columns if col != 'Day']
+    
+    serial_time, serial_results = time_forecast(df, metrics, args.period, max_workers=1)
+    parallel_time, parallel_results = time_forecast(df, metrics, args.period, max_workers=args.workers)
+    
+    print(f"metrics={args.metrics} days={args.days} period={args.period}")
+    print(f"serial:   {serial_time:8.2f}s ({len(serial_results)} metrics)")
+    print(f"parallel: {parallel_time:8.2f}s ({len(parallel_results)} metrics, {args.workers} workers)")
+    print(f"speedup:  {serial_time / parallel_time:8.2f}x")
+    print(f"same metric order: {list(serial_results) == list(parallel_results)}")
+
+if __name__ == '__main__':
+    main()
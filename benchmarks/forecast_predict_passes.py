@@ -0,0 +1,89 @@
+"""
+Check the single-predict budget path against the original four-predict path.
+
+predict_with_budget derives the budget elasticity and budget_normalized_effect
+from the fitted regressor coefficient and one predict() call. This script fits
+each metric once, recomputes both values with the original counterfactual
+predictions (base, +10%, forecast, base forecast) and fails if they differ.
+
+Usage (from the project root):
+    python -m benchmarks.forecast_predict_passes --metrics 3 --days 365
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from benchmarks.forecast_parallel import make_daily_frame
+from services.forecast_service import fit_metric_model, predict_with_budget
+
+def four_predict_reference(model, prophet_df, forecast_period, budget_change_ratio):
+    """Original generate_forecast computation: returns (elasticity, budget_effect)."""
+    base_future = model.make_future_dataframe(periods=1)
+    base_future['budget_normalized'] = 1.0
+    increased_future = model.make_future_dataframe(periods=1)
+    increased_future['budget_normalized'] = 1.1
+    
+    last_base = model.predict(base_future)['yhat'].iloc[-1]
+    last_increased = model.predict(increased_future)['yhat'].iloc[-1]
+    if abs(last_base) > 0.001:
+        elasticity = ((last_increased - last_base) / last_base) / 0.1
+    else:
+        elasticity = 1.0
+    
+    future = model.make_future_dataframe(periods=forecast_period)
+    future['budget_normalized'] = 1.0
+    future.loc[future['ds'] > prophet_df['ds'].max(), 'budget_normalized'] = budget_change_ratio
+    forecast = model.predict(future)
+    
+    base_future = future.copy()
+    base_future['budget_normalized'] = 1.0
+    budget_effect = forecast['yhat'] - model.predict(base_future)['yhat']
+    budget_effect.loc[future['ds'] <= prophet_df['ds'].max()] = 0
+    
+    return elasticity, budget_effect.values
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--metrics', type=int, default=3, help='Number of metrics to check')
+    parser.add_argument('--days', type=int, default=365, help='Days of history per metric')
+    parser.add_argument('--period', type=int, default=30, help='Forecast period in days')
+    parser.add_argument('--ratios', type=float, nargs='+', default=[0.5, 1.0, 1.37, 2.0],
+                        help='Budget change ratios to check')
+    args = parser.parse_args()
+    
+    df = make_daily_frame(args.metrics, args.days)
+    rng = np.random.default_rng(7)
+    failures = 0
+    reference_time = single_time = 0.0
+    
+    for metric in [col for col in df.columns if col != 'Day']:
+        prophet_df = df[['Day', metric]].rename(columns={'Day': 'ds', metric: 'y'})
+        # Vary the historical budget so the fitted coefficient is not trivially zero
+        prophet_df['budget_normalized'] = rng.uniform(0.7, 1.3, len(prophet_df))
+        prophet_df['y'] = prophet_df['y'] * (0.5 + 0.5 * prophet_df['budget_normalized'])
+        model = fit_metric_model(prophet_df)
+        
+        for ratio in args.ratios:
+            start = time.perf_counter()
+            expected_elasticity, expected_effect = four_predict_reference(model, prophet_df, args.period, ratio)
+            reference_time += time.perf_counter() - start
+            
+            start = time.perf_counter()
+            forecast, elasticity = predict_with_budget(model, prophet_df, metric, args.period, ratio)
+            single_time += time.perf_counter() - start
+            
+            # Historical rows of the reference keep the varied budget, so compare the forecast horizon
+            horizon = slice(-args.period, None)
+            ok = (np.isclose(elasticity, expected_elasticity, rtol=1e-6, atol=1e-9) and
+                  np.allclose(forecast['budget_normalized_effect'].values[horizon], expected_effect[horizon],
+                              rtol=1e-6, atol=1e-6))
+            failures += not ok
+            print(f"{metric:>10} ratio={ratio:<5} elasticity={elasticity:+.6f} "
+                  f"reference={expected_elasticity:+.6f} {'ok' if ok else 'MISMATCH'}")
+    
+    print(f"four-predict path: {reference_time:.2f}s, single-predict path: {single_time:.2f}s "
+          f"({reference_time / single_time:.1f}x)")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
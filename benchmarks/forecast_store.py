@@ -0,0 +1,88 @@
+"""
+Compare the columnar forecast store with the original per-forecast JSON files.
+
+Saves the same --metrics x --period forecast in both formats and reports the
+bytes on disk and the time to: load everything for the results page, stream
+the CSV download, and read a single metric's yhat column.
+
+Usage (from the project root):
+    python -m benchmarks.forecast_store --metrics 50 --period 365
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from config import FORECAST_FOLDER
+from utils.export_utils import (CustomJSONEncoder, save_forecast_data, load_forecast_data, load_forecast_results,
+                                generate_forecast_csv)
+
+def make_results(num_metrics, forecast_period, seed=42):
+    """Build results in the shape generate_forecast returns them."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2025-01-01', periods=forecast_period, freq='D')
+    
+    results = {}
+    for i in range(num_metrics):
+        yhat = rng.uniform(10, 5000, forecast_period)
+        results[f'Metric {i + 1}'] = {
+            'forecast': [{'ds': ds, 'yhat': value, 'yhat_lower': value * 0.9, 'yhat_upper': value * 1.1}
+                         for ds, value in zip(dates, yhat)],
+            'plot_path': f'plots/forecast_{i}.html',
+            'components_path': f'plots/components_{i}.html',
+            'elasticity': {'coefficient': 0.5, 'normalized_impact': 0.1, 'normalized_score': 5.0,
+                           'response': 'Medium budget sensitivity'}
+        }
+    return results
+
+def save_json_forecast(results, metadata):
+    """Original format: the whole results dict as one JSON file. Returns the forecast ID."""
+    forecast_id = 'benchmark-json'
+    with open(os.path.join(FORECAST_FOLDER, f"{forecast_id}.json"), 'w') as f:
+        json.dump({'metadata': metadata, 'results': results}, f, cls=CustomJSONEncoder)
+    return forecast_id
+
+def timed(function, repeat=5):
+    """Return the best of repeat timings of function()."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--metrics', type=int, default=50, help='Number of metrics in the forecast')
+    parser.add_argument('--period', type=int, default=365, help='Forecast period in days')
+    args = parser.parse_args()
+    
+    os.makedirs(FORECAST_FOLDER, exist_ok=True)
+    results = make_results(args.metrics, args.period)
+    metadata = {'forecast_title': 'Benchmark', 'platform': 'Google Ads', 'budget': 1000.0, 'currency': '£',
+                'date_range': '01/01/2025 - 31/12/2025', 'budget_change_ratio': 1.0, 'created_at': '2025-01-01'}
+    
+    json_id = save_json_forecast(results, metadata)
+    store_id = save_forecast_data(results, 'Benchmark', 'Google Ads', 1000.0, '£', '01/01/2025 - 31/12/2025')
+    
+    paths = {
+        'json': [os.path.join(FORECAST_FOLDER, f"{json_id}.json")],
+        'columnar': [os.path.join(FORECAST_FOLDER, f"{store_id}{suffix}") for suffix in ('.npy', '.meta.json')]
+    }
+    first_metric = next(iter(results))
+    
+    print(f"metrics={args.metrics} period={args.period}")
+    print(f"{'format':>9} {'bytes':>11} {'results page':>13} {'CSV download':>13} {'one column':>11}")
+    for name, forecast_id in [('json', json_id), ('columnar', store_id)]:
+        size = sum(os.path.getsize(path) for path in paths[name])
+        page = timed(lambda: load_forecast_results(forecast_id))
+        download = timed(lambda: ''.join(generate_forecast_csv(load_forecast_data(forecast_id))))
+        column = timed(lambda: np.asarray(load_forecast_data(forecast_id)['results'][first_metric]['columns']['yhat']))
+        print(f"{name:>9} {size:>11,} {page * 1000:>11.1f}ms {download * 1000:>11.1f}ms {column * 1000:>9.2f}ms")
+    
+    for path in paths['json'] + paths['columnar']:
+        os.remove(path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark cold vs. warm-started Prophet fits when an upload extends an earlier series.
+
+Each metric is first fitted on all but the last --extend days (the earlier upload),
+then the full series is fitted from scratch and warm-started from the earlier model.
+Fits use a throwaway model cache so the earlier fit can be found. The forecast gap is
+the largest difference between the cold and warm forecasts as a share of the mean.
+
+Usage (from the project root):
+    python -m benchmarks.forecast_warm_start --metrics 4 --days 730 --extend 7
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+from benchmarks.forecast_parallel import make_daily_frame
+from services import model_cache, prophet_engine
+from services.forecast_service import make_future_frame
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--metrics', type=int, default=4, help='Number of metrics to fit')
+    parser.add_argument('--days', type=int, default=730, help='Days of history in the extended upload')
+    parser.add_argument('--extend', type=int, default=7, help='Days appended since the earlier upload')
+    parser.add_argument('--period', type=int, default=30, help='Forecast period used to compare the fits')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed fits per metric (best is reported)')
+    args = parser.parse_args()
+    
+    df = make_daily_frame(args.metrics, args.days)
+    model_cache.MODEL_CACHE_FOLDER = tempfile.mkdtemp(prefix='warm_start_cache_')
+    
+    print(f"days={args.days} extend={args.extend} metrics={args.metrics}")
+    print(f"{'metric':10s} {'cold s':>8s} {'warm s':>8s} {'speedup':>8s} {'forecast gap':>13s}")
+    
+    total_cold = total_warm = 0.0
+    for metric in [col for col in df.columns if col != 'Day']:
+        prophet_df = df[['Day', metric]].rename(columns={'Day': 'ds', metric: 'y'})
+        prophet_df['budget_normalized'] = 1.0
+        
+        # The earlier upload, fitted and cached as usual
+        model_cache.MODEL_CACHE_ENABLED = True
+        prophet_engine.fit_model(prophet_df.iloc[:-args.extend])
+        cache_key = model_cache.get_model_cache_key(prophet_df, prophet_engine.PROPHET_CONFIG)
+        
+        cold_best = warm_best = None
+        for _ in range(args.repeat):
+            model_cache.MODEL_CACHE_ENABLED = False
+            cold_model = prophet_engine.fit_model(prophet_df)
+            cold_seconds = prophet_engine.get_fit_report(cold_model)['seconds']
+            
+            # Drop the previous repeat's warm fit so this one is not a cache hit
+            model_cache.MODEL_CACHE_ENABLED = True
+            model_cache.remove_cache_entry(cache_key)
+            warm_model = prophet_engine.fit_model(prophet_df)
+            warm_report = prophet_engine.get_fit_report(warm_model)
+            if warm_report['source'] != 'warm_start':
+                raise RuntimeError(f"{metric} was not warm-started ({warm_report['source']})")
+            
+            cold_best = cold_seconds if cold_best is None else min(cold_best, cold_seconds)
+            warm_best = warm_report['seconds'] if warm_best is None else min(warm_best, warm_report['seconds'])
+        
+        future = make_future_frame(prophet_df, args.period)
+        future['budget_normalized'] = 1.0
+        cold_yhat = prophet_engine.predict(cold_model, future, 'none')['yhat'].values
+        warm_yhat = prophet_engine.predict(warm_model, future, 'none')['yhat'].values
+        gap = np.abs(cold_yhat - warm_yhat).max() / np.abs(cold_yhat).mean()
+        
+        total_cold += cold_best
+        total_warm += warm_best
+        print(f"{metric:10s} {cold_best:8.3f} {warm_best:8.3f} {cold_best / warm_best:7.2f}x {gap:12.3%}")
+    
+    print(f"{'total':10s} {total_cold:8.3f} {total_warm:8.3f} {total_cold / total_warm:7.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Synthetic ad platform exports for benchmarks.
+"""
+import numpy as np
+import pandas as pd
+
+def get_export_shape(num_rows=None, num_campaigns=20, num_days=None):
+    """
+    Resolve the size of a campaign x day report from any of rows and days.
+    
+    Args:
+        num_rows: Total number of rows (default: every campaign on every day)
+        num_campaigns: Number of campaigns reported per day
+        num_days: Days covered (default: num_rows / num_campaigns)
+        
+    Returns:
+        tuple: (num_rows, num_days)
+    """
+    if num_rows is None and num_days is None:
+        raise ValueError("Give num_rows, num_days or both")
+    
+    if num_days is None:
+        num_days = max(1, -(-num_rows // num_campaigns))
+    if num_rows is None:
+        num_rows = num_campaigns * num_days
+    elif num_rows > num_campaigns * num_days:
+        raise ValueError(f"{num_rows} rows do not fit in {num_campaigns} campaigns x {num_days} days")
+    
+    return num_rows, num_days
+
+def simulate_campaign_days(rng, num_rows, num_campaigns, num_days):
+    """
+    Simulate daily delivery for every campaign, ending today.
+    
+    Args:
+        rng: numpy random Generator
+        num_rows: Total number of rows (the last day is cut short when it doesn't divide evenly)
+        num_campaigns: Number of campaigns reported per day
+        num_days: Days covered
+        
+    Returns:
+        dict: Per-row arrays ('day' as YYYY-MM-DD strings, 'campaign_ids', 'clicks',
+              'impressions', 'cost', 'conversions', 'conv_value')
+    """
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=num_days, freq='D')
+    
+    day = np.repeat(dates.strftime('%Y-%m-%d').values, num_campaigns)[:num_rows]
+    campaign_ids = np.tile(np.arange(num_campaigns), num_days)[:num_rows]
+    
+    # Campaign-level scale plus weekly seasonality
+    scale = rng.uniform(20, 400, num_campaigns)[campaign_ids]
+    weekday = np.repeat(dates.dayofweek.values, num_campaigns)[:num_rows]
+    weekly = 1 + 0.2 * np.sin(2 * np.pi * weekday / 7)
+    
+    clicks = rng.poisson(scale * weekly)
+    impressions = clicks * rng.integers(8, 40, num_rows)
+    cost = clicks * rng.uniform(0.3, 2.5, num_rows)
+    conversions = rng.binomial(clicks, 0.04)
+    conv_value = conversions * rng.uniform(20, 120, num_rows)
+    
+    return {'day': day, 'campaign_ids': campaign_ids, 'clicks': clicks, 'impressions': impressions,
+            'cost': cost, 'conversions': conversions, 'conv_value': conv_value}
+
+def make_google_ads_frame(num_rows=None, num_campaigns=20, seed=42, num_days=None):
+    """
+    Build a Google Ads style campaign x day report.
+    
+    Args:
+        num_rows: Total number of rows (default: every campaign on every day)
+        num_campaigns: Number of campaigns reported per day
+        seed: Random seed
+        num_days: Days covered (default: num_rows / num_campaigns)
+        
+    Returns:
+        DataFrame with Day, Campaign and metric columns as strings, like the raw export
+    """
+    rng = np.random.default_rng(seed)
+    num_rows, num_days = get_export_shape(num_rows, num_campaigns, num_days)
+    rows = simulate_campaign_days(rng, num_rows, num_campaigns, num_days)
+    clicks, impressions = rows['clicks'], rows['impressions']
+    
+    return pd.DataFrame({
+        'Day': rows['day'],
+        'Campaign': [f'Campaign {i + 1}' for i in rows['campaign_ids']],
+        'Clicks': clicks,
+        'Impr.': impressions,
+        'CTR': np.where(impressions > 0, clicks / np.maximum(impressions, 1) * 100, 0).round(2).astype(str) + '%',
+        'Cost': [f'{value:,.2f}' for value in rows['cost']],
+        'Conversions': rows['conversions'],
+        'Conv. value': rows['conv_value'].round(2)
+    })
+
+def make_meta_frame(num_rows=None, num_campaigns=20, seed=42, num_days=None):
+    """
+    Build a Meta Ads Manager style campaign x day report.
+    
+    Args:
+        num_rows: Total number of rows (default: every campaign on every day)
+        num_campaigns: Number of campaigns reported per day
+        seed: Random seed
+        num_days: Days covered (default: num_rows / num_campaigns)
+        
+    Returns:
+        DataFrame with Reporting starts/ends, Campaign name and metric columns, where
+        counts and amounts are strings with thousands separators, like the raw export
+    """
+    rng = np.random.default_rng(seed)
+    num_rows, num_days = get_export_shape(num_rows, num_campaigns, num_days)
+    rows = simulate_campaign_days(rng, num_rows, num_campaigns, num_days)
+    
+    # Meta reports far more impressions per click than search, and reach below impressions
+    impressions = rows['impressions'] * 10
+    reach = (impressions * rng.uniform(0.6, 0.9, num_rows)).astype(int)
+    spent = rows['cost']
+    
+    return pd.DataFrame({
+        'Reporting starts': rows['day'],
+        'Reporting ends': rows['day'],
+        'Campaign name': [f'Campaign {i + 1}' for i in rows['campaign_ids']],
+        'Campaign delivery': 'active',
+        'Results': rows['conversions'],
+        'Result indicator': 'actions:offsite_conversion.fb_pixel_purchase',
+        'Reach': [f'{value:,}' for value in reach],
+        'Impressions': [f'{value:,}' for value in impressions],
+        'Amount spent (GBP)': [f'{value:,.2f}' for value in spent],
+        'Link clicks': [f'{value:,}' for value in rows['clicks']],
+        'CPM (cost per 1,000 impressions) (GBP)': (spent / np.maximum(impressions, 1) * 1000).round(2)
+    })
+
+def write_google_ads_export(file_path, num_rows=None, num_campaigns=20, seed=42, num_days=None):
+    """
+    Write a Google Ads export with the two preamble rows the UI download adds.
+    
+    Args:
+        file_path: Destination CSV path
+        num_rows: Number of data rows (default: every campaign on every day)
+        num_campaigns: Number of campaigns reported per day
+        seed: Random seed
+        num_days: Days covered (default: num_rows / num_campaigns)
+    """
+    df = make_google_ads_frame(num_rows, num_campaigns, seed, num_days)
+    with open(file_path, 'w', newline='') as f:
+        f.write('Campaign performance\n')
+        f.write(f"{df['Day'].iloc[0]} - {df['Day'].iloc[-1]}\n")
+        df.to_csv(f, index=False)
+
+def write_meta_export(file_path, num_rows=None, num_campaigns=20, seed=42, num_days=None):
+    """
+    Write a Meta Ads Manager export (no preamble; fields with thousands separators are quoted).
+    
+    Args:
+        file_path: Destination CSV path
+        num_rows: Number of data rows (default: every campaign on every day)
+        num_campaigns: Number of campaigns reported per day
+        seed: Random seed
+        num_days: Days covered (default: num_rows / num_campaigns)
+    """
+    make_meta_frame(num_rows, num_campaigns, seed, num_days).to_csv(file_path, index=False)
+
+def write_messy_google_ads_export(file_path, num_rows, num_campaigns=20, bad_line_rate=0.001, seed=42):
+    """
+    Write a Google Ads export with the defects hand-edited real-world exports have.
+    
+    On top of the preamble rows, a bad_line_rate share of rows get an unquoted comma in
+    the campaign name (one field too many), blank lines are scattered through the file
+    and it ends with the 'Total' rows the UI download appends.
+    
+    Args:
+        file_path: Destination CSV path
+        num_rows: Number of data rows
+        num_campaigns: Number of campaigns reported per day
+        bad_line_rate: Share of rows written with an extra field
+        seed: Random seed
+        
+    Returns:
+        int: Number of malformed lines written
+    """
+    rng = np.random.default_rng(seed)
+    df = make_google_ads_frame(num_rows, num_campaigns, seed)
+    
+    header, *rows = df.to_csv(index=False).splitlines()
+    bad_rows = set(np.flatnonzero(rng.random(len(rows)) < bad_line_rate))
+    blank_rows = set(np.flatnonzero(rng.random(len(rows)) < bad_line_rate))
+    
+    with open(file_path, 'w', newline='') as f:
+        f.write('Campaign performance\n')
+        f.write(f"{df['Day'].iloc[0]} - {df['Day'].iloc[-1]}\n")
+        f.write(header + '\n')
+        for index, row in enumerate(rows):
+            if index in bad_rows:
+                row = row.replace('Campaign ', 'Campaign, UK ', 1)
+            f.write(row + '\n')
+            if index in blank_rows:
+                f.write('\n')
+        
+        # Footer totals have the same number of fields, so they are read as data rows
+        num_fields = header.count(',') + 1
+        f.write(','.join(['Total: Account', '--'] + ['--'] * (num_fields - 2)) + '\n')
+        f.write(','.join(['Total: Campaigns', '--'] + ['--'] * (num_fields - 2)) + '\n')
+    
+    return len(bad_rows)
@@ -0,0 +1,59 @@
+"""
+Benchmark reading messy ad platform exports for impact analysis.
+
+Writes a Google Ads export with malformed lines, blank lines and footer totals,
+then times the old python engine read against read_export_csv with the C and
+(when installed) pyarrow engines, checking each one skips the malformed lines.
+
+Usage (from the project root):
+    python -m benchmarks.impact_ingestion --rows 500000
+"""
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from benchmarks.generator import write_messy_google_ads_export
+from services.file_service import detect_file_format
+from services.impact_service import read_export_csv, pyarrow_csv
+
+def read_python_engine(file_path, skiprows):
+    """The previous fallback read (error_bad_lines=False, spelled for pandas 2)."""
+    df = pd.read_csv(file_path, skiprows=skiprows, delimiter=',', engine='python', on_bad_lines='skip')
+    return df, None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500000, help='Rows in the generated export')
+    parser.add_argument('--campaigns', type=int, default=50, help='Campaigns per day')
+    parser.add_argument('--bad-line-rate', type=float, default=0.001, help='Share of malformed rows')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed reads per engine (best is reported)')
+    args = parser.parse_args()
+    
+    readers = [('python (old)', read_python_engine), ('c', lambda path, skip: read_export_csv(path, skip, 'c'))]
+    if pyarrow_csv is not None:
+        readers.append(('pyarrow', lambda path, skip: read_export_csv(path, skip, 'pyarrow')))
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'google_ads_export.csv')
+        bad_lines = write_messy_google_ads_export(file_path, args.rows, args.campaigns, args.bad_line_rate)
+        size_mb = os.path.getsize(file_path) / 1e6
+        skiprows = detect_file_format(file_path)['skiprows']
+        
+        print(f"rows={args.rows} file={size_mb:.1f} MB malformed lines={bad_lines} skiprows={skiprows}")
+        if pyarrow_csv is None:
+            print("pyarrow is not installed, skipping its engine")
+        
+        for name, reader in readers:
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                df, skipped = reader(file_path, skiprows)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            
+            skipped_text = 'not counted' if skipped is None else f"{skipped} skipped"
+            print(f"{name:13s} {best * 1000:9.1f} ms {size_mb / best:8.1f} MB/s  rows={len(df)}  {skipped_text}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark upload and /process ingestion of a large Google Ads export.
+
+Times format detection, the upload-time parse, and the /process reload with
+and without the cleaned frame cached beside the upload.
+
+Usage (from the project root):
+    python -m benchmarks.ingestion --rows 500000
+"""
+import argparse
+import os
+import tempfile
+import time
+from benchmarks.generator import write_google_ads_export
+from services.file_service import (detect_file_format, process_uploaded_file, prepare_data_for_forecast,
+                                   get_cleaned_frame_path, remove_uploaded_file)
+
+def timed(func, *args):
+    """Return (seconds, result) for one call."""
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500000, help='Rows in the generated export')
+    parser.add_argument('--campaigns', type=int, default=50, help='Campaigns per day')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'google_ads_export.csv')
+        write_google_ads_export(file_path, args.rows, args.campaigns)
+        size_mb = os.path.getsize(file_path) / 1e6
+        
+        detect_time, file_format = timed(detect_file_format, file_path)
+        upload_time, (df, date_cols, numeric_cols, date_format, _) = timed(process_uploaded_file, file_path)
+        
+        cached_time, _ = timed(prepare_data_for_forecast, file_path, file_format, date_cols[0], date_format, numeric_cols)
+        
+        os.remove(get_cleaned_frame_path(file_path))
+        reparse_time, _ = timed(prepare_data_for_forecast, file_path, file_format, date_cols[0], date_format, numeric_cols)
+        
+        remove_uploaded_file(file_path)
+    
+    print(f"rows={args.rows} file={size_mb:.1f} MB format={file_format['source']} skiprows={file_format['skiprows']}")
+    print(f"detect_file_format:              {detect_time * 1000:9.1f} ms")
+    print(f"process_uploaded_file:           {upload_time * 1000:9.1f} ms")
+    print(f"prepare_data_for_forecast (re-parse CSV):   {reparse_time * 1000:9.1f} ms")
+    print(f"prepare_data_for_forecast (cached frame):   {cached_time * 1000:9.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Measure plot bytes written and results page size with embedded vs. shared plotly.js.
+
+Renders the forecast and components plots for every metric in both
+PLOTLY_JS_MODE settings and reports the bytes written to static/plots and
+the bytes a browser downloads for one results page (every plot iframe plus
+plotly.js, which the shared mode fetches once).
+
+Usage (from the project root):
+    python -m benchmarks.plot_bundle --metrics 10 --days 365
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from benchmarks.forecast_parallel import make_daily_frame
+from services import viz_service
+
+def render_plots(df, metrics, forecast_period):
+    """Render every metric's plots and return the written file paths."""
+    paths = []
+    for metric in metrics:
+        prophet_df = df[['Day', metric]].rename(columns={'Day': 'ds', metric: 'y'})
+        
+        # A flat forecast is enough to measure file sizes
+        future_dates = pd.date_range(prophet_df['ds'].max(), periods=forecast_period + 1, freq='D')[1:]
+        forecast = pd.DataFrame({'ds': pd.concat([prophet_df['ds'], pd.Series(future_dates)], ignore_index=True)})
+        level = prophet_df['y'].mean()
+        forecast['yhat'] = level
+        forecast['yhat_lower'] = level * 0.9
+        forecast['yhat_upper'] = level * 1.1
+        forecast['trend'] = level
+        forecast['weekly'] = np.sin(np.arange(len(forecast)) * 2 * np.pi / 7)
+        forecast['budget_normalized_effect'] = 0.0
+        
+        plot_path, components_path = viz_service.create_forecast_plots(prophet_df, forecast, metric)
+        paths.extend(os.path.join('static', path) for path in (plot_path, components_path) if path)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--metrics', type=int, default=10, help='Number of metrics to plot')
+    parser.add_argument('--days', type=int, default=365, help='Days of history per metric')
+    parser.add_argument('--period', type=int, default=30, help='Forecast period in days')
+    args = parser.parse_args()
+    
+    df = make_daily_frame(args.metrics, args.days)
+    metrics = [col for col in df.columns if col != 'Day']
+    
+    for mode in ['embed', 'shared']:
+        viz_service.PLOTLY_JS_MODE = mode
+        
+        paths = render_plots(df, metrics, args.period)
+        written = sum(os.path.getsize(path) for path in paths)
+        
+        page_load = written
+        if mode == 'shared':
+            source = viz_service.get_plotlyjs_source()
+            page_load += os.path.getsize(os.path.normpath(os.path.join('static/plots', source)))
+        
+        print(f"{mode:>6}: {len(paths)} files, {written / 1e6:8.2f} MB written, "
+              f"{page_load / 1e6:8.2f} MB downloaded per results page")
+        
+        for path in paths:
+            os.remove(path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""
+Run the upload, forecast, plot and export benchmarks and save the timings as JSON.
+
+Writes a Google Ads export (preamble rows, Day/Campaign layout) and a Meta export
+(Reporting starts/ends, comma-thousands numbers) of --campaigns campaigns over --days
+days (or --rows rows), then times every stage an upload goes through for each platform:
+detect_file_format, process_uploaded_file (also with CHUNKED_INGESTION_MIN_BYTES
+lowered, so the chunked streaming reader is timed on the same file),
+calculate_budget_data, generate_forecast (once per --engine), create_forecast_plots
+and the CSV download (load_forecast_data plus generate_forecast_csv on a saved
+forecast). Each case is run --repeat times and the best and median are kept.
+
+Results go to benchmarks/results/<timestamp>.json (or --output) with the git commit,
+library versions and parameters, and --compare prints each case against an earlier
+run, exiting with status 1 when any case is more than --threshold slower.
+
+Usage (from the project root):
+    python -m benchmarks.suite --campaigns 20 --days 365 --engine least_squares --engine prophet
+    python -m benchmarks.suite --campaigns 50 --rows 1000000 --engine least_squares
+    python -m benchmarks.suite --compare benchmarks/results/20261017-120000.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+import pandas as pd
+from benchmarks.generator import write_google_ads_export, write_meta_export
+from config import FORECAST_ENGINE
+from services import model_cache, file_service
+from services.file_service import (detect_file_format, process_uploaded_file, calculate_budget_data,
+                                   PLATFORM_DISPLAY_NAMES)
+from services.aggregation_service import aggregate_for_forecast
+from services.forecast_service import generate_forecast, build_metric_jobs, fit_metric_model, predict_with_budget
+from services.viz_service import create_forecast_plots
+from utils.export_utils import save_forecast_data, load_forecast_data, remove_forecast_data, generate_forecast_csv
+
+RESULTS_FOLDER = os.path.join('benchmarks', 'results')
+
+# Export writer and the metrics forecast for each platform
+PLATFORMS = {
+    'google_ads': (write_google_ads_export, ['Clicks', 'Cost', 'Conversions']),
+    'meta': (write_meta_export, ['Impressions', 'Amount spent (GBP)', 'Link clicks'])
+}
+
+PACKAGES = ['numpy', 'pandas', 'prophet', 'plotly', 'flask']
+
+def time_case(run, repeat, setup=None, teardown=None):
+    """
+    Time a benchmark case.
+    
+    Args:
+        run: Function timed on each repeat, called with setup's return value (if any)
+        repeat: Number of timed runs
+        setup: Optional untimed function called before each run
+        teardown: Optional untimed function called after each run with run's return value
+        
+    Returns:
+        dict: 'best' and 'median' seconds and every run's 'seconds'
+    """
+    seconds = []
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        output = run(*args)
+        seconds.append(time.perf_counter() - start)
+        if teardown:
+            teardown(output)
+    
+    return {'best': min(seconds), 'median': statistics.median(seconds), 'seconds': seconds}
+
+def remove_plots(plot_paths):
+    """Remove written plot files, so the next run renders them instead of re-using them."""
+    for path in plot_paths:
+        if path and os.path.exists(os.path.join('static', path)):
+            os.remove(os.path.join('static', path))
+
+def benchmark_platform(platform_name, temp_dir, args):
+    """
+    Run every case for one platform's export.
+    
+    Args:
+        platform_name: Key in PLATFORMS
+        temp_dir: Directory the export is written to
+        args: Parsed command line arguments
+        
+    Returns:
+        list: One result dict per case
+    """
+    write_export, metrics = PLATFORMS[platform_name]
+    file_path = os.path.join(temp_dir, f'{platform_name}.csv')
+    write_export(file_path, num_rows=args.rows, num_campaigns=args.campaigns, num_days=None if args.rows else args.days)
+    
+    results = []
+    
+    def record(case, timing, **details):
+        results.append({'name': '/'.join([platform_name, case] + list(details.values())), 'platform': platform_name,
+                        'case': case, **details, **timing})
+        print(f"{results[-1]['name']:45s} best {timing['best'] * 1000:10.1f} ms  "
+              f"median {timing['median'] * 1000:10.1f} ms")
+    
+    record('detect_file_format', time_case(lambda: detect_file_format(file_path), args.repeat))
+    record('process_uploaded_file', time_case(lambda: process_uploaded_file(file_path), args.repeat))
+    
+    # Exports only take the chunked reader past CHUNKED_INGESTION_MIN_BYTES, so lower it for this case
+    chunked_min_bytes = file_service.CHUNKED_INGESTION_MIN_BYTES
+    file_service.CHUNKED_INGESTION_MIN_BYTES = 0
+    try:
+        record('process_uploaded_file', time_case(lambda: process_uploaded_file(file_path), args.repeat), reader='chunked')
+    finally:
+        file_service.CHUNKED_INGESTION_MIN_BYTES = chunked_min_bytes
+    
+    df, date_cols, _, _, file_format = process_uploaded_file(file_path)
+    date_col = date_cols[0]
+    record('calculate_budget_data', time_case(lambda: calculate_budget_data(df, file_format), args.repeat))
+    
+    daily, _ = aggregate_for_forecast(df, date_col, metrics)
+    
+    forecasts = {}
+    for engine in args.engine:
+        def run_forecast(engine=engine):
+            forecasts[engine] = generate_forecast(daily.copy(), date_col, metrics, args.period, max_workers=args.workers,
+                                                  engine=engine, intervals=args.intervals, create_plots=False)
+        record('generate_forecast', time_case(run_forecast, args.repeat), engine=engine)
+    
+    # Plots are drawn from a real fit of the first metric, with the engine the app uses by default
+    prophet_df = build_metric_jobs(daily.copy(), date_col, metrics[:1])[0][1]
+    model = fit_metric_model(prophet_df, FORECAST_ENGINE)
+    forecast, _ = predict_with_budget(model, prophet_df, metrics[0], args.period, engine=FORECAST_ENGINE,
+                                      intervals=args.intervals)
+    record('create_forecast_plots', time_case(lambda: create_forecast_plots(prophet_df, forecast, metrics[0]),
+                                              args.repeat, teardown=remove_plots))
+    
+    # The download re-reads the saved forecast on every request, so loading is part of the case
+    last_date = daily[date_col].max()
+    end_date = last_date + pd.Timedelta(days=args.period)
+    forecast_id = save_forecast_data(forecasts[args.engine[0]], 'Benchmark', PLATFORM_DISPLAY_NAMES[platform_name], 1000.0,
+                                     '£', f"{last_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}",
+                                     engine=args.engine[0], intervals=args.intervals)
+    try:
+        def run_export():
+            return ''.join(generate_forecast_csv(load_forecast_data(forecast_id), include_bounds=True))
+        record('generate_forecast_csv', time_case(run_export, args.repeat))
+    finally:
+        remove_forecast_data(forecast_id)
+    
+    return results
+
+def get_environment():
+    """Describe the code and machine the suite ran on."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    
+    return {'git_commit': commit, 'python': platform.python_version(), 'platform': platform.platform(),
+            'cpu_count': os.cpu_count(), 'packages': versions}
+
+def compare_runs(previous, current, threshold):
+    """
+    Print every case's change against an earlier run.
+    
+    Args:
+        previous: Suite results loaded from an earlier JSON file
+        current: Suite results from this run
+        threshold: Slowdown of the best time (0.1 = 10%) reported as a regression
+        
+    Returns:
+        list: Names of the cases that regressed
+    """
+    previous_cases = {case['name']: case for case in previous['cases']}
+    print(f"\nCompared with {previous['created_at']} (commit {(previous['environment']['git_commit'] or '?')[:12]}):")
+    
+    regressions = []
+    for case in current['cases']:
+        before = previous_cases.get(case['name'])
+        if before is None:
+            print(f"{case['name']:45s} new case")
+            continue
+        
+        ratio = case['best'] / before['best'] if before['best'] > 0 else float('inf')
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(case['name'])
+        print(f"{case['name']:45s} {before['best'] * 1000:10.1f} ms -> {case['best'] * 1000:10.1f} ms "
+              f"({ratio:5.2f}x){'  REGRESSION' if regressed else ''}")
+    
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--campaigns', type=int, default=20, help='Campaigns in each export')
+    parser.add_argument('--days', type=int, default=365, help='Days of history in each export')
+    parser.add_argument('--rows', type=int, help='Data rows in each export (overrides --days: rows / campaigns)')
+    parser.add_argument('--platform', action='append', choices=list(PLATFORMS),
+                        help='Platform export to benchmark (repeatable, default: all)')
+    parser.add_argument('--period', type=int, default=30, help='Forecast period in days')
+    parser.add_argument('--engine', action='append',
+                        help='Engine timed by generate_forecast (repeatable, default: least_squares and prophet)')
+    parser.add_argument('--intervals', default='full', help='Interval strategy for forecasts')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for generate_forecast')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case')
+    parser.add_argument('--output', help='Results JSON path (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='Earlier results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Slowdown reported as a regression')
+    args = parser.parse_args()
+    args.platform = args.platform or list(PLATFORMS)
+    args.engine = args.engine or ['least_squares', 'prophet']
+    
+    # Measure real fits, not model cache hits (worker processes read the environment)
+    model_cache.MODEL_CACHE_ENABLED = False
+    os.environ['MODEL_CACHE_ENABLED'] = '0'
+    
+    created_at = datetime.now(timezone.utc)
+    print(f"campaigns={args.campaigns} days={args.days} rows={args.rows} period={args.period} engines={','.join(args.engine)} "
+          f"intervals={args.intervals} repeat={args.repeat}")
+    
+    cases = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for platform_name in args.platform:
+            cases.extend(benchmark_platform(platform_name, temp_dir, args))
+    
+    suite = {
+        'created_at': created_at.isoformat(timespec='seconds'),
+        'environment': get_environment(),
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'threshold')},
+        'cases': cases
+    }
+    
+    output = args.output or os.path.join(RESULTS_FOLDER, f"{created_at.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(suite, f, indent=2)
+    print(f"\nSaved results to {output}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        if previous['parameters'] != suite['parameters']:
+            print("Warning: the earlier run used different parameters, timings may not be comparable")
+        regressions = compare_runs(previous, suite, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
@@ -7,9 +7,89 @@ UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'csv'}
 DEBUG = True
 
+# Forecasting configuration
+# Number of worker processes used to fit metrics in parallel (1 = fit serially)
+FORECAST_MAX_WORKERS = int(os.environ.get('FORECAST_MAX_WORKERS', min(4, os.cpu_count() or 1)))
+
+# Metrics are fitted serially when every series is shorter than this (such fits take less time
+# than handing them to a worker process)
+FORECAST_PARALLEL_MIN_ROWS = int(os.environ.get('FORECAST_PARALLEL_MIN_ROWS', 180))
+
+# Forecasting engine used unless a request picks one: 'prophet' or 'least_squares' (fast what-ifs)
+FORECAST_ENGINE = os.environ.get('FORECAST_ENGINE', 'prophet')
+
+# How forecast intervals are computed unless a request picks a strategy: 'full' (Prophet's 1000
+# simulations over history and horizon), 'reduced' (INTERVAL_REDUCED_SAMPLES simulations),
+# 'horizon' (full simulations on forecast dates only) or 'none' (no intervals, for draft runs)
+FORECAST_INTERVALS = os.environ.get('FORECAST_INTERVALS', 'full')
+INTERVAL_REDUCED_SAMPLES = int(os.environ.get('INTERVAL_REDUCED_SAMPLES', 200))
+
+# Per-campaign forecasting: campaigns with at least CAMPAIGN_MIN_HISTORY_DAYS of history use CAMPAIGN_ENGINE
+# (fitted outside the model cache), shorter ones fall back to the least squares engine, and series are sent
+# to the worker pool CAMPAIGN_BATCH_SIZE at a time
+CAMPAIGN_ENGINE = os.environ.get('CAMPAIGN_ENGINE', 'least_squares')
+CAMPAIGN_MIN_HISTORY_DAYS = int(os.environ.get('CAMPAIGN_MIN_HISTORY_DAYS', 56))
+CAMPAIGN_BATCH_SIZE = int(os.environ.get('CAMPAIGN_BATCH_SIZE', 50))
+
+# Fitted model cache (re-used when only the budget or forecast period changes)
+MODEL_CACHE_ENABLED = os.environ.get('MODEL_CACHE_ENABLED', '1') == '1'
+MODEL_CACHE_FOLDER = 'model_cache'
+MODEL_CACHE_MAX_BYTES = int(os.environ.get('MODEL_CACHE_MAX_BYTES', 500 * 1024 * 1024))
+
+# Rows are collapsed to one observation per period before fitting: 'D' (daily) or 'W' (weekly)
+FORECAST_AGGREGATION = os.environ.get('FORECAST_AGGREGATION', 'D')
+
+# How plot files load plotly.js: 'shared' serves one cacheable copy from static/js/vendor,
+# 'embed' inlines the ~3.5 MB library into every plot file
+PLOTLY_JS_MODE = os.environ.get('PLOTLY_JS_MODE', 'shared')
+
+# Maximum points drawn per plot trace; longer series are downsampled with LTTB (0 = draw every point)
+PLOT_MAX_POINTS = int(os.environ.get('PLOT_MAX_POINTS', 2000))
+
+# Uploads at least this large are streamed in chunks and aggregated to daily totals
+CHUNKED_INGESTION_MIN_BYTES = int(os.environ.get('CHUNKED_INGESTION_MIN_BYTES', 200 * 1024 * 1024))
+INGESTION_CHUNK_ROWS = int(os.environ.get('INGESTION_CHUNK_ROWS', 200000))
+
+# Background forecast jobs (state is shared between app processes through SQLite)
+JOB_FOLDER = 'temp_jobs'
+JOB_MAX_WORKERS = int(os.environ.get('JOB_MAX_WORKERS', 2))
+
+# Queued and running jobs are marked alive every JOB_HEARTBEAT_INTERVAL seconds; jobs not heard from
+# for JOB_STALE_SECONDS (their app process was restarted or died) are marked as failed
+JOB_HEARTBEAT_INTERVAL = int(os.environ.get('JOB_HEARTBEAT_INTERVAL', 30))
+JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', 180))
+
+# Headless batch forecasting (`flask forecast-batch`): files forecast at once, and in watch mode
+# how often the input directory is scanned and how long a file must be unchanged before it is picked up
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', min(4, os.cpu_count() or 1)))
+BATCH_WATCH_INTERVAL = int(os.environ.get('BATCH_WATCH_INTERVAL', 30))
+BATCH_SETTLE_SECONDS = int(os.environ.get('BATCH_SETTLE_SECONDS', 10))
+
+# Impact analysis results are kept server-side (the cookie only carries an ID), with the most
+# recently used IMPACT_CACHE_SIZE sessions held in memory; sessions idle for IMPACT_TTL_SECONDS are purged
+IMPACT_FOLDER = 'temp_impact'
+IMPACT_CACHE_SIZE = int(os.environ.get('IMPACT_CACHE_SIZE', 32))
+IMPACT_TTL_SECONDS = int(os.environ.get('IMPACT_TTL_SECONDS', 24 * 3600))
+
+# Number of uploaded files processed at once for impact analysis (1 = one after another)
+IMPACT_MAX_WORKERS = int(os.environ.get('IMPACT_MAX_WORKERS', 4))
+
+# CSV engine for impact analysis exports: 'auto' (pyarrow when installed), 'pyarrow' or 'c'
+IMPACT_CSV_ENGINE = os.environ.get('IMPACT_CSV_ENGINE', 'auto')
+
+# Artifact lifecycle: files older than their TTL are deleted, then the oldest files
+# go until everything fits in ARTIFACT_MAX_BYTES (swept every ARTIFACT_SWEEP_INTERVAL seconds, 0 = off)
+FORECAST_FOLDER = 'temp_forecasts'
+PLOT_FOLDER = 'static/plots'
+PLOT_TTL_SECONDS = int(os.environ.get('PLOT_TTL_SECONDS', 7 * 24 * 3600))
+FORECAST_TTL_SECONDS = int(os.environ.get('FORECAST_TTL_SECONDS', 7 * 24 * 3600))
+UPLOAD_TTL_SECONDS = int(os.environ.get('UPLOAD_TTL_SECONDS', 24 * 3600))
+ARTIFACT_MAX_BYTES = int(os.environ.get('ARTIFACT_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+ARTIFACT_SWEEP_INTERVAL = int(os.environ.get('ARTIFACT_SWEEP_INTERVAL', 3600))
+
 # Ensure required directories exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs('static/plots', exist_ok=True)
+os.makedirs(PLOT_FOLDER, exist_ok=True)
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
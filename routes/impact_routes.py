@@ -3,7 +3,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from config import logger, UPLOAD_FOLDER
 from utils.file_utils import allowed_file, generate_unique_filename
 from services.impact_service import process_impact_files
-import json
+from services.impact_store import save_impact_data, load_impact_data, load_impact_metrics, delete_impact_data
 
 impact = Blueprint('impact', __name__)
 
@@ -48,11 +48,21 @@ def upload_files():
         # Process all uploaded files
         impact_data = process_impact_files(uploaded_files)
         
-        # Store the impact data in session
-        session['impact_data'] = json.dumps(impact_data)
+        if not impact_data['forecasts']:
+            # Nothing usable came out of any file, so say why for each of them
+            for file_info in uploaded_files:
+                if os.path.exists(file_info['path']):
+                    os.remove(file_info['path'])
+            for file_report in impact_data['files']:
+                flash(f"Could not process {file_report['name']}: {file_report['error']}")
+            return redirect(url_for('impact.index'))
         
-        # Store paths to clean up later
-        session['impact_file_paths'] = [f['path'] for f in uploaded_files]
+        # Keep the impact data server-side, the cookie only carries its ID
+        # (the uploaded files are removed with it)
+        previous_id = session.get('impact_session_id')
+        session['impact_session_id'] = save_impact_data(impact_data, [f['path'] for f in uploaded_files])
+        if previous_id:
+            delete_impact_data(previous_id)
         
         return redirect(url_for('impact.dashboard'))
         
@@ -70,12 +80,17 @@ def upload_files():
 @impact.route('/impact/dashboard')
 def dashboard():
     """Render the impact analysis dashboard."""
-    if 'impact_data' not in session:
+    if 'impact_session_id' not in session:
         flash('No impact data available. Please upload files first.')
         return redirect(url_for('impact.index'))
     
     try:
-        impact_data = json.loads(session['impact_data'])
+        impact_data = load_impact_data(session['impact_session_id'])
+        if impact_data is None:
+            session.pop('impact_session_id', None)
+            flash('Impact data has expired. Please upload files again.')
+            return redirect(url_for('impact.index'))
+        
         return render_template('impact_dashboard.html', impact_data=impact_data)
     except Exception as e:
         error_message = f'Error loading impact data: {str(e)}'
@@ -86,17 +101,20 @@ def dashboard():
 @impact.route('/impact/refresh', methods=['POST'])
 def refresh():
     """Refresh metric data without budget changes."""
-    if 'impact_data' not in session:
+    if 'impact_session_id' not in session:
         return jsonify({'error': 'No impact data available'}), 400
     
     try:
-        impact_data = json.loads(session['impact_data'])
+        # Only the metrics are read back, the dashboard already has everything else
+        forecasts = load_impact_metrics(session['impact_session_id'])
+        if forecasts is None:
+            return jsonify({'error': 'Impact data has expired'}), 400
         
         # Simply return the current data without modifications
         # In a real implementation, you might recalculate metrics or refresh from source
         # but without budget change functionality
         
-        return jsonify(impact_data)
+        return jsonify({'forecasts': forecasts})
     except Exception as e:
         logger.error(f'Error in refresh: {str(e)}')
         return jsonify({'error': str(e)}), 500
@@ -104,12 +122,8 @@ def refresh():
 @impact.route('/impact/cleanup', methods=['POST'])
 def cleanup():
     """Clean up uploaded files when done with analysis."""
-    if 'impact_file_paths' in session:
-        for file_path in session['impact_file_paths']:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        
-        session.pop('impact_file_paths', None)
-        session.pop('impact_data', None)
+    impact_session_id = session.pop('impact_session_id', None)
+    if impact_session_id:
+        delete_impact_data(impact_session_id)
     
     return jsonify({'status': 'success'})
\ No newline at end of file
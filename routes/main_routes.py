@@ -1,12 +1,20 @@
 import os
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, send_file
-from config import logger, UPLOAD_FOLDER
+import numpy as np
+from flask import (Blueprint, render_template, request, redirect, url_for, flash, session, jsonify,
+                   Response, stream_with_context)
+from werkzeug.utils import secure_filename
+from config import logger, UPLOAD_FOLDER, FORECAST_AGGREGATION, FORECAST_ENGINE, FORECAST_INTERVALS, CAMPAIGN_ENGINE
 from utils.file_utils import allowed_file, generate_unique_filename
-from services.file_service import process_uploaded_file, prepare_data_for_forecast, calculate_budget_data
-from services.forecast_service import generate_forecast
+from services.file_service import (process_uploaded_file, prepare_data_for_forecast, calculate_budget_data, remove_uploaded_file,
+                                   PLATFORM_DISPLAY_NAMES)
+from services.forecast_service import generate_budget_sweep, FORECAST_ENGINES, INTERVAL_STRATEGIES
+from services.aggregation_service import aggregate_for_forecast, get_forecast_periods
+from services.model_cache import get_model_cache_stats
+from services.artifact_service import get_artifact_stats
+from services.job_service import submit_forecast_job, get_job
 from utils.date_utils import convert_column_to_datetime
 from datetime import datetime
-from utils.export_utils import save_forecast_data, load_forecast_data, generate_forecast_csv_from_file
+from utils.export_utils import load_forecast_data, load_forecast_results, generate_forecast_csv, generate_campaign_csv
 
 main = Blueprint('main', __name__)
 
@@ -47,14 +55,14 @@ def upload_file():
                 error_msg = 'No date column found. Please ensure your CSV has a column with dates.'
                 logger.error(error_msg)
                 flash(error_msg)
-                os.remove(file_path)
+                remove_uploaded_file(file_path)
                 return redirect(url_for('main.index'))
                 
             if not numeric_cols:
                 error_msg = 'No numeric columns found to forecast.'
                 logger.error(error_msg)
                 flash(error_msg)
-                os.remove(file_path)
+                remove_uploaded_file(file_path)
                 return redirect(url_for('main.index'))
             
             # Get the selected date column (first/only one in the list)
@@ -105,8 +113,7 @@ def upload_file():
             logger.error(error_message)
             flash(error_message)
             # Clean up the file
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            remove_uploaded_file(file_path)
             return redirect(url_for('main.index'))
     else:
         flash('File type not allowed. Please upload a CSV file.')
@@ -119,6 +126,24 @@ def process():
     forecast_period = int(request.form.get('forecast_period', 30))
     date_format = request.form.get('date_format', session.get('detected_date_format', 'auto'))
     
+    # Period rows are collapsed to before fitting (daily or weekly totals)
+    aggregation = request.form.get('aggregation', FORECAST_AGGREGATION)
+    if aggregation not in ('D', 'W'):
+        aggregation = FORECAST_AGGREGATION
+    
+    # Model used for this request (the least squares engine is much faster for quick what-ifs)
+    engine = request.form.get('engine', FORECAST_ENGINE)
+    if engine not in FORECAST_ENGINES:
+        engine = FORECAST_ENGINE
+    
+    # How forecast intervals are computed ('none' for quick drafts)
+    intervals = request.form.get('intervals', FORECAST_INTERVALS)
+    if intervals not in INTERVAL_STRATEGIES:
+        intervals = FORECAST_INTERVALS
+    
+    # Also forecast each campaign (files with a campaign column only)
+    by_campaign = request.form.get('by_campaign') == '1'
+    
     # Get forecast title
     forecast_title = request.form.get('forecast_title', 'Forecast')
     
@@ -166,12 +191,7 @@ def process():
     platform_source = file_format.get('source', 'unknown')
     
     # Map source to display name
-    platform_display = {
-        'google_ads': 'Google Ads',
-        'meta': 'Meta Ads', 
-        'amazon': 'Amazon Ads',
-        'unknown': 'Unknown Platform'
-    }.get(platform_source, 'Unknown Platform')
+    platform_display = PLATFORM_DISPLAY_NAMES.get(platform_source, PLATFORM_DISPLAY_NAMES['unknown'])
     
     # Use the date column that was automatically selected
     date_col = session.get('selected_date_col')
@@ -194,36 +214,30 @@ def process():
         # Get file format from session or re-detect it
         file_format = session.get('file_format')
         
-        # Prepare data for forecasting
-        df = prepare_data_for_forecast(file_path, file_format, date_col, date_format, selected_metrics)
-        
-        # Generate forecasts with budget change ratio
-        results = generate_forecast(
-            df, 
-            date_col, 
-            selected_metrics, 
-            forecast_period, 
-            budget_change_ratio=budget_change_ratio
+        # Run the forecast in the background; the browser polls for progress
+        job_id = submit_forecast_job(
+            file_path,
+            file_format,
+            date_col,
+            date_format,
+            selected_metrics,
+            forecast_period,
+            budget_change_ratio,
+            {
+                'forecast_title': forecast_title,
+                'platform_display': platform_display,
+                'estimated_budget': estimated_budget,
+                'currency': currency,
+                'date_range': date_range
+            },
+            aggregation=aggregation,
+            engine=engine,
+            intervals=intervals,
+            by_campaign=by_campaign,
+            campaign_engine=CAMPAIGN_ENGINE
         )
         
-        # Clean up the file
-        os.remove(file_path)
-        
-        # Save forecast data to temp file and get ID instead of storing in session
-        forecast_id = save_forecast_data(
-            results, 
-            forecast_title, 
-            platform_display, 
-            estimated_budget, 
-            currency, 
-            date_range,
-            budget_change_ratio=budget_change_ratio  # Add budget change info to saved data
-        )
-        
-        # Only store the forecast ID in session
-        session['forecast_id'] = forecast_id
-        
-        # Clean up upload-related session variables
+        # Clean up upload-related session variables (the job owns the file now)
         session.pop('uploaded_file', None)
         session.pop('original_filename', None)
         session.pop('detected_date_format', None)
@@ -232,24 +246,14 @@ def process():
         session.pop('last_date', None)
         session.pop('budget_data', None)
         
-        # Pass all forecast metadata to the template
-        return render_template('results.html', 
-                              results=results,
-                              forecast_title=forecast_title,
-                              platform=platform_display,
-                              budget=estimated_budget,
-                              currency=currency,
-                              date_range=date_range,
-                              budget_change_ratio=budget_change_ratio,  # Pass budget change to template
-                              forecast_id=forecast_id)
+        return redirect(url_for('main.job_progress', job_id=job_id))
     
     except Exception as e:
         error_message = f'Error processing file: {str(e)}'
         logger.error(error_message)
         flash(error_message)
         # Clean up the file
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        remove_uploaded_file(file_path)
         # Clean up all session data on error
         session.pop('uploaded_file', None)
         session.pop('original_filename', None)
@@ -260,7 +264,132 @@ def process():
         session.pop('budget_data', None)
         session.pop('forecast_id', None)
         return redirect(url_for('main.index'))
+
+@main.route('/jobs/<job_id>')
+def job_progress(job_id):
+    """Show a progress page that polls the job status until the forecast is ready."""
+    job = get_job(job_id)
+    
+    if not job:
+        flash('Forecast job not found. Please upload again.')
+        return redirect(url_for('main.index'))
+    
+    return render_template('job_status.html', job=job)
+
+@main.route('/jobs/<job_id>/status')
+def job_status(job_id):
+    """Return the status and per-metric progress of a forecast job."""
+    job = get_job(job_id)
+    
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    if job['status'] == 'finished':
+        job['result_url'] = url_for('main.job_result', job_id=job_id)
+    
+    return jsonify(job)
+
+@main.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Render the results of a finished forecast job."""
+    job = get_job(job_id)
+    
+    if not job:
+        flash('Forecast job not found. Please upload again.')
+        return redirect(url_for('main.index'))
+    
+    if job['status'] == 'failed':
+        flash(f"Error processing file: {job['error']}")
+        return redirect(url_for('main.index'))
+    
+    if job['status'] != 'finished':
+        return redirect(url_for('main.job_progress', job_id=job_id))
+    
+    metadata, results = load_forecast_results(job['forecast_id'])
+    if metadata is None:
+        flash('Forecast results are no longer available. Please generate the forecast again.')
+        return redirect(url_for('main.index'))
+    
+    # Only store the forecast ID in session
+    session['forecast_id'] = job['forecast_id']
+    
+    # Pass all forecast metadata to the template
+    return render_template('results.html', 
+                          results=results,
+                          forecast_title=metadata['forecast_title'],
+                          platform=metadata['platform'],
+                          budget=metadata['budget'],
+                          currency=metadata['currency'],
+                          date_range=metadata['date_range'],
+                          budget_change_ratio=metadata['budget_change_ratio'],
+                          aggregation=metadata.get('aggregation'),
+                          engine=metadata.get('engine'),
+                          intervals=metadata.get('intervals'),
+                          has_campaigns='campaigns' in metadata,
+                          forecast_id=job['forecast_id'])
+
+@main.route('/sweep', methods=['POST'])
+def budget_sweep():
+    """Evaluate a range of budget ratios for the uploaded file and return the response curve as JSON."""
+    selected_metrics = request.form.getlist('metrics')
+    forecast_period = int(request.form.get('forecast_period', 30))
+    date_format = request.form.get('date_format', session.get('detected_date_format', 'auto'))
+    aggregation = request.form.get('aggregation', FORECAST_AGGREGATION)
+    if aggregation not in ('D', 'W'):
+        aggregation = FORECAST_AGGREGATION
+    
+    # Model used for this request (the least squares engine is much faster for quick what-ifs)
+    engine = request.form.get('engine', FORECAST_ENGINE)
+    if engine not in FORECAST_ENGINES:
+        engine = FORECAST_ENGINE
+    
+    # How forecast intervals are computed ('none' for quick drafts)
+    intervals = request.form.get('intervals', FORECAST_INTERVALS)
+    if intervals not in INTERVAL_STRATEGIES:
+        intervals = FORECAST_INTERVALS
+    
+    # Budget ratios to evaluate, e.g. 0.5x to 2x in 0.1 steps
+    try:
+        min_ratio = float(request.form.get('min_ratio', 0.5))
+        max_ratio = float(request.form.get('max_ratio', 2.0))
+        ratio_step = float(request.form.get('ratio_step', 0.1))
+    except ValueError:
+        return jsonify({'error': 'Budget ratios must be numbers'}), 400
+    
+    if min_ratio < 0 or max_ratio < min_ratio or ratio_step <= 0:
+        return jsonify({'error': 'Invalid budget ratio range'}), 400
+    
+    budget_ratios = np.round(np.arange(min_ratio, max_ratio + ratio_step / 2, ratio_step), 4).tolist()
+    if len(budget_ratios) > 200:
+        return jsonify({'error': 'Too many budget ratios requested (maximum 200)'}), 400
+    
+    date_col = session.get('selected_date_col')
+    file_format = session.get('file_format')
+    if not date_col or 'uploaded_file' not in session:
+        return jsonify({'error': 'No file found. Please upload again.'}), 400
+    
+    file_path = os.path.join(UPLOAD_FOLDER, session['uploaded_file'])
+    if not os.path.exists(file_path):
+        return jsonify({'error': 'File not found. Please upload again.'}), 400
     
+    try:
+        df = prepare_data_for_forecast(file_path, file_format, date_col, date_format, selected_metrics)
+        df, aggregation_report = aggregate_for_forecast(df, date_col, selected_metrics, aggregation)
+        
+        # The uploaded file is kept so the user can still run /process afterwards
+        forecast_periods = get_forecast_periods(forecast_period, aggregation, aggregation_report['days_after_last_period'])
+        sweep = generate_budget_sweep(df, date_col, selected_metrics, forecast_periods,
+                                      budget_ratios, frequency=aggregation, engine=engine, intervals=intervals)
+        sweep['aggregation'] = aggregation_report
+        
+        if sweep['plot_path']:
+            sweep['plot_url'] = url_for('static', filename=sweep['plot_path'])
+        
+        return jsonify(sweep)
+    except Exception as e:
+        logger.error(f'Error running budget sweep: {str(e)}')
+        return jsonify({'error': str(e)}), 500
+
 @main.route('/download_forecast/<forecast_id>')
 def download_forecast(forecast_id):
     """Generate and download forecast results as CSV using stored forecast ID."""
@@ -271,21 +400,37 @@ def download_forecast(forecast_id):
         flash('No forecast data available for download. Please generate a forecast first.')
         return redirect(url_for('main.index'))
     
-    # Generate CSV file
-    csv_data = generate_forecast_csv_from_file(forecast_id)
-    
-    if not csv_data:
-        flash('Error generating CSV file.')
-        return redirect(url_for('main.index'))
+    # Forecast ranges are only exported when asked for
+    include_bounds = request.args.get('bounds') == '1'
     
     # Create a safe filename
     forecast_title = forecast_data['metadata']['forecast_title']
-    safe_filename = forecast_title.replace(' ', '_').replace('/', '-')
+    safe_filename = secure_filename(forecast_title.replace(' ', '_').replace('/', '-')) or 'forecast'
     
-    # Return the CSV file as a download
-    return send_file(
-        csv_data,
+    if request.args.get('campaigns') == '1':
+        if 'campaigns' not in forecast_data['metadata']:
+            flash('This forecast was not broken down by campaign.')
+            return redirect(url_for('main.index'))
+        
+        return Response(
+            stream_with_context(generate_campaign_csv(forecast_id, forecast_data)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename="{safe_filename}_campaign_forecast.csv"'}
+        )
+    
+    # Stream the CSV as it is generated
+    return Response(
+        stream_with_context(generate_forecast_csv(forecast_data, include_bounds=include_bounds)),
         mimetype='text/csv',
-        as_attachment=True,
-        download_name=f"{safe_filename}_forecast.csv"
-    )
\ No newline at end of file
+        headers={'Content-Disposition': f'attachment; filename="{safe_filename}_forecast.csv"'}
+    )
+
+@main.route('/model_cache/stats')
+def model_cache_stats():
+    """Return fitted model cache hit/miss counters and disk usage."""
+    return jsonify(get_model_cache_stats())
+
+@main.route('/artifacts/stats')
+def artifact_stats():
+    """Return disk usage of plots, saved forecasts and uploads, and artifact sweep counters."""
+    return jsonify(get_artifact_stats())
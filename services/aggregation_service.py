@@ -0,0 +1,194 @@
+import math
+import pandas as pd
+from config import logger
+
+# Rate metrics recomputed from their summed components: (numerator, denominator, scale)
+# Checked in order, so more specific names come first
+RATE_DEFINITIONS = [
+    (['conversion rate', 'conv. rate', 'conv rate', 'cvr'], ('conversions', 'clicks', 100)),
+    (['ctr', 'click through rate', 'click-through rate'], ('clicks', 'impressions', 100)),
+    (['cpc', 'cost per click', 'cost / click'], ('cost', 'clicks', 1)),
+    (['cpm', 'cost per mille', 'cost per thousand'], ('cost', 'impressions', 1000)),
+    (['cpa', 'cost per conversion', 'cost / conv', 'cost per result'], ('cost', 'conversions', 1)),
+    (['roas', 'return on ad spend'], ('value', 'cost', 1)),
+]
+
+# Other metrics that are ratios or averages and can't be summed across rows
+RATE_METRIC_TERMS = ['rate', 'avg', 'average', 'cost per', 'cost /', '%']
+
+def is_rate_metric(col):
+    """Check whether a metric is a rate or average rather than a count."""
+    col_lower = col.lower()
+    return (get_rate_definition(col) is not None or
+            any(term in col_lower for term in RATE_METRIC_TERMS))
+
+def get_rate_definition(col):
+    """
+    Get how a rate metric is computed from count metrics.
+    
+    Args:
+        col: Column name
+        
+    Returns:
+        tuple: (numerator_component, denominator_component, scale) or None
+    """
+    col_lower = col.lower()
+    for terms, definition in RATE_DEFINITIONS:
+        if any(term in col_lower for term in terms):
+            return definition
+    return None
+
+def find_component_columns(columns):
+    """
+    Find the count columns rate metrics are built from (clicks, impressions, cost, conversions, value).
+    
+    Args:
+        columns: Numeric column names
+        
+    Returns:
+        dict: Component name to column name, for the components present
+    """
+    components = {}
+    for col in columns:
+        if is_rate_metric(col):
+            continue
+        
+        col_lower = col.lower()
+        if 'click' in col_lower:
+            components.setdefault('clicks', col)
+        elif 'impr' in col_lower or 'impression' in col_lower:
+            components.setdefault('impressions', col)
+        elif 'value' in col_lower or 'revenue' in col_lower:
+            components.setdefault('value', col)
+        elif 'conv' in col_lower or 'purchase' in col_lower:
+            components.setdefault('conversions', col)
+        elif any(term in col_lower for term in ['cost', 'spend', 'amount']):
+            components.setdefault('cost', col)
+    
+    return components
+
+def aggregate_for_forecast(df, date_col, metrics, frequency='D'):
+    """
+    Collapse rows to one observation per day (or week) before fitting.
+    
+    Count metrics are summed. Rate metrics are recomputed from their summed
+    components when those columns exist (e.g. CTR from clicks and impressions),
+    otherwise averaged over the rows in each period. Weeks the export only covers
+    part of (it starts or ends mid-week) are left out, as their totals would look
+    like a drop in activity.
+    
+    Args:
+        df: DataFrame containing the data
+        date_col: Name of the date column
+        metrics: List of metrics to forecast
+        frequency: 'D' for daily or 'W' for weekly totals
+        
+    Returns:
+        tuple: (aggregated DataFrame, report dict with input_rows, output_rows, rows_removed, frequency,
+                partial_periods_removed and days_after_last_period, the observed days after the last
+                period kept)
+    """
+    metrics = [metric for metric in metrics if metric in df.columns and metric != date_col]
+    numeric_cols = df.select_dtypes(include=['number']).columns
+    components = find_component_columns(numeric_cols)
+    
+    # Rates need their components summed too, even if they are not being forecast
+    rate_definitions = {}
+    sum_cols = []
+    mean_cols = []
+    for metric in metrics:
+        definition = get_rate_definition(metric)
+        if definition and definition[0] in components and definition[1] in components:
+            rate_definitions[metric] = definition
+        elif is_rate_metric(metric):
+            mean_cols.append(metric)
+        else:
+            sum_cols.append(metric)
+    
+    for numerator, denominator, _ in rate_definitions.values():
+        for component in (components[numerator], components[denominator]):
+            if component not in sum_cols:
+                sum_cols.append(component)
+    
+    # Weeks are labelled by the Sunday they end on, matching the 'W' dates Prophet forecasts
+    df = df.dropna(subset=[date_col])
+    period_end = df[date_col].dt.to_period(frequency).dt.end_time.dt.normalize()
+    grouped = df.groupby(period_end.rename(date_col))
+    
+    aggregated = grouped[sum_cols].sum(min_count=1)
+    if mean_cols:
+        aggregated[mean_cols] = grouped[mean_cols].mean()
+    
+    for metric, (numerator, denominator, scale) in rate_definitions.items():
+        totals = aggregated[components[denominator]]
+        aggregated[metric] = aggregated[components[numerator]] / totals.where(totals > 0) * scale
+    
+    partial_periods = get_partial_edge_periods(df[date_col].min(), df[date_col].max(), frequency)
+    aggregated = aggregated.drop(index=partial_periods, errors='ignore')
+    aggregated = aggregated[metrics].reset_index()
+    
+    last_observed = df[date_col].max()
+    last_period = aggregated[date_col].max() if len(aggregated) else last_observed
+    
+    report = {
+        'input_rows': len(df),
+        'output_rows': len(aggregated),
+        'rows_removed': len(df) - len(aggregated),
+        'frequency': frequency,
+        'partial_periods_removed': len(partial_periods),
+        'days_after_last_period': max(0, (last_observed.normalize() - last_period).days) if len(df) else 0
+    }
+    
+    logger.info(f"Aggregated {report['input_rows']} rows to {report['output_rows']} "
+                f"{'daily' if frequency == 'D' else 'weekly'} rows ({report['rows_removed']} removed)")
+    if partial_periods:
+        logger.info(f"Left out partially covered periods ending {[p.strftime('%Y-%m-%d') for p in partial_periods]}")
+    if rate_definitions:
+        logger.info(f"Recomputed rate metrics from components: {list(rate_definitions)}")
+    
+    return aggregated, report
+
+def get_partial_edge_periods(first_date, last_date, frequency='D'):
+    """
+    Get the first and last periods when the data only covers part of them.
+    
+    Args:
+        first_date: Earliest date in the data
+        last_date: Latest date in the data
+        frequency: 'D' for daily or 'W' for weekly periods
+        
+    Returns:
+        list: Labels (period end dates, as aggregate_for_forecast labels them) of the partial edge periods
+    """
+    if pd.isna(first_date) or pd.isna(last_date):
+        return []
+    
+    first_date = pd.Timestamp(first_date).normalize()
+    last_date = pd.Timestamp(last_date).normalize()
+    first_period = first_date.to_period(frequency)
+    last_period = last_date.to_period(frequency)
+    
+    partial = []
+    if first_date > first_period.start_time:
+        partial.append(first_period.end_time.normalize())
+    if last_date < last_period.end_time.normalize() and last_period.end_time.normalize() not in partial:
+        partial.append(last_period.end_time.normalize())
+    
+    return partial
+
+def get_forecast_periods(forecast_days, frequency='D', days_after_last_period=0):
+    """
+    Convert a forecast horizon in days to a number of periods at the aggregation frequency.
+    
+    Args:
+        forecast_days: Days to forecast after the last observed date
+        frequency: 'D' for daily or 'W' for weekly periods
+        days_after_last_period: Observed days after the last aggregated period (from the
+                                aggregation report), which the forecast has to cover as well
+        
+    Returns:
+        int: Number of periods to forecast
+    """
+    if frequency == 'W':
+        return max(1, math.ceil((forecast_days + days_after_last_period) / 7))
+    return forecast_days
@@ -0,0 +1,228 @@
+import os
+import time
+import threading
+from config import (logger, UPLOAD_FOLDER, PLOT_FOLDER, FORECAST_FOLDER, PLOT_TTL_SECONDS, FORECAST_TTL_SECONDS,
+                    UPLOAD_TTL_SECONDS, ARTIFACT_MAX_BYTES, ARTIFACT_SWEEP_INTERVAL)
+from services.impact_store import purge_expired_impact_data
+from services.job_service import get_active_job_files, prune_finished_jobs
+
+# Generated files that only ever accumulate, with how long each kind is kept
+ARTIFACT_TYPES = {
+    'plots': {'folder': PLOT_FOLDER, 'ttl': PLOT_TTL_SECONDS},
+    'forecasts': {'folder': FORECAST_FOLDER, 'ttl': FORECAST_TTL_SECONDS},
+    'uploads': {'folder': UPLOAD_FOLDER, 'ttl': UPLOAD_TTL_SECONDS}
+}
+
+# Files that mark the rest of their group usable: deleted first so a reader never
+# finds them without the files they describe
+GROUP_SIDECAR_SUFFIXES = ('.meta.json', '.frame.pkl')
+
+# Sweep counters for this process
+sweep_counters = {'sweeps': 0, 'removed_files': 0, 'removed_bytes': 0, 'last_sweep_at': None}
+sweep_lock = threading.Lock()
+sweeper_thread = None
+sweeper_lock = threading.Lock()
+
+def list_artifacts():
+    """
+    List every artifact file with its type, size and modification time.
+    
+    Returns:
+        list: (artifact_type, path, size, mtime) tuples
+    """
+    artifacts = []
+    for artifact_type, settings in ARTIFACT_TYPES.items():
+        if not os.path.isdir(settings['folder']):
+            continue
+        
+        with os.scandir(settings['folder']) as entries:
+            for entry in entries:
+                # Dotfiles such as .gitkeep are not artifacts
+                if entry.name.startswith('.') or not entry.is_file(follow_symlinks=False):
+                    continue
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                artifacts.append((artifact_type, entry.path, stat.st_size, stat.st_mtime))
+    
+    return artifacts
+
+def get_artifact_group(artifact_type, path):
+    """
+    Get the key of the group an artifact file is deleted with.
+    
+    A forecast's .npy, .campaigns.npy and .meta.json files share its forecast ID, and
+    an upload goes with its cached .frame.pkl; every plot is a group of its own.
+    
+    Args:
+        artifact_type: Key in ARTIFACT_TYPES
+        path: Path of the artifact file
+        
+    Returns:
+        str: Group key (the forecast ID or the upload's absolute path for those types)
+    """
+    if artifact_type == 'forecasts':
+        return os.path.basename(path).split('.', 1)[0]
+    if artifact_type == 'uploads':
+        return os.path.abspath(path[:-len('.frame.pkl')] if path.endswith('.frame.pkl') else path)
+    return path
+
+def list_artifact_groups():
+    """
+    List artifacts grouped into the units the sweeper deletes together.
+    
+    Returns:
+        list: (mtime, artifact_type, key, files) tuples, mtime being the group's newest file
+              and files (path, size) pairs with the sidecars first
+    """
+    groups = {}
+    for artifact_type, path, size, mtime in list_artifacts():
+        group = groups.setdefault((artifact_type, get_artifact_group(artifact_type, path)), {'mtime': 0.0, 'files': []})
+        group['mtime'] = max(group['mtime'], mtime)
+        group['files'].append((path, size))
+    
+    return [(group['mtime'], artifact_type, key,
+             sorted(group['files'], key=lambda file: not file[0].endswith(GROUP_SIDECAR_SUFFIXES)))
+            for (artifact_type, key), group in groups.items()]
+
+def sweep_artifacts(max_bytes=None, dry_run=False, now=None):
+    """
+    Delete expired artifacts, then the oldest remaining ones until the total fits the size cap.
+    
+    Files are deleted in groups (a forecast's files together, sidecar first; an upload
+    with its cached frame), uploads that queued or running jobs still read are kept,
+    and finished job records older than FORECAST_TTL_SECONDS are pruned.
+    
+    Args:
+        max_bytes: Total size cap across all artifact types (default: ARTIFACT_MAX_BYTES)
+        dry_run: Only report what would be deleted
+        now: Current time as a Unix timestamp (default: time.time())
+        
+    Returns:
+        dict: Per-type removed file counts and bytes, totals and the numbers of expired impact
+              sessions and pruned jobs
+    """
+    if max_bytes is None:
+        max_bytes = ARTIFACT_MAX_BYTES
+    now = now if now is not None else time.time()
+    
+    report = {artifact_type: {'removed_files': 0, 'removed_bytes': 0} for artifact_type in ARTIFACT_TYPES}
+    
+    def remove(artifact_type, files):
+        for path, size in files:
+            if not dry_run:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    # Already removed by a request or another process's sweeper
+                    continue
+            report[artifact_type]['removed_files'] += 1
+            report[artifact_type]['removed_bytes'] += size
+    
+    in_use = get_active_job_files()
+    
+    kept = []
+    pinned_bytes = 0
+    for mtime, artifact_type, key, files in list_artifact_groups():
+        if artifact_type == 'uploads' and key in in_use:
+            pinned_bytes += sum(size for _, size in files)
+            continue
+        if now - mtime > ARTIFACT_TYPES[artifact_type]['ttl']:
+            remove(artifact_type, files)
+        else:
+            kept.append((mtime, artifact_type, key, files))
+    
+    # Over the cap: remove the oldest groups first, whatever their type
+    total_bytes = pinned_bytes + sum(size for _, _, _, files in kept for _, size in files)
+    if total_bytes > max_bytes:
+        for mtime, artifact_type, key, files in sorted(kept, key=lambda group: group[0]):
+            if total_bytes <= max_bytes:
+                break
+            remove(artifact_type, files)
+            total_bytes -= sum(size for _, size in files)
+    
+    # Impact analysis sessions expire on their own TTL (their uploads go with them)
+    report['impact_sessions'] = purge_expired_impact_data(dry_run=dry_run, now=now)
+    
+    # Finished job records point at forecasts that expire on the same TTL
+    report['jobs'] = prune_finished_jobs(FORECAST_TTL_SECONDS, dry_run=dry_run, now=now)
+    
+    report['removed_files'] = sum(report[t]['removed_files'] for t in ARTIFACT_TYPES)
+    report['removed_bytes'] = sum(report[t]['removed_bytes'] for t in ARTIFACT_TYPES)
+    report['dry_run'] = dry_run
+    
+    if not dry_run:
+        with sweep_lock:
+            sweep_counters['sweeps'] += 1
+            sweep_counters['removed_files'] += report['removed_files']
+            sweep_counters['removed_bytes'] += report['removed_bytes']
+            sweep_counters['last_sweep_at'] = now
+    
+    if report['removed_files']:
+        logger.info(f"Artifact sweep {'would remove' if dry_run else 'removed'} {report['removed_files']} files "
+                    f"({report['removed_bytes']} bytes)")
+    
+    return report
+
+def get_artifact_stats():
+    """
+    Get current artifact usage per type and this process's sweep counters.
+    
+    Returns:
+        dict: files, bytes and oldest file age per type, totals, the size cap and sweep counters
+    """
+    now = time.time()
+    stats = {
+        artifact_type: {'files': 0, 'bytes': 0, 'oldest_age_seconds': None, 'ttl_seconds': settings['ttl']}
+        for artifact_type, settings in ARTIFACT_TYPES.items()
+    }
+    
+    for artifact_type, _, size, mtime in list_artifacts():
+        entry = stats[artifact_type]
+        entry['files'] += 1
+        entry['bytes'] += size
+        age = now - mtime
+        if entry['oldest_age_seconds'] is None or age > entry['oldest_age_seconds']:
+            entry['oldest_age_seconds'] = age
+    
+    with sweep_lock:
+        counters = dict(sweep_counters)
+    
+    return {
+        'types': stats,
+        'files': sum(entry['files'] for entry in stats.values()),
+        'bytes': sum(entry['bytes'] for entry in stats.values()),
+        'max_bytes': ARTIFACT_MAX_BYTES,
+        'sweep_interval_seconds': ARTIFACT_SWEEP_INTERVAL,
+        'sweeps': counters
+    }
+
+def start_artifact_sweeper(interval=None):
+    """
+    Start the background thread that sweeps artifacts every interval seconds (once per process).
+    
+    Args:
+        interval: Seconds between sweeps (default: ARTIFACT_SWEEP_INTERVAL, 0 = disabled)
+    """
+    global sweeper_thread
+    
+    interval = ARTIFACT_SWEEP_INTERVAL if interval is None else interval
+    if interval <= 0:
+        return
+    
+    def run():
+        while True:
+            try:
+                sweep_artifacts()
+            except Exception as e:
+                logger.error(f"Artifact sweep failed: {e}")
+            time.sleep(interval)
+    
+    # Called on every request, so concurrent first requests must not each start a sweeper
+    with sweeper_lock:
+        if sweeper_thread is not None and sweeper_thread.is_alive():
+            return
+        sweeper_thread = threading.Thread(target=run, name='artifact-sweeper', daemon=True)
+        sweeper_thread.start()
+    logger.info(f"Started artifact sweeper (every {interval}s)")
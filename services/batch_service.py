@@ -0,0 +1,303 @@
+import os
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from config import (logger, FORECAST_AGGREGATION, FORECAST_ENGINE, FORECAST_INTERVALS, CAMPAIGN_ENGINE,
+                    BATCH_MAX_WORKERS, BATCH_WATCH_INTERVAL, BATCH_SETTLE_SECONDS)
+from utils.db_utils import open_sqlite
+from utils.export_utils import (build_forecast_data, attach_forecast_columns, generate_forecast_csv,
+                                generate_campaign_csv)
+from services.file_service import process_uploaded_file, calculate_budget_data, PLATFORM_DISPLAY_NAMES
+from services.aggregation_service import aggregate_for_forecast, get_forecast_periods
+from services.forecast_service import generate_forecast
+from services.campaign_service import generate_campaign_forecasts
+
+# The manifest lives in the output directory, so re-running a batch skips files it already forecast
+MANIFEST_FILENAME = 'manifest.sqlite'
+MANIFEST_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS batch_files (
+        name TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        status TEXT NOT NULL,
+        output TEXT,
+        campaign_output TEXT,
+        metrics INTEGER,
+        error TEXT,
+        seconds REAL,
+        updated_at TEXT NOT NULL
+    )""",
+)
+
+def run_batch(input_dir, output_dir, forecast_period=30, metrics=None, aggregation=FORECAST_AGGREGATION,
+              engine=FORECAST_ENGINE, intervals=FORECAST_INTERVALS, budget_change_ratio=1.0, include_bounds=False,
+              by_campaign=False, campaign_engine=CAMPAIGN_ENGINE, max_workers=None, settle_seconds=0,
+              retry_failed=False):
+    """
+    Forecast every CSV export in a directory that the manifest has not seen finish.
+    
+    Files are forecast across a bounded process pool (each file fits its metrics
+    serially) and every outcome is recorded in the manifest as it arrives, so an
+    interrupted batch resumes where it stopped. A file is forecast again when it
+    changes (size or modification time), or when its last attempt failed and
+    retry_failed is set.
+    
+    Args:
+        input_dir: Directory of CSV exports
+        output_dir: Directory the forecast CSVs and the manifest are written to
+        forecast_period: Number of days to forecast
+        metrics: Metrics to forecast where present (default: every metric column of each file)
+        aggregation: Period rows are collapsed to before fitting ('D' daily, 'W' weekly)
+        engine: Name of the forecasting engine ('prophet' or 'least_squares')
+        intervals: Interval strategy ('full', 'reduced', 'horizon' or 'none')
+        budget_change_ratio: Ratio of new budget to each file's historical budget
+        include_bounds: Add the forecast range columns to the CSVs
+        by_campaign: Also write reconciled per-campaign forecasts for files with a campaign column
+        campaign_engine: Name of the forecasting engine for campaigns with enough history
+        max_workers: Number of files forecast at once (default: BATCH_MAX_WORKERS)
+        settle_seconds: Skip files modified more recently than this (still being written)
+        retry_failed: Also retry unchanged files whose last attempt failed
+        
+    Returns:
+        dict: Counts of files finished, failed and skipped (already done or still settling)
+    """
+    if max_workers is None:
+        max_workers = BATCH_MAX_WORKERS
+    
+    # Forecast CSVs written next to the exports would be picked up as exports themselves
+    if os.path.abspath(input_dir) == os.path.abspath(output_dir):
+        raise ValueError('The output directory must differ from the input directory')
+    
+    os.makedirs(output_dir, exist_ok=True)
+    pending, skipped = find_pending_files(input_dir, output_dir, settle_seconds, retry_failed)
+    summary = {'finished': 0, 'failed': 0, 'skipped': skipped}
+    if not pending:
+        return summary
+    
+    options = {
+        'forecast_period': forecast_period,
+        'metrics': metrics,
+        'aggregation': aggregation,
+        'engine': engine,
+        'intervals': intervals,
+        'budget_change_ratio': budget_change_ratio,
+        'include_bounds': include_bounds,
+        'by_campaign': by_campaign,
+        'campaign_engine': campaign_engine
+    }
+    
+    for name, size, mtime in pending:
+        record_file(output_dir, name, size, mtime, 'running')
+    
+    def record_outcome(name, size, mtime, outcome, error=None):
+        if error is None:
+            summary['finished'] += 1
+            record_file(output_dir, name, size, mtime, 'finished', **outcome)
+            logger.info(f"Forecast {name} in {outcome['seconds']:.1f}s -> {outcome['output']}")
+        else:
+            summary['failed'] += 1
+            record_file(output_dir, name, size, mtime, 'failed', error=error)
+            logger.error(f"Could not forecast {name}: {error}")
+    
+    workers = min(max_workers, len(pending))
+    logger.info(f"Forecasting {len(pending)} files with {workers} workers ({skipped} skipped)")
+    
+    if workers <= 1:
+        for name, size, mtime in pending:
+            try:
+                record_outcome(name, size, mtime, forecast_export(os.path.join(input_dir, name), output_dir, options))
+            except Exception as e:
+                record_outcome(name, size, mtime, None, error=str(e))
+        return summary
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(forecast_export, os.path.join(input_dir, name), output_dir, options): (name, size, mtime)
+            for name, size, mtime in pending
+        }
+        
+        # Record files as they finish, so an interrupted batch keeps what it completed
+        for future in as_completed(futures):
+            name, size, mtime = futures[future]
+            try:
+                record_outcome(name, size, mtime, future.result())
+            except Exception as e:
+                record_outcome(name, size, mtime, None, error=str(e))
+    
+    return summary
+
+def watch_directory(input_dir, output_dir, interval=None, settle_seconds=None, **batch_options):
+    """
+    Forecast new and changed exports as they arrive, until interrupted.
+    
+    Args:
+        input_dir: Directory of CSV exports to watch
+        output_dir: Directory the forecast CSVs and the manifest are written to
+        interval: Seconds between scans (default: BATCH_WATCH_INTERVAL)
+        settle_seconds: Seconds a file must be unchanged before it is forecast
+                        (default: BATCH_SETTLE_SECONDS)
+        **batch_options: Forecast options passed on to run_batch
+    """
+    interval = BATCH_WATCH_INTERVAL if interval is None else interval
+    settle_seconds = BATCH_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+    
+    logger.info(f"Watching {input_dir} every {interval}s")
+    while True:
+        summary = run_batch(input_dir, output_dir, settle_seconds=settle_seconds, **batch_options)
+        if summary['finished'] or summary['failed']:
+            logger.info(f"Watch scan finished {summary['finished']} and failed {summary['failed']} files")
+        time.sleep(interval)
+
+def find_pending_files(input_dir, output_dir, settle_seconds=0, retry_failed=False):
+    """
+    List the CSV files in input_dir that still need forecasting.
+    
+    Args:
+        input_dir: Directory of CSV exports
+        output_dir: Directory holding the manifest
+        settle_seconds: Skip files modified more recently than this
+        retry_failed: Include unchanged files whose last attempt failed
+        
+    Returns:
+        tuple: ((name, size, mtime) tuples sorted by name, number of files skipped)
+    """
+    now = time.time()
+    with open_sqlite(os.path.join(output_dir, MANIFEST_FILENAME), MANIFEST_SCHEMA) as conn:
+        manifest = {row['name']: row for row in conn.execute("SELECT name, size, mtime, status FROM batch_files")}
+    
+    pending = []
+    skipped = 0
+    with os.scandir(input_dir) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            if not entry.name.lower().endswith('.csv') or not entry.is_file():
+                continue
+            
+            stat = entry.stat()
+            row = manifest.get(entry.name)
+            unchanged = row is not None and row['size'] == stat.st_size and row['mtime'] == stat.st_mtime
+            done_statuses = ('finished',) if retry_failed else ('finished', 'failed')
+            if unchanged and row['status'] in done_statuses:
+                skipped += 1
+            elif now - stat.st_mtime < settle_seconds:
+                # Probably still being copied in; picked up on a later scan
+                skipped += 1
+            else:
+                pending.append((entry.name, stat.st_size, stat.st_mtime))
+    
+    return pending, skipped
+
+def record_file(output_dir, name, size, mtime, status, output=None, campaign_output=None, metrics=None, error=None,
+                seconds=None):
+    """Record a file's latest status in the batch manifest."""
+    with open_sqlite(os.path.join(output_dir, MANIFEST_FILENAME), MANIFEST_SCHEMA) as conn:
+        conn.execute("INSERT OR REPLACE INTO batch_files (name, size, mtime, status, output, campaign_output, metrics, "
+                     "error, seconds, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (name, size, mtime, status, output, campaign_output, metrics, error, seconds,
+                      datetime.now().isoformat()))
+
+def get_batch_manifest(output_dir):
+    """
+    Get the status of every file a batch has seen.
+    
+    Args:
+        output_dir: Directory holding the manifest
+        
+    Returns:
+        list: One dictionary per file, sorted by name
+    """
+    with open_sqlite(os.path.join(output_dir, MANIFEST_FILENAME), MANIFEST_SCHEMA) as conn:
+        return [dict(row) for row in conn.execute("SELECT * FROM batch_files ORDER BY name")]
+
+def forecast_export(file_path, output_dir, options):
+    """
+    Forecast one export the way an upload is forecast and write it in the download CSV format.
+    
+    The export is only read: its cleaned frame is kept in memory rather than cached beside
+    it. The forecast is laid out in memory rather than saved, and its models skip the model
+    cache, so batch runs leave nothing behind for the artifact sweeper or the cache to evict.
+    
+    Args:
+        file_path: Path to the CSV export
+        output_dir: Directory for {name}_forecast.csv (and {name}_campaign_forecast.csv)
+        options: Forecast options from run_batch
+        
+    Returns:
+        dict: output and campaign_output paths, number of metrics forecast and seconds taken
+    """
+    start = time.perf_counter()
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    
+    df, date_cols, numeric_cols, date_format, file_format = process_uploaded_file(file_path, cache_frame=False)
+    if not date_cols:
+        raise ValueError('No date column found')
+    
+    metrics = [metric for metric in options['metrics'] if metric in numeric_cols] if options['metrics'] else numeric_cols
+    if not metrics:
+        raise ValueError('No metric columns to forecast')
+    
+    date_col = date_cols[0]
+    budget_data = calculate_budget_data(df, file_format)
+    last_date = pd.to_datetime(df[date_col]).max()
+    end_date = last_date + timedelta(days=options['forecast_period'])
+    
+    # The cleaned frame is what prepare_data_for_forecast would load from the upload's cache
+    df, aggregation_report = aggregate_for_forecast(df, date_col, metrics, options['aggregation'])
+    
+    # One file per worker process, so its metrics are fitted serially and without plots
+    results = generate_forecast(
+        df,
+        date_col,
+        metrics,
+        get_forecast_periods(options['forecast_period'], options['aggregation'],
+                             aggregation_report['days_after_last_period']),
+        budget_change_ratio=options['budget_change_ratio'],
+        max_workers=1,
+        frequency=options['aggregation'],
+        engine=options['engine'],
+        intervals=options['intervals'],
+        create_plots=False,
+        cache=False
+    )
+    if not results:
+        raise ValueError('None of the metrics could be forecast')
+    
+    campaigns = None
+    if options['by_campaign']:
+        campaigns = generate_campaign_forecasts(file_path, file_format, date_col, date_format, results,
+                                                frequency=options['aggregation'], engine=options['campaign_engine'],
+                                                max_workers=1)
+    
+    forecast_data, columns = build_forecast_data(
+        results,
+        forecast_title=name,
+        platform_display=PLATFORM_DISPLAY_NAMES.get(file_format.get('source'), PLATFORM_DISPLAY_NAMES['unknown']),
+        estimated_budget=budget_data['dailyAverage'] * options['forecast_period'] * options['budget_change_ratio'],
+        currency='£',  # Same currency the upload flow reports
+        date_range=f"{last_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}",
+        budget_change_ratio=options['budget_change_ratio'],
+        aggregation=aggregation_report,
+        engine=options['engine'],
+        intervals=options['intervals'],
+        campaigns=campaigns
+    )
+    attach_forecast_columns(forecast_data, columns)
+    
+    output = write_csv_file(os.path.join(output_dir, f"{name}_forecast.csv"),
+                            generate_forecast_csv(forecast_data, include_bounds=options['include_bounds']))
+    campaign_output = None
+    if campaigns:
+        campaign_output = write_csv_file(os.path.join(output_dir, f"{name}_campaign_forecast.csv"),
+                                         generate_campaign_csv(None, forecast_data, forecasts=campaigns['forecasts']))
+    
+    return {'output': output, 'campaign_output': campaign_output, 'metrics': len(results),
+            'seconds': time.perf_counter() - start}
+
+def write_csv_file(file_path, chunks):
+    """Write streamed CSV chunks to a file through a temp file, so readers never see a partial CSV."""
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', newline='') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(temp_path, file_path)
+    return file_path
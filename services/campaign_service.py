@@ -0,0 +1,302 @@
+import numpy as np
+import pandas as pd
+from config import logger, CAMPAIGN_ENGINE, INGESTION_CHUNK_ROWS, CAMPAIGN_MIN_HISTORY_DAYS, CAMPAIGN_BATCH_SIZE
+from utils.date_utils import convert_column_to_datetime, extract_first_date
+from services.file_service import clean_numeric_columns
+from services.aggregation_service import is_rate_metric, get_forecast_periods, get_partial_edge_periods
+from services.forecast_service import get_forecast_engine, run_metric_jobs
+
+# Campaign series shorter than this are forecast as their mean instead of fitting a model
+MIN_OBSERVATIONS = 5
+
+# Campaigns listed per metric on the results page (the CSV export has all of them)
+CAMPAIGN_SUMMARY_ROWS = 10
+
+def generate_campaign_forecasts(file_path, file_format, date_col, date_format, results, frequency='D',
+                                engine=CAMPAIGN_ENGINE, max_workers=None, batch_size=None):
+    """
+    Forecast every campaign's series and reconcile them to the account forecast.
+    
+    Campaign series are fitted in batches across the metric worker pool, so thousands
+    of series cost one task per batch rather than one per series. Campaigns with less
+    than CAMPAIGN_MIN_HISTORY_DAYS of history use the least squares engine, very short
+    series their mean, and campaigns with no activity over the last forecast-length
+    stretch of history are forecast as zero. Only count metrics are broken down: rates
+    don't add up across campaigns. Campaign models bypass the model cache, which is
+    kept for account-level fits.
+    
+    Args:
+        file_path: Path to the uploaded CSV file
+        file_format: Dictionary with file format information (needs a campaign_column)
+        date_col: Name of the date column
+        date_format: Format string for date parsing
+        results: Account-level results from generate_forecast; each metric broken down
+                 gets a 'campaigns' summary added
+        frequency: Period the rows were aggregated to ('D' daily, 'W' weekly)
+        engine: Name of the forecasting engine for campaigns with enough history
+                (default: CAMPAIGN_ENGINE)
+        max_workers: Number of worker processes (default: FORECAST_MAX_WORKERS)
+        batch_size: Series per worker task (default: CAMPAIGN_BATCH_SIZE)
+        
+    Returns:
+        dict: 'campaigns' (names), 'metrics', 'dates' (forecast dates), 'forecasts' (array of
+              metrics x campaigns x dates) and per-metric 'models', or None if there is nothing
+              to break down
+    """
+    campaign_col = (file_format or {}).get('campaign_column')
+    if not campaign_col:
+        logger.warning("No campaign column in this file, skipping per-campaign forecasts")
+        return None
+    
+    metrics = [metric for metric in results if not is_rate_metric(metric)]
+    if len(metrics) < len(results):
+        logger.info(f"Rate metrics are not broken down by campaign: {[m for m in results if m not in metrics]}")
+    if not metrics:
+        return None
+    
+    totals = read_campaign_totals(file_path, file_format, date_col, date_format, campaign_col, metrics, frequency)
+    if totals.empty:
+        logger.warning("No campaign rows found, skipping per-campaign forecasts")
+        return None
+    
+    campaigns = totals.index.get_level_values(campaign_col).unique()
+    periods = totals.index.get_level_values(date_col)
+    period_index = pd.date_range(periods.min(), periods.max(), freq=frequency)
+    dates = pd.DatetimeIndex([row['ds'] for row in results[metrics[0]]['forecast']])
+    min_history = get_forecast_periods(CAMPAIGN_MIN_HISTORY_DAYS, frequency)
+    
+    # One (periods x campaigns) matrix per metric; campaigns report nothing on days without activity
+    history = {}
+    series_jobs = []
+    for metric_index, metric in enumerate(metrics):
+        wide = totals[metric].unstack(campaign_col).reindex(index=period_index, columns=campaigns)
+        values = wide.to_numpy(dtype=float)
+        observed = ~np.isnan(values)
+        first_rows = np.where(observed.any(axis=0), observed.argmax(axis=0), len(period_index))
+        values = np.nan_to_num(values)
+        history[metric] = values
+        
+        for campaign_index, first_row in enumerate(first_rows):
+            series_jobs.append(((metric_index, campaign_index), period_index[min(first_row, len(period_index) - 1)],
+                                values[first_row:, campaign_index]))
+    
+    batch_size = batch_size or CAMPAIGN_BATCH_SIZE
+    batch_jobs = [(f"campaign series {start + 1}-{min(start + batch_size, len(series_jobs))}",
+                   series_jobs[start:start + batch_size])
+                  for start in range(0, len(series_jobs), batch_size)]
+    
+    logger.info(f"Forecasting {len(series_jobs)} campaign series ({len(campaigns)} campaigns x {len(metrics)} metrics) "
+                f"in {len(batch_jobs)} batches")
+    
+    # Workers take (batch, label) the way per-metric workers take (prophet_df, metric)
+    outcomes = run_metric_jobs(forecast_campaign_batch, [(label, batch) for label, batch in batch_jobs],
+                               (dates, frequency, engine, min_history), max_workers)
+    
+    forecasts = np.zeros((len(metrics), len(campaigns), len(dates)))
+    models = {metric: [None] * len(campaigns) for metric in metrics}
+    for (label, batch), outcome in zip(batch_jobs, outcomes):
+        if outcome is None:
+            # A crashed batch falls back to each series' mean
+            outcome = [('mean', np.full(len(dates), values.mean() if len(values) else 0.0))
+                       for _, _, values in batch]
+        for ((metric_index, campaign_index), _, _), (model_name, yhat) in zip(batch, outcome):
+            forecasts[metric_index, campaign_index] = yhat
+            models[metrics[metric_index]][campaign_index] = model_name
+    
+    for metric_index, metric in enumerate(metrics):
+        total = np.array([row['yhat'] for row in results[metric]['forecast']], dtype=float)
+        campaign_totals = history[metric].sum(axis=0)
+        
+        gap = coherence_gap(forecasts[metric_index], total)
+        forecasts[metric_index] = reconcile_forecasts(forecasts[metric_index], total, campaign_totals)
+        results[metric]['campaigns'] = summarize_campaign_forecasts(campaigns, forecasts[metric_index],
+                                                                    models[metric], gap)
+        logger.info(f"Reconciled {len(campaigns)} campaign forecasts for {metric} "
+                    f"(unreconciled sum was {gap:.1%} off the account forecast)")
+    
+    return {
+        'campaigns': [str(campaign) for campaign in campaigns],
+        'metrics': metrics,
+        'dates': dates,
+        'forecasts': forecasts,
+        'models': models
+    }
+
+def read_campaign_totals(file_path, file_format, date_col, date_format, campaign_col, metrics, frequency='D',
+                         chunksize=None):
+    """
+    Stream a CSV file in chunks and sum the metrics per campaign and period.
+    
+    Periods are labelled the way aggregate_for_forecast labels them (weeks by the
+    Sunday they end on) and the same partially covered edge weeks are left out, so
+    campaign and account series share their dates.
+    
+    Args:
+        file_path: Path to the CSV file
+        file_format: Dictionary with file format information
+        date_col: Name of the date column
+        date_format: Format string for date parsing
+        campaign_col: Name of the campaign column
+        metrics: Count metrics to sum
+        frequency: 'D' for daily or 'W' for weekly totals
+        chunksize: Rows per chunk (default: INGESTION_CHUNK_ROWS)
+        
+    Returns:
+        DataFrame: Metric totals indexed by (campaign, period)
+    """
+    chunksize = chunksize or INGESTION_CHUNK_ROWS
+    totals = None
+    first_date = last_date = None
+    
+    for chunk in pd.read_csv(file_path, skiprows=file_format['skiprows'], usecols=[date_col, campaign_col, *metrics],
+                             chunksize=chunksize):
+        extract_first_date(chunk, date_col)
+        chunk = convert_column_to_datetime(chunk, date_col, date_format)
+        clean_numeric_columns(chunk, [date_col, campaign_col])
+        
+        # Footer rows such as 'Total: Account' have no date
+        chunk = chunk.dropna(subset=[date_col, campaign_col])
+        if not chunk.empty:
+            first_date = min(first_date, chunk[date_col].min()) if first_date is not None else chunk[date_col].min()
+            last_date = max(last_date, chunk[date_col].max()) if last_date is not None else chunk[date_col].max()
+        
+        period_end = chunk[date_col].dt.to_period(frequency).dt.end_time.dt.normalize()
+        
+        chunk_totals = chunk.groupby([chunk[campaign_col].astype(str), period_end.rename(date_col)])[metrics].sum(min_count=1)
+        totals = chunk_totals if totals is None else totals.add(chunk_totals, fill_value=0)
+    
+    if totals is None:
+        return pd.DataFrame(columns=metrics)
+    
+    partial_periods = get_partial_edge_periods(first_date, last_date, frequency)
+    if partial_periods:
+        totals = totals[~totals.index.get_level_values(date_col).isin(partial_periods)]
+    
+    return totals.sort_index()
+
+def forecast_campaign_batch(batch, label, dates, frequency, engine, min_history):
+    """
+    Forecast a batch of campaign series in a worker process.
+    
+    Args:
+        batch: List of (key, first_date, values) series
+        label: Name of the batch, for logging
+        dates: Forecast dates shared by every series
+        frequency: Spacing of the observations ('D' daily, 'W' weekly)
+        engine: Name of the forecasting engine for series with enough history
+        min_history: Periods of history needed to use engine rather than the fallback
+        
+    Returns:
+        list: (model name, forecast values) per series, in batch order
+    """
+    future = pd.DataFrame({'ds': dates, 'budget_normalized': 1.0})
+    outcomes = [forecast_campaign_series(first_date, values, future, frequency, engine, min_history)
+                for _, first_date, values in batch]
+    
+    logger.info(f"Forecast {label}")
+    return outcomes
+
+def forecast_campaign_series(first_date, values, future, frequency, engine, min_history):
+    """
+    Forecast one campaign series with the cheapest model its history supports.
+    
+    Args:
+        first_date: Date of the first value
+        values: Metric values per period, up to the account's last period
+        future: DataFrame with the forecast 'ds' and 'budget_normalized' columns
+        frequency: Spacing of the observations ('D' daily, 'W' weekly)
+        engine: Name of the forecasting engine for series with enough history
+        min_history: Periods of history needed to use engine rather than least squares
+        
+    Returns:
+        tuple: (model name, non-negative forecast values): the engine name, 'least_squares',
+               'mean' or 'inactive'
+    """
+    # Nothing reported for as long as the forecast runs: the campaign is paused or finished
+    if not values[-len(future):].any():
+        return 'inactive', np.zeros(len(future))
+    
+    if len(values) < MIN_OBSERVATIONS:
+        return 'mean', np.full(len(future), values.mean())
+    
+    model_engine = engine if len(values) >= min_history else 'least_squares'
+    prophet_df = pd.DataFrame({
+        'ds': pd.date_range(first_date, periods=len(values), freq=frequency),
+        'y': values,
+        'budget_normalized': 1.0
+    })
+    
+    try:
+        forecast_engine = get_forecast_engine(model_engine)
+        model = forecast_engine.fit_model(prophet_df, cache=False)
+        yhat = forecast_engine.predict(model, future, 'none')['yhat'].to_numpy(dtype=float)
+    except Exception as e:
+        logger.warning(f"Could not fit campaign series starting {first_date:%Y-%m-%d}, using its mean: {e}")
+        return 'mean', np.full(len(future), values.mean())
+    
+    # Counts can't go negative, and negative campaigns would distort the reconciliation
+    return model_engine, np.clip(yhat, 0, None)
+
+def reconcile_forecasts(campaign_forecasts, total_forecast, campaign_totals):
+    """
+    Scale campaign forecasts so they sum to the account forecast in every period.
+    
+    Each period's account forecast is split in proportion to the campaign forecasts
+    (top-down reconciliation). Periods where every campaign forecasts zero are split by
+    each campaign's share of the history instead.
+    
+    Args:
+        campaign_forecasts: Non-negative array of campaigns x periods
+        total_forecast: Account forecast per period
+        campaign_totals: Historical total per campaign
+        
+    Returns:
+        ndarray: Reconciled campaigns x periods forecasts
+    """
+    period_sums = campaign_forecasts.sum(axis=0)
+    
+    history_total = campaign_totals.sum()
+    if history_total > 0:
+        history_shares = campaign_totals / history_total
+    else:
+        history_shares = np.full(len(campaign_totals), 1.0 / max(len(campaign_totals), 1))
+    
+    shares = np.where(period_sums > 0, campaign_forecasts / np.where(period_sums > 0, period_sums, 1.0),
+                      history_shares[:, None])
+    
+    return shares * total_forecast[None, :]
+
+def coherence_gap(campaign_forecasts, total_forecast):
+    """Get how far the summed campaign forecasts are from the account forecast, as a share of it."""
+    total = np.abs(total_forecast).sum()
+    if total == 0:
+        return 0.0
+    return float(np.abs(campaign_forecasts.sum(axis=0) - total_forecast).sum() / total)
+
+def summarize_campaign_forecasts(campaigns, forecasts, models, gap):
+    """
+    Summarize a metric's reconciled campaign forecasts for the results page.
+    
+    Args:
+        campaigns: Campaign names
+        forecasts: Reconciled campaigns x periods forecasts
+        models: Model name used for each campaign
+        gap: Coherence gap before reconciliation
+        
+    Returns:
+        dict: count, models (campaigns per model), coherence_gap and the top campaigns by forecast total
+    """
+    forecast_totals = forecasts.sum(axis=1)
+    top = np.argsort(-forecast_totals, kind='stable')[:CAMPAIGN_SUMMARY_ROWS]
+    
+    model_counts = {}
+    for model_name in models:
+        model_counts[model_name] = model_counts.get(model_name, 0) + 1
+    
+    return {
+        'count': len(campaigns),
+        'models': model_counts,
+        'coherence_gap': gap,
+        'top': [{'campaign': str(campaigns[index]), 'total': float(forecast_totals[index]), 'model': models[index]}
+                for index in top]
+    }
@@ -1,7 +1,21 @@
 import os
+import csv
+import itertools
 import pandas as pd
-from config import logger, UPLOAD_FOLDER
-from utils.date_utils import parse_dates_with_format_detection
+from config import logger, UPLOAD_FOLDER, CHUNKED_INGESTION_MIN_BYTES, INGESTION_CHUNK_ROWS
+from utils.date_utils import parse_dates_with_format_detection, convert_column_to_datetime, extract_first_date
+from services.aggregation_service import is_rate_metric
+
+# Bytes read from the start of a file to sniff its format (header rows and column names)
+SNIFF_BYTES = 64 * 1024
+
+# Display names of the platforms detect_file_format recognises
+PLATFORM_DISPLAY_NAMES = {
+    'google_ads': 'Google Ads',
+    'meta': 'Meta Ads',
+    'amazon': 'Amazon Ads',
+    'unknown': 'Unknown Platform'
+}
 
 def detect_file_format(file_path):
     """
@@ -13,24 +27,50 @@ def detect_file_format(file_path):
     Returns:
         dict: Dictionary with parsing parameters (skiprows, encoding, etc.)
     """
+    # Read the start of the file once and sniff every candidate header offset from it
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+    except Exception as e:
+        logger.warning(f"Error reading file header: {e}")
+        head = b''
+    
+    return detect_file_format_from_buffer(head)
+
+def detect_file_format_from_buffer(head):
+    """
+    Detect the file format from the raw bytes at the start of a CSV file.
+    
+    Args:
+        head: Bytes from the start of the file
+        
+    Returns:
+        dict: Dictionary with parsing parameters (skiprows, source, date_columns, campaign_column)
+    """
     # Try different skiprows values to determine the best option
     best_format = {
         'skiprows': 0, 
         'source': 'unknown',
-        'date_columns': []
+        'date_columns': [],
+        'campaign_column': None
     }
     
+    lines = head.decode('utf-8-sig', errors='replace').splitlines()
+    
+    # Drop a trailing partial line when the buffer stopped mid-file
+    if len(head) >= SNIFF_BYTES and lines:
+        lines = lines[:-1]
+    
     # First try with no skipped rows to see what's there
-    try:
-        df_sample = pd.read_csv(file_path, nrows=5)
-        column_names = df_sample.columns.tolist()
-        
+    column_names = get_header_columns(lines, 0)
+    if column_names:
         # Look for Google Ads format indicators
         if ('Campaign' in column_names and 'Day' in column_names):
             # This might be a Google Ads file with no header rows
             best_format['source'] = 'google_ads'
             best_format['skiprows'] = 0
             best_format['date_columns'] = ['Day']
+            best_format['campaign_column'] = 'Campaign'
             logger.info("Detected Google Ads format with no header rows")
             return best_format
             
@@ -42,43 +82,60 @@ def detect_file_format(file_path):
             best_format['date_columns'] = [col for col in column_names if 
                                           any(term in col.lower() for term in 
                                              ['reporting', 'date', 'day', 'starts', 'ends'])]
+            best_format['campaign_column'] = next((col for col in ['Campaign name', 'Campaign'] if col in column_names), None)
             logger.info(f"Detected Meta format. Date columns: {best_format['date_columns']}")
             return best_format
-            
-    except Exception as e:
-        logger.warning(f"Error reading file with no skipped rows: {e}")
-        
+    
     # Try with 1 or 2 skipped rows (common for Google Ads)
     for skip_rows in [1, 2, 3]:
-        try:
-            df_sample = pd.read_csv(file_path, skiprows=skip_rows, nrows=5)
-            column_names = df_sample.columns.tolist()
-            
-            # Look for Google Ads format indicators after skipping rows
-            if ('Campaign' in column_names and 'Day' in column_names):
-                best_format['source'] = 'google_ads'
-                best_format['skiprows'] = skip_rows
-                best_format['date_columns'] = ['Day']
-                logger.info(f"Detected Google Ads format with {skip_rows} header rows")
-                return best_format
+        column_names = get_header_columns(lines, skip_rows)
         
-        except Exception as e:
-            logger.warning(f"Error reading file with skiprows={skip_rows}: {e}")
+        # Look for Google Ads format indicators after skipping rows
+        if ('Campaign' in column_names and 'Day' in column_names):
+            best_format['source'] = 'google_ads'
+            best_format['skiprows'] = skip_rows
+            best_format['date_columns'] = ['Day']
+            best_format['campaign_column'] = 'Campaign'
+            logger.info(f"Detected Google Ads format with {skip_rows} header rows")
+            return best_format
     
     # If we can't determine a specific format, use default with smart column detection
     logger.info("Could not determine specific file format, using generic parsing")
     return best_format
 
-def process_uploaded_file(file_path):
+def get_header_columns(lines, skip_rows):
+    """
+    Get the column names pandas would use after skipping rows at the start of a file.
+    
+    Args:
+        lines: Decoded lines from the start of the file
+        skip_rows: Number of lines to skip
+        
+    Returns:
+        list: Column names, or an empty list if there is no header line
+    """
+    # Like read_csv, blank lines after the skipped rows are ignored
+    for line in lines[skip_rows:]:
+        if line.strip():
+            return next(csv.reader([line]))
+    return []
+
+def process_uploaded_file(file_path, cache_frame=True):
     """
     Process an uploaded CSV file to identify date and numeric columns.
     
     Args:
         file_path: Path to the uploaded CSV file
+        cache_frame: Save the cleaned frame beside the file for prepare_data_for_forecast
+                     (off for files the app doesn't own, such as batch inputs)
         
     Returns:
         tuple: (DataFrame, date_columns, numeric_columns, detected_date_format)
     """
+    # Very large exports are streamed and aggregated to daily totals instead
+    if os.path.getsize(file_path) >= CHUNKED_INGESTION_MIN_BYTES:
+        return process_uploaded_file_chunked(file_path, cache_frame=cache_frame)
+    
     # Detect file format and get appropriate parsing parameters
     file_format = detect_file_format(file_path)
     logger.info(f"Detected file format: {file_format}")
@@ -87,6 +144,129 @@ def process_uploaded_file(file_path):
     df = pd.read_csv(file_path, skiprows=file_format['skiprows'])
     logger.info(f"Read CSV with skiprows={file_format['skiprows']}. Columns: {df.columns.tolist()}")
     
+    date_cols, detected_date_format = find_date_column(df, file_format)
+    
+    clean_numeric_columns(df, date_cols)
+    
+    numeric_cols = select_metric_columns(df)
+    
+    # Keep the cleaned frame so /process does not have to parse the CSV again
+    if cache_frame:
+        save_cleaned_frame(df, file_path, date_cols[0] if date_cols else None, detected_date_format)
+    
+    return df, date_cols, numeric_cols, detected_date_format, file_format
+
+def process_uploaded_file_chunked(file_path, chunksize=None, cache_frame=True):
+    """
+    Process a large uploaded CSV file in chunks, keeping only daily totals in memory.
+    
+    The date column and its format are detected on the first chunk. Every chunk is
+    then aggregated by date as it streams, so peak memory depends on the number of
+    days in the export rather than the number of rows.
+    
+    Args:
+        file_path: Path to the uploaded CSV file
+        chunksize: Rows per chunk (default: INGESTION_CHUNK_ROWS)
+        cache_frame: Save the cleaned frame beside the file for prepare_data_for_forecast
+        
+    Returns:
+        tuple: (daily DataFrame, date_columns, numeric_columns, detected_date_format, file_format)
+    """
+    chunksize = chunksize or INGESTION_CHUNK_ROWS
+    
+    # Detect file format and get appropriate parsing parameters
+    file_format = detect_file_format(file_path)
+    logger.info(f"Detected file format: {file_format}. Streaming in chunks of {chunksize} rows")
+    
+    with pd.read_csv(file_path, skiprows=file_format['skiprows'], chunksize=chunksize) as chunks:
+        # Detect the date column on the first chunk only. Detection converts columns of a
+        # shallow copy, so the raw chunk can still be aggregated without reading it again
+        first_chunk = next(chunks, pd.DataFrame())
+        date_cols, detected_date_format = find_date_column(first_chunk.copy(deep=False), file_format)
+        
+        if not date_cols:
+            # Nothing to aggregate by; the caller reports the missing date column
+            clean_numeric_columns(first_chunk, date_cols)
+            return first_chunk, date_cols, select_metric_columns(first_chunk), detected_date_format, file_format
+        
+        df = read_daily_totals(file_path, file_format, date_cols[0], detected_date_format, chunksize,
+                               chunks=itertools.chain([first_chunk], chunks))
+        del first_chunk
+    
+    numeric_cols = select_metric_columns(df)
+    
+    # Keep the cleaned frame so /process does not have to stream the CSV again
+    if cache_frame:
+        save_cleaned_frame(df, file_path, date_cols[0], detected_date_format)
+    
+    return df, date_cols, numeric_cols, detected_date_format, file_format
+
+def read_daily_totals(file_path, file_format, date_col, date_format, chunksize=None, chunks=None):
+    """
+    Stream a CSV file in chunks and aggregate its numeric columns to one row per day.
+    
+    Count metrics are summed. Rate metrics (CTR, CPC, conversion rate, ...) can't be
+    summed, so they are averaged over the rows reported for each day.
+    
+    Args:
+        file_path: Path to the CSV file
+        file_format: Dictionary with file format information
+        date_col: Name of the date column
+        date_format: Format string for date parsing
+        chunksize: Rows per chunk (default: INGESTION_CHUNK_ROWS)
+        chunks: Raw chunks already being read from the file (default: read file_path)
+        
+    Returns:
+        DataFrame: One row per date with the date column and aggregated numeric columns
+    """
+    chunksize = chunksize or INGESTION_CHUNK_ROWS
+    daily_sums = None
+    daily_counts = None
+    total_rows = 0
+    
+    if chunks is None:
+        chunks = pd.read_csv(file_path, skiprows=file_format['skiprows'], chunksize=chunksize)
+    
+    for chunk in chunks:
+        total_rows += len(chunk)
+        
+        extract_first_date(chunk, date_col)
+        chunk = convert_column_to_datetime(chunk, date_col, date_format)
+        clean_numeric_columns(chunk, [date_col])
+        
+        numeric_cols = chunk.select_dtypes(include=['number']).columns
+        grouped = chunk.groupby(date_col)[numeric_cols]
+        
+        # Running totals only ever hold one row per day
+        chunk_sums = grouped.sum(min_count=1)
+        chunk_counts = grouped.count()
+        daily_sums = chunk_sums if daily_sums is None else daily_sums.add(chunk_sums, fill_value=0)
+        daily_counts = chunk_counts if daily_counts is None else daily_counts.add(chunk_counts, fill_value=0)
+    
+    if daily_sums is None:
+        return pd.DataFrame(columns=[date_col])
+    
+    # Average rate metrics over the rows reported each day
+    rate_cols = [col for col in daily_sums.columns if is_rate_metric(col)]
+    if rate_cols:
+        daily_sums[rate_cols] = daily_sums[rate_cols] / daily_counts[rate_cols].where(daily_counts[rate_cols] > 0)
+    
+    df = daily_sums.sort_index().reset_index()
+    logger.info(f"Aggregated {total_rows} rows into {len(df)} daily rows")
+    
+    return df
+
+def find_date_column(df, file_format):
+    """
+    Find the first column that parses as dates and convert it in place.
+    
+    Args:
+        df: DataFrame read from the CSV file
+        file_format: Dictionary with file format information
+        
+    Returns:
+        tuple: (date_columns, detected_date_format); date_columns holds at most one column
+    """
     # Make sure date columns are properly formatted
     detected_date_format = 'auto'
     date_cols = []
@@ -144,6 +324,16 @@ def process_uploaded_file(file_path):
                 except Exception as e:
                     continue
     
+    return date_cols, detected_date_format
+
+def clean_numeric_columns(df, date_cols):
+    """
+    Convert text columns to numbers in place, removing thousands separators (e.g. "1,476.69").
+    
+    Args:
+        df: DataFrame to clean
+        date_cols: Columns to leave untouched
+    """
     # Handle numeric columns with commas in the values (e.g., "1,476.69")
     for col in df.columns:
         if col not in date_cols and df[col].dtype == 'object':
@@ -154,7 +344,17 @@ def process_uploaded_file(file_path):
                 logger.info(f"Converted column {col} to numeric")
             except Exception as e:
                 logger.warning(f"Could not convert column {col} to numeric: {e}")
+
+def select_metric_columns(df):
+    """
+    Select the numeric columns that look like marketing metrics.
     
+    Args:
+        df: Cleaned DataFrame
+        
+    Returns:
+        list: Metric column names (all numeric columns if none match a known metric)
+    """
     # Get all numeric columns
     all_numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
     
@@ -184,7 +384,7 @@ def process_uploaded_file(file_path):
     
     logger.info(f"Marketing metric columns: {numeric_cols}")
     
-    return df, date_cols, numeric_cols, detected_date_format, file_format
+    return numeric_cols
 
 def prepare_data_for_forecast(file_path, file_format, date_col, date_format, selected_metrics):
     """
@@ -200,21 +400,84 @@ def prepare_data_for_forecast(file_path, file_format, date_col, date_format, sel
     Returns:
         DataFrame with formatted data ready for forecasting
     """
-    # Read the CSV file with appropriate parameters
-    df = pd.read_csv(file_path, skiprows=file_format['skiprows'])
+    # Re-use the frame cleaned at upload time when it was parsed the same way
+    df = load_cleaned_frame(file_path, date_col, date_format)
+    
+    if df is None and os.path.getsize(file_path) >= CHUNKED_INGESTION_MIN_BYTES:
+        # Stream large files straight into daily totals
+        df = read_daily_totals(file_path, file_format, date_col, date_format)
+    elif df is None:
+        # Read the CSV file with appropriate parameters
+        df = pd.read_csv(file_path, skiprows=file_format['skiprows'])
+        
+        # Convert date column to datetime using the selected format
+        df = convert_column_to_datetime(df, date_col, date_format)
+        
+        # Clean every column as the upload did, not just the metrics: rates are
+        # recomputed from their component columns when rows are aggregated
+        clean_numeric_columns(df, [date_col])
     
-    # Convert date column to datetime using the selected format
-    from utils.date_utils import convert_column_to_datetime
-    df = convert_column_to_datetime(df, date_col, date_format)
+    return df
+
+def get_cleaned_frame_path(file_path):
+    """Get the path of the cleaned frame cached beside an uploaded file."""
+    return f"{file_path}.frame.pkl"
+
+def save_cleaned_frame(df, file_path, date_col, date_format):
+    """
+    Cache the cleaned, typed DataFrame of an upload beside the uploaded file.
     
-    # Clean numeric data - remove commas from numbers
-    for col in selected_metrics:
-        if df[col].dtype == 'object':
-            df[col] = df[col].astype(str).str.replace(',', '')
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+    Args:
+        df: Cleaned DataFrame from process_uploaded_file
+        file_path: Path to the uploaded CSV file
+        date_col: Name of the parsed date column (or None)
+        date_format: Format the date column was parsed with
+    """
+    frame_path = get_cleaned_frame_path(file_path)
+    try:
+        df.attrs['date_col'] = date_col
+        df.attrs['date_format'] = date_format
+        df.to_pickle(frame_path)
+        logger.info(f"Cached cleaned frame at {frame_path}")
+    except Exception as e:
+        logger.warning(f"Could not cache cleaned frame for {file_path}: {e}")
+
+def load_cleaned_frame(file_path, date_col, date_format):
+    """
+    Load the cleaned DataFrame cached at upload time.
     
+    Args:
+        file_path: Path to the uploaded CSV file
+        date_col: Name of the date column that will be forecast against
+        date_format: Date format selected for forecasting
+        
+    Returns:
+        DataFrame or None if there is no cached frame parsed with the same date column and format
+    """
+    frame_path = get_cleaned_frame_path(file_path)
+    if not os.path.exists(frame_path):
+        return None
+    
+    try:
+        df = pd.read_pickle(frame_path)
+    except Exception as e:
+        logger.warning(f"Could not load cached frame {frame_path}: {e}")
+        return None
+    
+    # A different date column or format means the dates have to be parsed again
+    if df.attrs.get('date_col') != date_col or df.attrs.get('date_format') != date_format:
+        logger.info(f"Cached frame was parsed with {df.attrs.get('date_format')}, re-reading CSV with {date_format}")
+        return None
+    
+    logger.info(f"Loaded cleaned frame from {frame_path}")
     return df
 
+def remove_uploaded_file(file_path):
+    """Remove an uploaded file together with its cached cleaned frame."""
+    for path in (file_path, get_cleaned_frame_path(file_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
 def calculate_budget_data(df, file_format):
     """
     Calculate daily average spend based on the CSV data.
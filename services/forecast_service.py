@@ -1,12 +1,34 @@
-from prophet import Prophet
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 import pandas as pd
 import numpy as np
-from config import logger
-from services.viz_service import create_forecast_plots
+from config import logger, FORECAST_MAX_WORKERS, FORECAST_PARALLEL_MIN_ROWS, FORECAST_ENGINE, FORECAST_INTERVALS
+from services.viz_service import create_forecast_plots, create_budget_sweep_plot
+from services import prophet_engine, least_squares_engine
 
-def generate_forecast(df, date_col, metrics, forecast_period, budget_change_ratio=1.0):
+# Forecasting engines selectable per request. Each engine module provides
+# fit_model(prophet_df, cache), predict(model, future, intervals) returning a Prophet-style
+# forecast frame, get_budget_coefficient(model) and get_fit_report(model).
+FORECAST_ENGINES = {
+    'prophet': prophet_engine,
+    'least_squares': least_squares_engine
+}
+
+# How forecast intervals are computed, from most to least expensive
+INTERVAL_STRATEGIES = ('full', 'reduced', 'horizon', 'none')
+
+# Worker pools are started once per size and shared by every forecast in this process, so
+# concurrent forecast jobs never run more than max_workers fitting processes between them
+process_pools = {}
+process_pools_lock = threading.Lock()
+
+def generate_forecast(df, date_col, metrics, forecast_period, budget_change_ratio=1.0, max_workers=None,
+                      progress_callback=None, frequency='D', engine=FORECAST_ENGINE, intervals=FORECAST_INTERVALS,
+                      create_plots=True, cache=True):
     """
-    Generate forecasts using Prophet for selected metrics with the specified date column.
+    Generate forecasts for selected metrics with the specified date column.
     Incorporates budget changes as a regressor with metric-specific elasticities.
     
     Args:
@@ -15,13 +37,108 @@ def generate_forecast(df, date_col, metrics, forecast_period, budget_change_rati
         metrics: List of metrics to forecast
         forecast_period: Number of periods to forecast
         budget_change_ratio: Ratio of new budget to original budget (default: 1.0 = no change)
+        max_workers: Number of processes used to fit metrics in parallel
+                     (default: FORECAST_MAX_WORKERS, 1 = fit serially)
+        progress_callback: Optional function called as progress_callback(metric, succeeded)
+                           when each metric finishes or is skipped
+        frequency: Spacing of the observations and forecast periods ('D' daily, 'W' weekly)
+        engine: Name of the forecasting engine in FORECAST_ENGINES
+        intervals: Interval strategy in INTERVAL_STRATEGIES
+        create_plots: Write the forecast and components plots (off for headless runs)
+        cache: Use the model cache (off for batch runs, so they don't evict the app's models)
         
     Returns:
         dict: Dictionary of forecast results including elasticity data
     """
+    get_forecast_engine(engine)
+    check_interval_strategy(intervals)
+    
     results = {}
     elasticity_data = {}
     
+    metric_jobs = build_metric_jobs(df, date_col, metrics)
+    
+    # Metrics without enough data are finished before any fitting starts
+    if progress_callback:
+        queued_metrics = {metric for metric, _ in metric_jobs}
+        for metric in metrics:
+            if metric != date_col and metric not in queued_metrics:
+                progress_callback(metric, False)
+    
+    # Fit all metrics at once when more than one worker is available
+    outcomes = run_metric_jobs(forecast_metric, metric_jobs,
+                               (forecast_period, budget_change_ratio, frequency, engine, intervals, create_plots, cache),
+                               get_metric_workers(metric_jobs, max_workers), progress_callback=progress_callback)
+    
+    # Collect results in the original metric order, skipping metrics that failed
+    for (metric, _), outcome in zip(metric_jobs, outcomes):
+        if outcome is None:
+            continue
+        results[metric], elasticity_data[metric] = outcome
+    
+    # Cross-metric normalisation needs every fit to have finished
+    add_elasticity_scores(results, elasticity_data)
+    
+    return results
+
+def generate_budget_sweep(df, date_col, metrics, forecast_period, budget_ratios, max_workers=None, frequency='D',
+                          engine=FORECAST_ENGINE, intervals=FORECAST_INTERVALS):
+    """
+    Evaluate a range of budget change ratios for the selected metrics from one fit per metric.
+    
+    Args:
+        df: DataFrame containing the data
+        date_col: Name of the date column
+        metrics: List of metrics to forecast
+        forecast_period: Number of periods to forecast
+        budget_ratios: List of budget change ratios to evaluate
+        max_workers: Number of processes used to fit metrics in parallel
+                     (default: FORECAST_MAX_WORKERS, 1 = fit serially)
+        frequency: Spacing of the observations and forecast periods ('D' daily, 'W' weekly)
+        engine: Name of the forecasting engine in FORECAST_ENGINES
+        intervals: Interval strategy in INTERVAL_STRATEGIES
+        
+    Returns:
+        dict: Budget ratios, per-metric forecast totals and intervals for every ratio,
+              and the path of the response curve plot
+    """
+    get_forecast_engine(engine)
+    check_interval_strategy(intervals)
+    budget_ratios = [float(ratio) for ratio in budget_ratios]
+    
+    metric_jobs = build_metric_jobs(df, date_col, metrics)
+    outcomes = run_metric_jobs(sweep_metric, metric_jobs,
+                               (forecast_period, budget_ratios, frequency, engine, intervals),
+                               get_metric_workers(metric_jobs, max_workers))
+    
+    sweep = {
+        'budget_ratios': budget_ratios,
+        'forecast_period': forecast_period,
+        'engine': engine,
+        'intervals': intervals,
+        'metrics': {}
+    }
+    
+    for (metric, _), outcome in zip(metric_jobs, outcomes):
+        if outcome is not None:
+            sweep['metrics'][metric] = outcome
+    
+    sweep['plot_path'] = create_budget_sweep_plot(sweep) if sweep['metrics'] else None
+    
+    return sweep
+
+def build_metric_jobs(df, date_col, metrics):
+    """
+    Build the Prophet input for every metric, in the order they were selected.
+    
+    Args:
+        df: DataFrame containing the data
+        date_col: Name of the date column
+        metrics: List of metrics to forecast
+        
+    Returns:
+        list: (metric, prophet_df) tuples for metrics with enough data
+    """
     # Add budget regressor to the dataframe (historical values are normalized to 1.0)
     df['budget_normalized'] = 1.0
     
@@ -31,6 +148,7 @@ def generate_forecast(df, date_col, metrics, forecast_period, budget_change_rati
     # Calculate an elasticity index for adjusting budget effects later
     min_observations = 5  # Minimum data points needed to calculate reliable elasticity
     
+    metric_jobs = []
     for metric in metrics:
         # Skip if it's the date column
         if metric == date_col:
@@ -44,136 +162,408 @@ def generate_forecast(df, date_col, metrics, forecast_period, budget_change_rati
             logger.warning(f"Not enough valid data for metric: {metric}")
             continue
         
-        logger.info(f"Forecasting for metric: {metric} with {len(prophet_df)} data points")
-        logger.info(f"Using budget change ratio: {budget_change_ratio}")
+        metric_jobs.append((metric, prophet_df))
+    
+    return metric_jobs
+
+def get_metric_workers(metric_jobs, max_workers=None):
+    """
+    Get the number of worker processes worth using for a set of metric fits.
+    
+    Args:
+        metric_jobs: List of (metric, prophet_df) tuples
+        max_workers: Requested number of worker processes (default: FORECAST_MAX_WORKERS)
+        
+    Returns:
+        int: max_workers, or 1 when every series is shorter than FORECAST_PARALLEL_MIN_ROWS
+    """
+    if max_workers is None:
+        max_workers = FORECAST_MAX_WORKERS
+    
+    # Short series fit in less time than it takes to pickle them over to a worker and back
+    if all(len(prophet_df) < FORECAST_PARALLEL_MIN_ROWS for _, prophet_df in metric_jobs):
+        return 1
+    
+    return max_workers
+
+def get_process_pool(workers):
+    """
+    Get the shared worker pool with the given number of processes, starting it on first use.
+    
+    Args:
+        workers: Number of worker processes
+        
+    Returns:
+        ProcessPoolExecutor: Pool kept alive for later forecasts
+    """
+    with process_pools_lock:
+        executor = process_pools.get(workers)
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_pool_context())
+            process_pools[workers] = executor
+        return executor
+
+def get_pool_context():
+    """
+    Get the multiprocessing context worker pools are started with.
+    
+    Pools are started from job threads of a multithreaded web server, where a forked
+    child can inherit locks held by other threads and deadlock. Where available,
+    workers are forked from a single-threaded fork server instead, with this module
+    (and Prophet) imported once up front. Workers read their settings from the
+    environment rather than inheriting changes made at runtime.
+    
+    Returns:
+        BaseContext or None: The forkserver context, or None for the platform default
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return None
+    
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(['services.forecast_service'])
+    return context
+
+def discard_process_pool(workers, executor):
+    """Drop a broken worker pool so the next forecast starts a fresh one."""
+    with process_pools_lock:
+        if process_pools.get(workers) is executor:
+            del process_pools[workers]
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def run_metric_jobs(worker, metric_jobs, worker_args, max_workers=None, progress_callback=None):
+    """
+    Run a per-metric worker over every job, across the shared process pool when configured.
+    
+    Args:
+        worker: Function called as worker(prophet_df, metric, *worker_args)
+        metric_jobs: List of (metric, prophet_df) tuples
+        worker_args: Extra positional arguments for the worker
+        max_workers: Maximum number of worker processes (default: FORECAST_MAX_WORKERS)
+        progress_callback: Optional function called as progress_callback(metric, succeeded)
+                           as each metric finishes (in completion order)
         
+    Returns:
+        list: One worker outcome per job, in the same order (None for failed metrics)
+    """
+    if max_workers is None:
+        max_workers = FORECAST_MAX_WORKERS
+    
+    if max_workers <= 1 or len(metric_jobs) <= 1:
+        outcomes = []
+        for metric, prophet_df in metric_jobs:
+            outcome = worker(prophet_df, metric, *worker_args)
+            outcomes.append(outcome)
+            if progress_callback:
+                progress_callback(metric, outcome is not None)
+        return outcomes
+    
+    # Pools are sized by max_workers rather than the job count, so forecasts with
+    # different numbers of metrics share one pool
+    workers = max_workers
+    logger.info(f"Fitting {len(metric_jobs)} metrics in parallel with up to {workers} workers")
+    
+    executor = get_process_pool(workers)
+    try:
+        futures = [
+            executor.submit(worker, prophet_df, metric, *worker_args)
+            for metric, prophet_df in metric_jobs
+        ]
+    except BrokenProcessPool:
+        # A worker of an earlier forecast died and took the pool with it
+        discard_process_pool(workers, executor)
+        executor = get_process_pool(workers)
+        futures = [
+            executor.submit(worker, prophet_df, metric, *worker_args)
+            for metric, prophet_df in metric_jobs
+        ]
+    
+    # Report progress as metrics finish, whatever order that happens in
+    if progress_callback:
+        future_metrics = {future: metric for (metric, _), future in zip(metric_jobs, futures)}
+        for future in as_completed(futures):
+            progress_callback(future_metrics[future], future.exception() is None and future.result() is not None)
+    
+    # Collect futures in submission order so the output order matches the input
+    outcomes = []
+    for (metric, _), future in zip(metric_jobs, futures):
         try:
-            # Create and fit model
-            model = Prophet()
-            
-            # Add budget as a regressor
-            model.add_regressor('budget_normalized')
-            
-            model.fit(prophet_df)
-            
-            # Extract budget elasticity - use a simpler, more robust approach
-            try:
-                # Method 1: Direct calculation of elasticity through counterfactual forecasting
-                # Create two future dataframes with different budget values
-                base_future = model.make_future_dataframe(periods=1)
-                base_future['budget_normalized'] = 1.0  # Base budget
-                
-                increased_future = model.make_future_dataframe(periods=1)
-                increased_future['budget_normalized'] = 1.1  # 10% increase
-                
-                # Make predictions for both scenarios
-                base_pred = model.predict(base_future)
-                increased_pred = model.predict(increased_future)
-                
-                # Calculate elasticity as % change in forecast / % change in budget
-                last_base = base_pred['yhat'].iloc[-1]
-                last_increased = increased_pred['yhat'].iloc[-1]
-                
-                # Avoid division by zero
-                if abs(last_base) > 0.001:
-                    pct_change_in_metric = (last_increased - last_base) / last_base
-                    pct_change_in_budget = 0.1  # 10% increase
-                    budget_elasticity = pct_change_in_metric / pct_change_in_budget
-                else:
-                    budget_elasticity = 1.0  # Default if base value is too close to zero
-                
-                logger.info(f"Calculated budget elasticity for {metric}: {budget_elasticity}")
-                
-                # Store the elasticity value
-                elasticity_data[metric] = {
-                    'coefficient': float(budget_elasticity),
-                    'data_points': len(prophet_df)
-                }
-            except Exception as e:
-                # If we can't extract the coefficient, set a default value
-                logger.warning(f"Could not calculate budget elasticity for {metric}: {e}")
-                budget_elasticity = 1.0  # Default to 1:1 relationship
-                elasticity_data[metric] = {
-                    'coefficient': float(budget_elasticity),
-                    'data_points': len(prophet_df)
-                }
-            
-            # Create future dataframe for the actual forecast
-            future = model.make_future_dataframe(periods=forecast_period)
-            
-            # Set future budget values based on budget_change_ratio
-            future['budget_normalized'] = 1.0  # Default for historical dates
-            
-            # Apply budget change only to the forecast period
-            future.loc[future['ds'] > prophet_df['ds'].max(), 'budget_normalized'] = budget_change_ratio
-            
-            # Make prediction
-            forecast = model.predict(future)
-            
-            # Calculate the budget effect component 
-            try:
-                # Simple direct calculation of budget effect
-                base_future = future.copy()
-                base_future['budget_normalized'] = 1.0  # Default budget everywhere
-                
-                # Predict with default budget
-                base_forecast = model.predict(base_future)
-                
-                # Budget effect is the difference between forecasts with and without budget change
-                budget_effect = forecast['yhat'] - base_forecast['yhat']
-                
-                # Only apply to future dates
-                budget_effect.loc[future['ds'] <= prophet_df['ds'].max()] = 0
-                
-                # Add to forecast components
-                forecast['budget_normalized_effect'] = budget_effect
-            except Exception as e:
-                logger.warning(f"Could not calculate budget effect component: {e}")
-                # Create a dummy effect column
-                forecast['budget_normalized_effect'] = 0.0
-            
-            # Create visualizations and get paths
+            outcomes.append(future.result())
+        except Exception as e:
+            # A crashed worker only loses its own metric
+            logger.error(f"Error forecasting {metric} in worker process: {e}")
+            outcomes.append(None)
+            if isinstance(e, BrokenProcessPool):
+                discard_process_pool(workers, executor)
+    
+    return outcomes
+
+def forecast_metric(prophet_df, metric, forecast_period, budget_change_ratio=1.0, frequency='D',
+                    engine=FORECAST_ENGINE, intervals=FORECAST_INTERVALS, create_plots=True, cache=True):
+    """
+    Fit a model for a single metric and build its forecast result.
+    
+    Args:
+        prophet_df: DataFrame with 'ds', 'y' and 'budget_normalized' columns
+        metric: Name of the metric being forecasted
+        forecast_period: Number of periods to forecast
+        budget_change_ratio: Ratio of new budget to original budget
+        frequency: Spacing of the forecast periods ('D' daily, 'W' weekly)
+        engine: Name of the forecasting engine in FORECAST_ENGINES
+        intervals: Interval strategy in INTERVAL_STRATEGIES
+        create_plots: Write the forecast and components plots (paths are None otherwise)
+        cache: Use the model cache
+        
+    Returns:
+        tuple: (metric_result, elasticity_entry) or None if the forecast failed
+    """
+    logger.info(f"Forecasting for metric: {metric} with {len(prophet_df)} data points using {engine}")
+    logger.info(f"Using budget change ratio: {budget_change_ratio}")
+    
+    try:
+        model = fit_metric_model(prophet_df, engine, cache)
+        fit_report = get_forecast_engine(engine).get_fit_report(model)
+        if fit_report and fit_report['source'] == 'warm_start':
+            logger.info(f"Warm-started {metric} fit in {fit_report['seconds']:.2f}s "
+                        f"(saved {fit_report['saved_seconds']:.2f}s against a cold fit)")
+        
+        forecast, budget_elasticity = predict_with_budget(model, prophet_df, metric, forecast_period, budget_change_ratio,
+                                                        frequency, engine, intervals)
+        
+        # Store the elasticity value
+        elasticity_entry = {
+            'coefficient': float(budget_elasticity),
+            'data_points': len(prophet_df)
+        }
+        
+        # Create visualizations and get paths
+        plot_path, components_path = None, None
+        if create_plots:
             plot_path, components_path = create_forecast_plots(prophet_df, forecast, metric, budget_change_ratio)
-            
-            # Add additional elasticity context to results
-            results[metric] = {
-                'forecast': forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(forecast_period).to_dict('records'),
-                'plot_path': plot_path,
-                'components_path': components_path,
-                'elasticity': {
-                    'coefficient': float(budget_elasticity),
-                    'normalized_impact': float(budget_elasticity * budget_change_ratio / prophet_df['y'].mean()) 
-                        if prophet_df['y'].mean() > 0 else 0.0
-                }
+        
+        # Add additional elasticity context to results
+        metric_result = {
+            'forecast': forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(forecast_period).to_dict('records'),
+            'plot_path': plot_path,
+            'components_path': components_path,
+            'fit': fit_report,
+            'elasticity': {
+                'coefficient': float(budget_elasticity),
+                'normalized_impact': float(budget_elasticity * budget_change_ratio / prophet_df['y'].mean()) 
+                    if prophet_df['y'].mean() > 0 else 0.0
             }
-        except Exception as e:
-            logger.error(f"Error forecasting {metric}: {e}")
-            continue
+        }
+        
+        return metric_result, elasticity_entry
+    except Exception as e:
+        logger.error(f"Error forecasting {metric}: {e}")
+        return None
+
+def sweep_metric(prophet_df, metric, forecast_period, budget_ratios, frequency='D', engine=FORECAST_ENGINE,
+                 intervals=FORECAST_INTERVALS):
+    """
+    Fit a model for a single metric and evaluate every budget ratio against it.
+    
+    Because budget_normalized is an additive linear regressor, each ratio only shifts
+    the base-budget forecast by coefficient * (ratio - 1) on forecast dates, so all
+    ratios are evaluated in one vectorized pass over a single prediction.
+    
+    Args:
+        prophet_df: DataFrame with 'ds', 'y' and 'budget_normalized' columns
+        metric: Name of the metric being forecasted
+        forecast_period: Number of periods to forecast
+        budget_ratios: List of budget change ratios to evaluate
+        frequency: Spacing of the forecast periods ('D' daily, 'W' weekly)
+        engine: Name of the forecasting engine in FORECAST_ENGINES
+        intervals: Interval strategy in INTERVAL_STRATEGIES
+        
+    Returns:
+        dict: Forecast totals and summed interval bounds per ratio (None without intervals),
+              or None if the fit failed
+    """
+    logger.info(f"Sweeping {len(budget_ratios)} budget ratios for metric: {metric}")
+    
+    try:
+        model = fit_metric_model(prophet_df, engine)
+        
+        # Forecast the horizon once at the base budget
+        base_forecast, _ = predict_with_budget(model, prophet_df, metric, forecast_period, 1.0, frequency, engine,
+                                               intervals)
+        horizon = base_forecast[base_forecast['ds'] > prophet_df['ds'].max()]
+        budget_coefficient = get_forecast_engine(engine).get_budget_coefficient(model)
+        
+        # Shift of every forecast day for every ratio: shape (days, ratios)
+        budget_shift = budget_coefficient * (np.asarray(budget_ratios) - 1.0)
+        yhat = horizon['yhat'].values[:, None] + budget_shift[None, :]
+        yhat_lower = horizon['yhat_lower'].values[:, None] + budget_shift[None, :]
+        yhat_upper = horizon['yhat_upper'].values[:, None] + budget_shift[None, :]
+        
+        # Interval bounds are summed per day, which gives a conservative band for the total
+        has_intervals = not horizon[['yhat_lower', 'yhat_upper']].isna().any().any()
+        return {
+            'base_total': float(horizon['yhat'].sum()),
+            'total': yhat.sum(axis=0).tolist(),
+            'total_lower': yhat_lower.sum(axis=0).tolist() if has_intervals else None,
+            'total_upper': yhat_upper.sum(axis=0).tolist() if has_intervals else None,
+            'budget_coefficient': float(budget_coefficient)
+        }
+    except Exception as e:
+        logger.error(f"Error sweeping budget ratios for {metric}: {e}")
+        return None
+
+def fit_metric_model(prophet_df, engine=FORECAST_ENGINE, cache=True):
+    """
+    Fit the budget-aware model for a single metric with the selected engine.
     
-    # Add relative elasticity scores for comparisons across metrics
-    if elasticity_data:
-        # Get min and max elasticities for normalization
-        elasticity_values = [data['coefficient'] for data in elasticity_data.values()]
-        min_elasticity = min(elasticity_values)
-        max_elasticity = max(elasticity_values)
-        elasticity_range = max_elasticity - min_elasticity
-        
-        # Normalize elasticities to a 0-10 scale for easy comparison
-        for metric, data in elasticity_data.items():
-            if elasticity_range > 0:
-                normalized_elasticity = ((data['coefficient'] - min_elasticity) / elasticity_range) * 10
+    Args:
+        prophet_df: DataFrame with 'ds', 'y' and 'budget_normalized' columns
+        engine: Name of the forecasting engine in FORECAST_ENGINES
+        cache: Use the model cache
+        
+    Returns:
+        Fitted model, to be passed back to the same engine
+    """
+    return get_forecast_engine(engine).fit_model(prophet_df, cache=cache)
+
+def get_forecast_engine(engine):
+    """Look up a forecasting engine module by name."""
+    if engine not in FORECAST_ENGINES:
+        raise ValueError(f"Unknown forecasting engine: {engine}")
+    return FORECAST_ENGINES[engine]
+
+def check_interval_strategy(intervals):
+    """Raise ValueError for an interval strategy not in INTERVAL_STRATEGIES."""
+    if intervals not in INTERVAL_STRATEGIES:
+        raise ValueError(f"Unknown interval strategy: {intervals}")
+
+def make_future_frame(prophet_df, forecast_period, frequency='D'):
+    """
+    Build the prediction dates: every historical date followed by forecast_period future periods.
+    
+    Args:
+        prophet_df: DataFrame the model was fitted on
+        forecast_period: Number of periods to forecast
+        frequency: Spacing of the forecast periods ('D' daily, 'W' weekly)
+        
+    Returns:
+        DataFrame: Single 'ds' column, like Prophet's make_future_dataframe
+    """
+    history_dates = pd.Series(prophet_df['ds'].unique()).sort_values()
+    last_date = history_dates.iloc[-1]
+    
+    future_dates = pd.date_range(start=last_date, periods=forecast_period + 1, freq=frequency)
+    future_dates = future_dates[future_dates > last_date][:forecast_period]
+    
+    return pd.DataFrame({'ds': np.concatenate([history_dates.values, future_dates.values])})
+
+def predict_with_budget(model, prophet_df, metric, forecast_period, budget_change_ratio=1.0, frequency='D',
+                        engine=FORECAST_ENGINE, intervals=FORECAST_INTERVALS):
+    """
+    Forecast a fitted model with the budget change applied and derive its budget elasticity.
+    
+    Args:
+        model: Fitted model from fit_metric_model
+        prophet_df: DataFrame the model was fitted on
+        metric: Name of the metric being forecasted
+        forecast_period: Number of periods to forecast
+        budget_change_ratio: Ratio of new budget to original budget
+        frequency: Spacing of the forecast periods ('D' daily, 'W' weekly)
+        engine: Name of the forecasting engine the model was fitted with
+        intervals: Interval strategy in INTERVAL_STRATEGIES
+        
+    Returns:
+        tuple: (forecast DataFrame with a budget_normalized_effect column, budget_elasticity)
+    """
+    # Create future dataframe for the actual forecast
+    forecast_engine = get_forecast_engine(engine)
+    future = make_future_frame(prophet_df, forecast_period, frequency)
+    
+    # Set future budget values based on budget_change_ratio
+    future['budget_normalized'] = 1.0  # Default for historical dates
+    
+    # Apply budget change only to the forecast period
+    is_future = future['ds'] > prophet_df['ds'].max()
+    future.loc[is_future, 'budget_normalized'] = budget_change_ratio
+    
+    # Make prediction (the only predict pass for this metric)
+    forecast = forecast_engine.predict(model, future, intervals)
+    
+    # budget_normalized is an additive linear regressor, so its contribution to
+    # yhat is coefficient * budget. Counterfactual budgets can therefore be read
+    # straight off the fitted coefficient instead of re-running predict().
+    try:
+        budget_coefficient = forecast_engine.get_budget_coefficient(model)
+    except Exception as e:
+        logger.warning(f"Could not read budget coefficient for {metric}: {e}")
+        budget_coefficient = None
+    
+    # Extract budget elasticity from the first forecast day at the base budget
+    try:
+        if budget_coefficient is None:
+            raise ValueError("no budget coefficient available")
+        
+        # Remove the applied budget change to get the base-budget forecast
+        first_future = forecast.loc[is_future.values].iloc[0]
+        last_base = first_future['yhat'] - budget_coefficient * (budget_change_ratio - 1.0)
+        
+        # A 10% budget increase adds 0.1 * coefficient to the base forecast
+        last_increased = last_base + budget_coefficient * 0.1
+        
+        # Avoid division by zero
+        if abs(last_base) > 0.001:
+            pct_change_in_metric = (last_increased - last_base) / last_base
+            pct_change_in_budget = 0.1  # 10% increase
+            budget_elasticity = pct_change_in_metric / pct_change_in_budget
+        else:
+            budget_elasticity = 1.0  # Default if base value is too close to zero
+        
+        logger.info(f"Calculated budget elasticity for {metric}: {budget_elasticity}")
+    except Exception as e:
+        # If we can't extract the coefficient, set a default value
+        logger.warning(f"Could not calculate budget elasticity for {metric}: {e}")
+        budget_elasticity = 1.0  # Default to 1:1 relationship
+    
+    # Calculate the budget effect component 
+    if budget_coefficient is not None:
+        # Budget effect is the difference between forecasts with and without budget change,
+        # which is zero on historical dates where the budget stays at 1.0
+        forecast['budget_normalized_effect'] = budget_coefficient * (future['budget_normalized'].values - 1.0)
+    else:
+        # Create a dummy effect column
+        forecast['budget_normalized_effect'] = 0.0
+    
+    return forecast, budget_elasticity
+
+def add_elasticity_scores(results, elasticity_data):
+    """
+    Add relative elasticity scores for comparisons across metrics.
+    
+    Args:
+        results: Dictionary of per-metric forecast results (updated in place)
+        elasticity_data: Dictionary of per-metric elasticity coefficients
+    """
+    if not elasticity_data:
+        return
+    
+    # Get min and max elasticities for normalization
+    elasticity_values = [data['coefficient'] for data in elasticity_data.values()]
+    min_elasticity = min(elasticity_values)
+    max_elasticity = max(elasticity_values)
+    elasticity_range = max_elasticity - min_elasticity
+    
+    # Normalize elasticities to a 0-10 scale for easy comparison
+    for metric, data in elasticity_data.items():
+        if elasticity_range > 0:
+            normalized_elasticity = ((data['coefficient'] - min_elasticity) / elasticity_range) * 10
+        else:
+            normalized_elasticity = 5.0  # Default middle value if all metrics have same elasticity
+            
+        if metric in results:
+            results[metric]['elasticity']['normalized_score'] = float(normalized_elasticity)
+            
+            # Add interpretation of elasticity
+            if normalized_elasticity < 3.33:
+                results[metric]['elasticity']['response'] = "Low budget sensitivity"
+            elif normalized_elasticity < 6.67:
+                results[metric]['elasticity']['response'] = "Medium budget sensitivity"
             else:
-                normalized_elasticity = 5.0  # Default middle value if all metrics have same elasticity
-                
-            if metric in results:
-                results[metric]['elasticity']['normalized_score'] = float(normalized_elasticity)
-                
-                # Add interpretation of elasticity
-                if normalized_elasticity < 3.33:
-                    results[metric]['elasticity']['response'] = "Low budget sensitivity"
-                elif normalized_elasticity < 6.67:
-                    results[metric]['elasticity']['response'] = "Medium budget sensitivity"
-                else:
-                    results[metric]['elasticity']['response'] = "High budget sensitivity"
-    
-    return results
\ No newline at end of file
+                results[metric]['elasticity']['response'] = "High budget sensitivity"
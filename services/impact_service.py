@@ -1,154 +1,73 @@
+import time
+import itertools
 import pandas as pd
 import numpy as np
-from config import logger
+from concurrent.futures import ThreadPoolExecutor
+from config import logger, IMPACT_MAX_WORKERS, IMPACT_CSV_ENGINE
 from services.file_service import detect_file_format
 from datetime import datetime, timedelta
 import json
 import csv
 
-def process_impact_files(uploaded_files):
+# pyarrow is optional: when installed it reads exports with multithreaded parsing
+try:
+    import pyarrow
+    import pyarrow.csv as pyarrow_csv
+except ImportError:
+    pyarrow = pyarrow_csv = None
+
+# Dimension columns extract_all_metrics never treats as metrics (lowercase)
+NON_METRIC_COLUMNS = frozenset(['date', 'campaign', 'ad_group', 'ad', 'keyword', 'platform',
+                                'source', 'medium', 'device', 'country', 'region', 'city'])
+
+# Terms (and excluded terms) identifying the columns derived metrics are recomputed from;
+# the first matching column in file order is used for each component
+METRIC_COMPONENT_TERMS = {
+    'clicks': (('click',), ()),
+    'impressions': (('impr', 'impression'), ()),
+    'conversions': (('conv',), ('rate',)),
+    'value': (('value', 'revenue'), ()),
+    'cost': (('cost', 'spend'), ())
+}
+
+def process_impact_files(uploaded_files, max_workers=None):
     """
     Process multiple uploaded files for impact analysis.
     
+    Files are processed concurrently on a bounded thread pool; a file that fails
+    is reported and skipped without affecting the others.
+    
     Args:
         uploaded_files: List of dictionaries with file information
+        max_workers: Maximum number of files processed at once (default: IMPACT_MAX_WORKERS)
         
     Returns:
-        dict: Processed impact data
+        dict: Processed impact data, with forecasts in upload order and a per-file
+              'files' report (name, status, seconds and error)
     """
+    if max_workers is None:
+        max_workers = IMPACT_MAX_WORKERS
+    
     impact_data = {
-        'forecasts': []
+        'forecasts': [],
+        'files': []
     }
     
-    for index, file_info in enumerate(uploaded_files):
-        try:
-            file_path = file_info['path']
-            logger.info(f"Processing file: {file_info['original_name']}")
-            
-            # First, check if this is a forecast CSV format (with metadata at the top)
-            is_forecast_csv, metadata, data_df = parse_forecast_csv(file_path)
-            
-            # Initialize budget data with defaults - ALWAYS USE £
-            budget_value = None
-            budget_currency = '£'  # ALWAYS USE £
-            
-            if is_forecast_csv:
-                # Extract budget information from metadata
-                if 'budget' in metadata:
-                    budget_value = float(metadata.get('budget', 0))
-                # Always use £ regardless of what's in metadata
-                budget_currency = '£'
-                
-                # Extract information from the parsed metadata and data
-                forecast_id = f"ForecastName {index + 1}"
-                forecast_title = metadata.get('forecast_title', forecast_id)
-                platform = metadata.get('platform', 'Unknown')
-                campaign = extract_campaign_name_from_metadata(metadata, file_info['original_name'])
-                
-                # Extract ALL metrics from the data portion
-                metrics = extract_all_metrics_from_forecast_data(data_df)
-                
-                # Extract date range from metadata
-                start_date = datetime.now().strftime('%Y-%m-%d')
-                forecast_days = 90  # Default to 90 days forecast
-                end_date = (datetime.now() + timedelta(days=forecast_days)).strftime('%Y-%m-%d')
-                
-                # Try to get date range from metadata
-                if 'start_date' in metadata:
-                    start_date = metadata.get('start_date', start_date)
-                if 'end_date' in metadata:
-                    end_date = metadata.get('end_date', end_date)
-                
-                logger.info(f"Successfully parsed forecast CSV: {forecast_title}, Platform: {platform}")
-            else:
-                # Fall back to regular CSV parsing
-                logger.info(f"Not a forecast CSV, trying standard parsing")
-                
-                # Detect file format
-                file_format = detect_file_format(file_path)
-                
-                # Read CSV with pandas directly - with more flexible parsing
-                df = pd.read_csv(file_path, skiprows=file_format['skiprows'], delimiter=',', 
-                                 engine='python', error_bad_lines=False)
-                
-                # Extract platform from file content or name
-                platform = determine_platform(df, file_info['original_name'], file_format)
-                
-                # Extract campaign name if available
-                campaign = extract_campaign_name(df, file_info['original_name'])
-                
-                # Extract ALL metrics - metrics will be normalized in the function
-                metrics = extract_all_metrics(df)
-                
-                # Try to find budget data in the file
-                try:
-                    # Look for columns with budget/cost keywords
-                    cost_cols = [col for col in df.columns if any(term in col.lower() for term in 
-                                ['budget', 'cost', 'spend', 'amount'])]
-                    
-                    if cost_cols:
-                        # Use the first cost column found
-                        total_cost = df[cost_cols[0]].sum()
-                        budget_value = float(total_cost)
-                        
-                        # ALWAYS USE £
-                        budget_currency = '£'
-                except Exception as e:
-                    logger.warning(f"Could not extract budget information: {str(e)}")
-                
-                # Generate forecast ID and title
-                forecast_id = f"ForecastName {index + 1}"
-                forecast_title = forecast_id
-                
-                # Set default date range
-                start_date = datetime.now().strftime('%Y-%m-%d')
-                forecast_days = 90  # Default to 90 days forecast
-                end_date = (datetime.now() + timedelta(days=forecast_days)).strftime('%Y-%m-%d')
-                
-                # Try to extract date range from data
-                if file_format['date_columns'] and not df.empty:
-                    # If this is a regular CSV, try to extract dates from the data
-                    date_col = file_format['date_columns'][0]
-                    if date_col in df.columns:
-                        # Get date range
-                        df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-                        last_date = df[date_col].max()
-                        if pd.notna(last_date):
-                            start_date = last_date.strftime('%Y-%m-%d')
-                            end_date = (last_date + timedelta(days=forecast_days)).strftime('%Y-%m-%d')
-            
-            # Calculate days between start and end date
-            try:
-                start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-                end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-                forecast_days = (end_dt - start_dt).days
-            except:
-                forecast_days = 90  # Fallback if date parsing fails
-            
-            # Create forecast entry
-            forecast_entry = {
-                'id': forecast_id,
-                'title': forecast_title,
-                'platform': platform,
-                'campaign': campaign,
-                'metrics': metrics,
-                'date_range': {
-                    'start': start_date,
-                    'end': end_date,
-                    'days': forecast_days
-                },
-                # Add budget information to the forecast entry - ALWAYS USE £
-                'budget': {
-                    'value': budget_value,
-                    'currency': '£'  # ALWAYS USE £
-                }
-            }
-            
+    jobs = list(enumerate(uploaded_files))
+    if max_workers <= 1 or len(jobs) <= 1:
+        outcomes = [process_impact_file_timed(index, file_info) for index, file_info in jobs]
+    else:
+        workers = min(max_workers, len(jobs))
+        logger.info(f"Processing {len(jobs)} files in parallel with {workers} workers")
+        
+        # map returns outcomes in upload order, whatever order the files finish in
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='impact-file') as executor:
+            outcomes = list(executor.map(lambda job: process_impact_file_timed(*job), jobs))
+    
+    for forecast_entry, file_report in outcomes:
+        if forecast_entry is not None:
             impact_data['forecasts'].append(forecast_entry)
-            
-        except Exception as e:
-            logger.error(f"Error processing file {file_info['original_name']}: {str(e)}")
-            # Continue processing other files
+        impact_data['files'].append(file_report)
     
     # Initialize metrics
     for forecast in impact_data['forecasts']:
@@ -174,6 +93,259 @@ def process_impact_files(uploaded_files):
     logger.info(f"Processed {len(impact_data['forecasts'])} forecasts")
     return impact_data
 
+def process_impact_file_timed(index, file_info):
+    """
+    Process one uploaded file, timing it and catching its errors.
+    
+    Args:
+        index: Position of the file in the upload
+        file_info: Dictionary with 'original_name' and 'path'
+        
+    Returns:
+        tuple: (forecast_entry or None if the file failed, file report dictionary)
+    """
+    started = time.perf_counter()
+    forecast_entry = None
+    skipped_lines = 0
+    error = None
+    
+    try:
+        forecast_entry, skipped_lines = process_impact_file(index, file_info)
+    except Exception as e:
+        logger.error(f"Error processing file {file_info['original_name']}: {str(e)}")
+        error = str(e)
+    
+    seconds = time.perf_counter() - started
+    logger.info(f"Processed file {file_info['original_name']} in {seconds:.3f}s")
+    
+    file_report = {
+        'name': file_info['original_name'],
+        'status': 'failed' if error else 'processed',
+        'seconds': round(seconds, 3),
+        'skipped_lines': skipped_lines,
+        'error': error
+    }
+    return forecast_entry, file_report
+
+def process_impact_file(index, file_info):
+    """
+    Process a single uploaded file into an impact forecast entry.
+    
+    Args:
+        index: Position of the file in the upload (used for the default forecast ID)
+        file_info: Dictionary with 'original_name' and 'path'
+        
+    Returns:
+        tuple: (forecast entry with metrics, date range and budget, number of malformed lines skipped)
+    """
+    file_path = file_info['path']
+    logger.info(f"Processing file: {file_info['original_name']}")
+    
+    # First, check if this is a forecast CSV format (with metadata at the top)
+    is_forecast_csv, metadata, data_df = parse_forecast_csv(file_path)
+    
+    # Initialize budget data with defaults - ALWAYS USE £
+    budget_value = None
+    budget_currency = '£'  # ALWAYS USE £
+    skipped_lines = 0
+    
+    if is_forecast_csv:
+        # Extract budget information from metadata
+        if 'budget' in metadata:
+            budget_value = float(metadata.get('budget', 0))
+        # Always use £ regardless of what's in metadata
+        budget_currency = '£'
+        
+        # Extract information from the parsed metadata and data
+        forecast_id = f"ForecastName {index + 1}"
+        forecast_title = metadata.get('forecast_title', forecast_id)
+        platform = metadata.get('platform', 'Unknown')
+        campaign = extract_campaign_name_from_metadata(metadata, file_info['original_name'])
+        
+        # Extract ALL metrics from the data portion
+        metrics = extract_all_metrics_from_forecast_data(data_df)
+        
+        # Extract date range from metadata
+        start_date = datetime.now().strftime('%Y-%m-%d')
+        forecast_days = 90  # Default to 90 days forecast
+        end_date = (datetime.now() + timedelta(days=forecast_days)).strftime('%Y-%m-%d')
+        
+        # Try to get date range from metadata
+        if 'start_date' in metadata:
+            start_date = metadata.get('start_date', start_date)
+        if 'end_date' in metadata:
+            end_date = metadata.get('end_date', end_date)
+        
+        logger.info(f"Successfully parsed forecast CSV: {forecast_title}, Platform: {platform}")
+    else:
+        # Fall back to regular CSV parsing
+        logger.info(f"Not a forecast CSV, trying standard parsing")
+        
+        # Detect file format
+        file_format = detect_file_format(file_path)
+        
+        # Read CSV with a fast engine, skipping (and counting) malformed lines
+        df, skipped_lines = read_export_csv(file_path, file_format['skiprows'])
+        if skipped_lines:
+            logger.warning(f"Skipped {skipped_lines} malformed lines in {file_info['original_name']}")
+        
+        # Extract platform from file content or name
+        platform = determine_platform(df, file_info['original_name'], file_format)
+        
+        # Extract campaign name if available
+        campaign = extract_campaign_name(df, file_info['original_name'])
+        
+        # Extract ALL metrics - metrics will be normalized in the function
+        metrics = extract_all_metrics(df)
+        
+        # Try to find budget data in the file
+        try:
+            # Look for columns with budget/cost keywords
+            cost_cols = [col for col in df.columns if any(term in col.lower() for term in 
+                        ['budget', 'cost', 'spend', 'amount'])]
+            
+            if cost_cols:
+                # Use the first cost column found
+                total_cost = df[cost_cols[0]].sum()
+                budget_value = float(total_cost)
+                
+                # ALWAYS USE £
+                budget_currency = '£'
+        except Exception as e:
+            logger.warning(f"Could not extract budget information: {str(e)}")
+        
+        # Generate forecast ID and title
+        forecast_id = f"ForecastName {index + 1}"
+        forecast_title = forecast_id
+        
+        # Set default date range
+        start_date = datetime.now().strftime('%Y-%m-%d')
+        forecast_days = 90  # Default to 90 days forecast
+        end_date = (datetime.now() + timedelta(days=forecast_days)).strftime('%Y-%m-%d')
+        
+        # Try to extract date range from data
+        if file_format['date_columns'] and not df.empty:
+            # If this is a regular CSV, try to extract dates from the data
+            date_col = file_format['date_columns'][0]
+            if date_col in df.columns:
+                # Get date range
+                df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
+                last_date = df[date_col].max()
+                if pd.notna(last_date):
+                    start_date = last_date.strftime('%Y-%m-%d')
+                    end_date = (last_date + timedelta(days=forecast_days)).strftime('%Y-%m-%d')
+    
+    # Calculate days between start and end date
+    try:
+        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+        end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+        forecast_days = (end_dt - start_dt).days
+    except:
+        forecast_days = 90  # Fallback if date parsing fails
+    
+    # Create forecast entry
+    forecast_entry = {
+        'id': forecast_id,
+        'title': forecast_title,
+        'platform': platform,
+        'campaign': campaign,
+        'metrics': metrics,
+        'date_range': {
+            'start': start_date,
+            'end': end_date,
+            'days': forecast_days
+        },
+        # Add budget information to the forecast entry - ALWAYS USE £
+        'budget': {
+            'value': budget_value,
+            'currency': '£'  # ALWAYS USE £
+        }
+    }
+    
+    return forecast_entry, skipped_lines
+
+def read_export_csv(file_path, skiprows=0, engine=None):
+    """
+    Read an ad platform export, skipping malformed lines instead of failing.
+    
+    Args:
+        file_path: Path to the CSV file
+        skiprows: Number of preamble lines before the header
+        engine: 'pyarrow', 'c' or 'auto' (pyarrow when installed) (default: IMPACT_CSV_ENGINE)
+        
+    Returns:
+        tuple: (DataFrame, number of malformed lines skipped)
+    """
+    engine = engine or IMPACT_CSV_ENGINE
+    if engine == 'auto':
+        engine = 'pyarrow' if pyarrow_csv is not None else 'c'
+    
+    if engine == 'pyarrow':
+        if pyarrow_csv is None:
+            raise ValueError("The pyarrow CSV engine was requested but pyarrow is not installed")
+        
+        skipped = []
+        short_rows = []
+        
+        # The C engine drops rows with too many fields and pads short ones with NaN
+        def skip_row(row):
+            (skipped if row.actual_columns > row.expected_columns else short_rows).append(row.number)
+            return 'skip'
+        
+        table = pyarrow_csv.read_csv(
+            file_path,
+            read_options=pyarrow_csv.ReadOptions(skip_rows=skiprows),
+            parse_options=pyarrow_csv.ParseOptions(invalid_row_handler=skip_row),
+            convert_options=pyarrow_csv.ConvertOptions(timestamp_parsers=[])
+        )
+        
+        # pyarrow can't pad a short row in place, so those (rare) files are read the C engine's way
+        if short_rows:
+            return read_export_csv(file_path, skiprows, 'c')
+        
+        # Dates stay strings, as with the C engine, so they are never mistaken for numeric metrics
+        for index, field in enumerate(table.schema):
+            if pyarrow.types.is_temporal(field.type):
+                table = table.set_column(index, field.name, table.column(index).cast(pyarrow.string()))
+        
+        df = table.to_pandas()
+        return df, len(skipped)
+    
+    if engine != 'c':
+        raise ValueError(f"Unknown CSV engine: {engine}")
+    
+    # Most exports are well formed, so only a failed strict read pays for skipping and counting
+    try:
+        return pd.read_csv(file_path, skiprows=skiprows, delimiter=','), 0
+    except pd.errors.ParserError:
+        df = pd.read_csv(file_path, skiprows=skiprows, delimiter=',', on_bad_lines='skip')
+    
+    return df, count_long_lines(file_path, skiprows)
+
+def count_long_lines(file_path, skiprows=0):
+    """
+    Count the data lines the C engine skips with on_bad_lines='skip': those with more fields than expected.
+    
+    Counted in a separate pass because the C engine only reports skipped lines as
+    warnings, and capturing those is process-wide.
+    
+    Args:
+        file_path: Path to the CSV file
+        skiprows: Number of preamble lines before the header
+        
+    Returns:
+        int: Number of skipped lines
+    """
+    with open(file_path, newline='', encoding='utf-8', errors='replace') as f:
+        rows = (len(row) for row in csv.reader(itertools.islice(f, skiprows, None)) if row)
+        num_fields = next(rows, 0)
+        
+        # A first data row longer than the header makes pandas read the extra leading fields as the index
+        first_row = next(rows, 0)
+        num_fields = max(num_fields, first_row)
+        
+        return sum(1 for length in rows if length > num_fields)
+
 def normalize_metric_name(name):
     """
     Normalize metric name by removing currency indicators and standardizing format.
@@ -281,79 +453,25 @@ def extract_all_metrics(df):
     """
     metrics = []
     
-    # Skip these columns as they're not metrics
-    non_metric_columns = ['date', 'campaign', 'ad_group', 'ad', 'keyword', 'platform', 
-                        'source', 'medium', 'device', 'country', 'region', 'city']
-    
-    # First pass: Identify all possible metric columns
-    potential_metric_columns = []
-    for col in df.columns:
-        if col.lower() in [c.lower() for c in non_metric_columns]:
-            continue
-            
-        # Check if column contains primarily numeric data
-        try:
-            numeric_values = pd.to_numeric(df[col], errors='coerce')
-            if numeric_values.notna().sum() > len(df) * 0.5:  # If >50% are numeric
-                potential_metric_columns.append(col)
-        except:
-            continue
+    # Totals for every column that is mostly numeric, each column coerced once
+    raw_totals = get_numeric_totals(df)
     
-    # Second pass: Calculate raw totals for all metrics and store
-    raw_totals = {}
-    for col in potential_metric_columns:
-        try:
-            values = pd.to_numeric(df[col], errors='coerce')
-            raw_totals[col] = values.sum()
-        except Exception as e:
-            logger.warning(f"Error calculating raw total for {col}: {str(e)}")
+    # Component columns the derived metrics are recomputed from, resolved once
+    components = build_component_index(raw_totals.index)
+    derived_values = get_derived_metric_values(raw_totals, components)
     
-    # Third pass: Process each metric with proper logic based on metric type
-    for col in potential_metric_columns:
+    # Process each metric with proper logic based on metric type
+    for col, total in raw_totals.items():
         try:
-            # Normalize the metric name to remove currency indicators
-            metric_name = normalize_metric_name(col)
-            metric_lower = col.lower()
-            
             # Skip if raw total is NaN or too small
-            if pd.isna(raw_totals[col]) or abs(raw_totals[col]) < 0.00001:
+            if pd.isna(total) or abs(total) < 0.00001:
                 continue
             
-            # Default to using the raw total
-            value = raw_totals[col]
-            
-            # Special handling for derived metrics
-            if 'ctr' in metric_lower or 'click through rate' in metric_lower:
-                # If we have both clicks and impressions, recalculate CTR from totals
-                clicks_col = next((c for c in raw_totals if 'click' in c.lower()), None)
-                impr_col = next((c for c in raw_totals if 'impr' in c.lower() or 'impression' in c.lower()), None)
-                
-                if clicks_col and impr_col and raw_totals[impr_col] > 0:
-                    value = (raw_totals[clicks_col] / raw_totals[impr_col]) * 100
-                
-            elif 'conversion rate' in metric_lower:
-                # Recalculate conversion rate from total conversions and clicks
-                conv_col = next((c for c in raw_totals if 'conv' in c.lower() and 'rate' not in c.lower()), None)
-                clicks_col = next((c for c in raw_totals if 'click' in c.lower()), None)
-                
-                if conv_col and clicks_col and raw_totals[clicks_col] > 0:
-                    value = (raw_totals[conv_col] / raw_totals[clicks_col]) * 100
-            
-            elif 'roas' in metric_lower:
-                # Recalculate ROAS from conversion value and cost
-                value_col = next((c for c in raw_totals if 'value' in c.lower() or 'revenue' in c.lower()), None)
-                cost_col = next((c for c in raw_totals if 'cost' in c.lower() or 'spend' in c.lower()), None)
-                
-                if value_col and cost_col and raw_totals[cost_col] > 0:
-                    value = raw_totals[value_col] / raw_totals[cost_col]
+            # Normalize the metric name to remove currency indicators
+            metric_name = normalize_metric_name(col)
             
-            elif 'roi' in metric_lower:
-                # Recalculate ROI from revenue and cost
-                revenue_col = next((c for c in raw_totals if 'revenue' in c.lower() or 'value' in c.lower()), None)
-                cost_col = next((c for c in raw_totals if 'cost' in c.lower() or 'spend' in c.lower()), None)
-                
-                if revenue_col and cost_col and raw_totals[cost_col] > 0:
-                    value = ((raw_totals[revenue_col] - raw_totals[cost_col]) / raw_totals[cost_col]) * 100
+            # Rates are recalculated from their component totals, everything else is the raw total
+            value = derived_values.get(col, total)
             
             # Format the value appropriately
             formatted_value = format_metric_value(metric_name, value)
@@ -373,6 +491,120 @@ def extract_all_metrics(df):
     
     return metrics
 
+def get_numeric_totals(df):
+    """
+    Sum every metric column that is more than 50% numeric.
+    
+    Args:
+        df: DataFrame containing the data
+        
+    Returns:
+        Series: Column totals, in column order
+    """
+    numeric_columns = {}
+    duplicated = df.columns.duplicated(keep=False)
+    
+    for col, is_duplicated in zip(df.columns, duplicated):
+        # Dimension columns are never metrics, and ambiguous duplicate names cannot be summed
+        if col.lower() in NON_METRIC_COLUMNS or is_duplicated:
+            continue
+        
+        try:
+            numeric_columns[col] = coerce_numeric(df[col])
+        except Exception as e:
+            logger.warning(f"Could not read column {col} as numbers: {str(e)}")
+    
+    if not numeric_columns:
+        return pd.Series(dtype=float)
+    
+    # Count and total every coerced column in one pass
+    numeric = pd.DataFrame(numeric_columns)
+    mostly_numeric = numeric.notna().sum() > len(df) * 0.5
+    return numeric.loc[:, mostly_numeric].sum()
+
+def coerce_numeric(values):
+    """
+    Convert a column to numbers (unparseable values become NaN), like pd.to_numeric(errors='coerce').
+    
+    Text columns in exports (campaign names, labels, dates) repeat a handful of values,
+    so those are parsed once per distinct value instead of once per row.
+    
+    Args:
+        values: Series to convert
+        
+    Returns:
+        Series: Numeric values
+    """
+    if not pd.api.types.is_object_dtype(values):
+        return pd.to_numeric(values, errors='coerce')
+    
+    codes, uniques = pd.factorize(values)
+    if len(uniques) > len(values) // 2:
+        return pd.to_numeric(values, errors='coerce')
+    
+    numbers = pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce').to_numpy()
+    if (codes < 0).any():
+        # Missing values (code -1) take the NaN appended last, making the column float as pd.to_numeric would
+        numbers = np.append(numbers.astype(float), np.nan)
+    
+    return pd.Series(numbers.take(codes), index=values.index, name=values.name)
+
+def build_component_index(columns):
+    """
+    Find the first column for each component the derived metrics are built from.
+    
+    Args:
+        columns: Metric column names, in column order
+        
+    Returns:
+        dict: Component name ('clicks', 'impressions', 'conversions', 'value', 'cost') to column name
+    """
+    components = {}
+    for col in columns:
+        col_lower = col.lower()
+        for component, (terms, excluded_terms) in METRIC_COMPONENT_TERMS.items():
+            if (component not in components and any(term in col_lower for term in terms)
+                    and not any(term in col_lower for term in excluded_terms)):
+                components[component] = col
+    
+    return components
+
+def get_derived_metric_values(raw_totals, components):
+    """
+    Recalculate rate metrics (CTR, conversion rate, ROAS, ROI) from their component totals.
+    
+    Args:
+        raw_totals: Series of column totals from get_numeric_totals
+        components: Component index from build_component_index
+        
+    Returns:
+        dict: Column name to recalculated value, for the rate columns whose components are present
+    """
+    def total(component):
+        return raw_totals[components[component]] if component in components else None
+    
+    clicks, impressions, conversions = total('clicks'), total('impressions'), total('conversions')
+    value, cost = total('value'), total('cost')
+    
+    derived_values = {}
+    for col in raw_totals.index:
+        metric_lower = col.lower()
+        
+        if 'ctr' in metric_lower or 'click through rate' in metric_lower:
+            if clicks is not None and impressions is not None and impressions > 0:
+                derived_values[col] = (clicks / impressions) * 100
+        elif 'conversion rate' in metric_lower:
+            if conversions is not None and clicks is not None and clicks > 0:
+                derived_values[col] = (conversions / clicks) * 100
+        elif 'roas' in metric_lower:
+            if value is not None and cost is not None and cost > 0:
+                derived_values[col] = value / cost
+        elif 'roi' in metric_lower:
+            if value is not None and cost is not None and cost > 0:
+                derived_values[col] = ((value - cost) / cost) * 100
+    
+    return derived_values
+
 def format_metric_name(column_name):
     """
     Format a column name into a user-friendly metric name.
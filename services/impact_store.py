@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from config import logger, IMPACT_FOLDER, IMPACT_CACHE_SIZE, IMPACT_TTL_SECONDS
+from utils.db_utils import open_sqlite
+
+IMPACT_DB_PATH = os.path.join(IMPACT_FOLDER, 'impact.sqlite')
+IMPACT_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS impact_sessions (
+        id TEXT PRIMARY KEY,
+        date_range TEXT,
+        files TEXT,
+        file_paths TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL
+    )""",
+    # Metrics sit in their own column so a refresh does not read the rest of each forecast
+    """CREATE TABLE IF NOT EXISTS impact_forecasts (
+        session_id TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        forecast_id TEXT NOT NULL,
+        details TEXT NOT NULL,
+        metrics TEXT NOT NULL,
+        PRIMARY KEY (session_id, position)
+    )""",
+)
+
+# A cache hit refreshes the session's last use in SQLite at most this often
+TOUCH_INTERVAL_SECONDS = 60
+
+# Most recently used impact data in this process: session ID -> [impact_data, last touched]
+impact_cache = OrderedDict()
+impact_cache_lock = threading.Lock()
+
+def save_impact_data(impact_data, file_paths):
+    """
+    Store processed impact data server-side.
+    
+    Args:
+        impact_data: Impact data from process_impact_files
+        file_paths: Paths of the uploaded files, removed by delete_impact_data
+        
+    Returns:
+        str: ID of the stored impact session (the only thing kept in the cookie)
+    """
+    session_id = str(uuid.uuid4())
+    now = time.time()
+    
+    rows = []
+    for position, forecast in enumerate(impact_data['forecasts']):
+        details = {key: value for key, value in forecast.items() if key != 'metrics'}
+        rows.append((session_id, position, forecast['id'], json.dumps(details), json.dumps(forecast['metrics'])))
+    
+    with open_sqlite(IMPACT_DB_PATH, IMPACT_SCHEMA) as conn:
+        conn.execute("INSERT INTO impact_sessions (id, date_range, files, file_paths, created_at, last_used) "
+                     "VALUES (?, ?, ?, ?, ?, ?)",
+                     (session_id, json.dumps(impact_data.get('date_range')), json.dumps(impact_data.get('files', [])),
+                      json.dumps(file_paths), now, now))
+        conn.executemany("INSERT INTO impact_forecasts (session_id, position, forecast_id, details, metrics) "
+                         "VALUES (?, ?, ?, ?, ?)", rows)
+    
+    cache_impact_data(session_id, impact_data)
+    return session_id
+
+def load_impact_data(session_id):
+    """
+    Load the full impact data for a session (as rendered by the dashboard).
+    
+    Args:
+        session_id: ID from save_impact_data
+        
+    Returns:
+        dict: Impact data, or None if the session does not exist or has expired
+    """
+    impact_data = get_cached_impact_data(session_id)
+    if impact_data is not None:
+        return impact_data
+    
+    with open_sqlite(IMPACT_DB_PATH, IMPACT_SCHEMA) as conn:
+        session_row = conn.execute("SELECT date_range, files FROM impact_sessions WHERE id = ?",
+                                   (session_id,)).fetchone()
+        if session_row is None:
+            return None
+        
+        forecast_rows = conn.execute("SELECT details, metrics FROM impact_forecasts WHERE session_id = ? "
+                                     "ORDER BY position", (session_id,)).fetchall()
+        conn.execute("UPDATE impact_sessions SET last_used = ? WHERE id = ?", (time.time(), session_id))
+    
+    forecasts = []
+    for row in forecast_rows:
+        forecast = json.loads(row['details'])
+        forecast['metrics'] = json.loads(row['metrics'])
+        forecasts.append(forecast)
+    
+    impact_data = {'forecasts': forecasts, 'files': json.loads(session_row['files'] or '[]')}
+    date_range = json.loads(session_row['date_range'])
+    if date_range is not None:
+        impact_data['date_range'] = date_range
+    
+    cache_impact_data(session_id, impact_data)
+    return impact_data
+
+def load_impact_metrics(session_id):
+    """
+    Load only the per-forecast metrics for a session.
+    
+    Args:
+        session_id: ID from save_impact_data
+        
+    Returns:
+        list: {'id', 'metrics'} dictionaries in upload order, or None if the session does not exist
+    """
+    impact_data = get_cached_impact_data(session_id)
+    if impact_data is not None:
+        return [{'id': forecast['id'], 'metrics': forecast['metrics']} for forecast in impact_data['forecasts']]
+    
+    with open_sqlite(IMPACT_DB_PATH, IMPACT_SCHEMA) as conn:
+        updated = conn.execute("UPDATE impact_sessions SET last_used = ? WHERE id = ?", (time.time(), session_id))
+        if updated.rowcount == 0:
+            return None
+        
+        rows = conn.execute("SELECT forecast_id, metrics FROM impact_forecasts WHERE session_id = ? "
+                            "ORDER BY position", (session_id,)).fetchall()
+    
+    return [{'id': row['forecast_id'], 'metrics': json.loads(row['metrics'])} for row in rows]
+
+def delete_impact_data(session_id):
+    """
+    Delete a session's impact data and its uploaded files.
+    
+    Args:
+        session_id: ID from save_impact_data
+    """
+    with impact_cache_lock:
+        impact_cache.pop(session_id, None)
+    
+    with open_sqlite(IMPACT_DB_PATH, IMPACT_SCHEMA) as conn:
+        row = conn.execute("SELECT file_paths FROM impact_sessions WHERE id = ?", (session_id,)).fetchone()
+        conn.execute("DELETE FROM impact_forecasts WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM impact_sessions WHERE id = ?", (session_id,))
+    
+    if row is not None:
+        remove_files(json.loads(row['file_paths']))
+
+def purge_expired_impact_data(ttl=None, dry_run=False, now=None):
+    """
+    Delete impact sessions (and their uploaded files) not used within the TTL.
+    
+    Args:
+        ttl: Seconds a session is kept after its last use (default: IMPACT_TTL_SECONDS)
+        dry_run: Only count the sessions that would be deleted
+        now: Current time as a Unix timestamp (default: time.time())
+        
+    Returns:
+        int: Number of expired sessions
+    """
+    ttl = IMPACT_TTL_SECONDS if ttl is None else ttl
+    now = now if now is not None else time.time()
+    
+    with open_sqlite(IMPACT_DB_PATH, IMPACT_SCHEMA) as conn:
+        rows = conn.execute("SELECT id, file_paths FROM impact_sessions WHERE last_used < ?",
+                            (now - ttl,)).fetchall()
+        if dry_run:
+            return len(rows)
+        
+        for row in rows:
+            conn.execute("DELETE FROM impact_forecasts WHERE session_id = ?", (row['id'],))
+            conn.execute("DELETE FROM impact_sessions WHERE id = ?", (row['id'],))
+    
+    with impact_cache_lock:
+        for row in rows:
+            impact_cache.pop(row['id'], None)
+    
+    for row in rows:
+        remove_files(json.loads(row['file_paths']))
+    
+    if rows:
+        logger.info(f"Purged {len(rows)} expired impact sessions")
+    return len(rows)
+
+def cache_impact_data(session_id, impact_data):
+    """Put impact data at the front of the in-memory LRU, evicting the least recently used sessions."""
+    if IMPACT_CACHE_SIZE <= 0:
+        return
+    
+    with impact_cache_lock:
+        impact_cache[session_id] = [impact_data, time.time()]
+        impact_cache.move_to_end(session_id)
+        while len(impact_cache) > IMPACT_CACHE_SIZE:
+            impact_cache.popitem(last=False)
+
+def get_cached_impact_data(session_id):
+    """
+    Get impact data from the in-memory LRU.
+    
+    Every TOUCH_INTERVAL_SECONDS a hit is also recorded in SQLite, which keeps the session
+    from expiring and drops entries that another process has deleted in the meantime.
+    
+    Args:
+        session_id: ID from save_impact_data
+        
+    Returns:
+        dict: Impact data, or None on a cache miss
+    """
+    now = time.time()
+    with impact_cache_lock:
+        entry = impact_cache.get(session_id)
+        if entry is None:
+            return None
+        impact_cache.move_to_end(session_id)
+        impact_data, touched_at = entry
+        if now - touched_at < TOUCH_INTERVAL_SECONDS:
+            return impact_data
+        entry[1] = now
+    
+    with open_sqlite(IMPACT_DB_PATH, IMPACT_SCHEMA) as conn:
+        updated = conn.execute("UPDATE impact_sessions SET last_used = ? WHERE id = ?", (now, session_id))
+    
+    if updated.rowcount == 0:
+        with impact_cache_lock:
+            impact_cache.pop(session_id, None)
+        return None
+    
+    return impact_data
+
+def remove_files(file_paths):
+    """Remove uploaded files that still exist."""
+    for file_path in file_paths:
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
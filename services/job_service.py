@@ -0,0 +1,346 @@
+import os
+import json
+import time
+import uuid
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from config import (logger, JOB_FOLDER, JOB_MAX_WORKERS, JOB_HEARTBEAT_INTERVAL, JOB_STALE_SECONDS,
+                    FORECAST_AGGREGATION, FORECAST_ENGINE, FORECAST_INTERVALS, CAMPAIGN_ENGINE)
+from utils.db_utils import open_sqlite
+from services.file_service import prepare_data_for_forecast, remove_uploaded_file
+from services.aggregation_service import aggregate_for_forecast, get_forecast_periods
+from services.forecast_service import generate_forecast
+from services.campaign_service import generate_campaign_forecasts
+from utils.export_utils import save_forecast_data
+
+JOB_DB_PATH = os.path.join(JOB_FOLDER, 'jobs.sqlite')
+JOB_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        progress TEXT NOT NULL,
+        forecast_id TEXT,
+        error TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )""",
+    # Upload each job reads, so the artifact sweeper leaves it alone until the job ends
+    """CREATE TABLE IF NOT EXISTS job_files (
+        job_id TEXT PRIMARY KEY,
+        file_path TEXT NOT NULL
+    )""",
+)
+
+# Background executor for forecast jobs (one per app process, job state lives in SQLite)
+job_executor = ThreadPoolExecutor(max_workers=JOB_MAX_WORKERS, thread_name_prefix='forecast-job')
+
+# Job states that still expect a result, and the ones that are done
+ACTIVE_STATUSES = ('queued', 'running')
+FINISHED_STATUSES = ('finished', 'failed')
+INTERRUPTED_ERROR = 'The forecast was interrupted by a server restart. Please upload the file again.'
+
+# Jobs queued or running in this process, kept alive by the heartbeat thread
+active_jobs = set()
+active_jobs_lock = threading.Lock()
+heartbeat_thread = None
+
+def submit_forecast_job(file_path, file_format, date_col, date_format, selected_metrics, forecast_period,
+                        budget_change_ratio, forecast_metadata, aggregation=FORECAST_AGGREGATION,
+                        engine=FORECAST_ENGINE, intervals=FORECAST_INTERVALS, by_campaign=False,
+                        campaign_engine=CAMPAIGN_ENGINE):
+    """
+    Queue a forecast for background processing.
+    
+    Args:
+        file_path: Path to the uploaded CSV file (removed once the job ends)
+        file_format: Dictionary with file format information
+        date_col: Name of the date column
+        date_format: Format string for date parsing
+        selected_metrics: List of metrics to forecast
+        forecast_period: Number of days to forecast
+        budget_change_ratio: Ratio of new budget to original budget
+        forecast_metadata: Keyword arguments for save_forecast_data (forecast_title, platform_display,
+                           estimated_budget, currency, date_range)
+        aggregation: Period rows are collapsed to before fitting ('D' daily, 'W' weekly)
+        engine: Name of the forecasting engine ('prophet' or 'least_squares')
+        intervals: Interval strategy ('full', 'reduced', 'horizon' or 'none')
+        by_campaign: Also forecast every campaign, reconciled to the account forecast
+        campaign_engine: Name of the forecasting engine for campaigns with enough history
+        
+    Returns:
+        str: ID of the queued job
+    """
+    job_id = create_job(selected_metrics, file_path)
+    
+    with active_jobs_lock:
+        active_jobs.add(job_id)
+    start_job_heartbeat()
+    
+    job_executor.submit(run_forecast_job, job_id, file_path, file_format, date_col, date_format,
+                        selected_metrics, forecast_period, budget_change_ratio, forecast_metadata,
+                        aggregation, engine, intervals, by_campaign, campaign_engine)
+    
+    logger.info(f"Queued forecast job {job_id} for {len(selected_metrics)} metrics")
+    return job_id
+
+def run_forecast_job(job_id, file_path, file_format, date_col, date_format, selected_metrics, forecast_period,
+                     budget_change_ratio, forecast_metadata, aggregation=FORECAST_AGGREGATION,
+                     engine=FORECAST_ENGINE, intervals=FORECAST_INTERVALS, by_campaign=False,
+                     campaign_engine=CAMPAIGN_ENGINE):
+    """Run the forecast pipeline for a queued job and record its outcome."""
+    update_job(job_id, status='running')
+    
+    try:
+        # Prepare data for forecasting
+        df = prepare_data_for_forecast(file_path, file_format, date_col, date_format, selected_metrics)
+        
+        # Collapse per-campaign rows to one observation per period
+        df, aggregation_report = aggregate_for_forecast(df, date_col, selected_metrics, aggregation)
+        
+        # Generate forecasts with budget change ratio, recording each metric as it finishes
+        results = generate_forecast(
+            df,
+            date_col,
+            selected_metrics,
+            get_forecast_periods(forecast_period, aggregation, aggregation_report['days_after_last_period']),
+            budget_change_ratio=budget_change_ratio,
+            progress_callback=lambda metric, succeeded: record_metric_progress(job_id, metric, succeeded),
+            frequency=aggregation,
+            engine=engine,
+            intervals=intervals
+        )
+        
+        # Break the account forecast down by campaign (read from the file, which still has the campaign rows)
+        campaigns = None
+        if by_campaign and results:
+            campaigns = generate_campaign_forecasts(file_path, file_format, date_col, date_format, results,
+                                                    frequency=aggregation, engine=campaign_engine)
+        
+        forecast_id = save_forecast_data(results, budget_change_ratio=budget_change_ratio,
+                                         aggregation=aggregation_report, engine=engine, intervals=intervals,
+                                         campaigns=campaigns, **forecast_metadata)
+        
+        update_job(job_id, status='finished', forecast_id=forecast_id)
+        logger.info(f"Forecast job {job_id} finished with forecast {forecast_id}")
+    except Exception as e:
+        logger.error(f"Forecast job {job_id} failed: {e}")
+        update_job(job_id, status='failed', error=str(e))
+    finally:
+        # Clean up the file
+        remove_uploaded_file(file_path)
+        
+        with active_jobs_lock:
+            active_jobs.discard(job_id)
+
+def create_job(metrics, file_path=None):
+    """
+    Create a queued job with every metric pending.
+    
+    Args:
+        metrics: List of metrics the job will forecast
+        file_path: Path to the uploaded file the job reads (optional)
+        
+    Returns:
+        str: New job ID
+    """
+    job_id = str(uuid.uuid4())
+    now = datetime.now().isoformat()
+    progress = {metric: 'pending' for metric in metrics}
+    
+    with open_sqlite(JOB_DB_PATH, JOB_SCHEMA) as conn:
+        conn.execute("INSERT INTO jobs (id, status, progress, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                     (job_id, 'queued', json.dumps(progress), now, now))
+        if file_path is not None:
+            conn.execute("INSERT INTO job_files (job_id, file_path) VALUES (?, ?)", (job_id, file_path))
+    
+    return job_id
+
+def update_job(job_id, **fields):
+    """
+    Update job columns (status, forecast_id, error).
+    
+    Args:
+        job_id: ID of the job
+        **fields: Column values to set
+    """
+    fields['updated_at'] = datetime.now().isoformat()
+    assignments = ', '.join(f"{name} = ?" for name in fields)
+    
+    with open_sqlite(JOB_DB_PATH, JOB_SCHEMA) as conn:
+        conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+def record_metric_progress(job_id, metric, succeeded):
+    """
+    Mark a single metric of a job as done or failed.
+    
+    Args:
+        job_id: ID of the job
+        metric: Name of the metric that finished
+        succeeded: Whether a forecast was produced for the metric
+    """
+    with open_sqlite(JOB_DB_PATH, JOB_SCHEMA) as conn:
+        # Take the write lock before reading so concurrent updates are not lost
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT progress FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return
+        
+        progress = json.loads(row['progress'])
+        progress[metric] = 'done' if succeeded else 'failed'
+        conn.execute("UPDATE jobs SET progress = ?, updated_at = ? WHERE id = ?",
+                     (json.dumps(progress), datetime.now().isoformat(), job_id))
+
+def start_job_heartbeat(interval=None):
+    """
+    Start the thread that marks this process's queued and running jobs alive (once per process).
+    
+    Args:
+        interval: Seconds between heartbeats (default: JOB_HEARTBEAT_INTERVAL)
+    """
+    global heartbeat_thread
+    
+    interval = JOB_HEARTBEAT_INTERVAL if interval is None else interval
+    
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                touch_active_jobs()
+            except Exception as e:
+                logger.error(f"Job heartbeat failed: {e}")
+    
+    with active_jobs_lock:
+        if heartbeat_thread is not None and heartbeat_thread.is_alive():
+            return
+        heartbeat_thread = threading.Thread(target=run, name='job-heartbeat', daemon=True)
+        heartbeat_thread.start()
+
+def touch_active_jobs():
+    """Refresh updated_at of the jobs this process is still queuing or running."""
+    with active_jobs_lock:
+        job_ids = list(active_jobs)
+    
+    if not job_ids:
+        return
+    
+    placeholders = ', '.join('?' for _ in job_ids)
+    with open_sqlite(JOB_DB_PATH, JOB_SCHEMA) as conn:
+        conn.execute(f"UPDATE jobs SET updated_at = ? WHERE status IN {ACTIVE_STATUSES} AND id IN ({placeholders})",
+                     (datetime.now().isoformat(), *job_ids))
+
+def fail_stale_jobs(job_id=None, stale_seconds=None):
+    """
+    Mark queued and running jobs that stopped sending heartbeats as failed.
+    
+    A job's thread lives in the app process that queued it, so when that process is
+    restarted the job can never finish; without this its status page would poll forever.
+    
+    Args:
+        job_id: Only check this job (default: every job)
+        stale_seconds: Seconds without a heartbeat before a job counts as lost
+                       (default: JOB_STALE_SECONDS)
+        
+    Returns:
+        int: Number of jobs marked as failed
+    """
+    if not os.path.exists(JOB_DB_PATH):
+        return 0
+    
+    stale_seconds = JOB_STALE_SECONDS if stale_seconds is None else stale_seconds
+    now = datetime.now()
+    cutoff = (now - timedelta(seconds=stale_seconds)).isoformat()
+    
+    query = f"UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE status IN {ACTIVE_STATUSES} AND updated_at < ?"
+    params = [INTERRUPTED_ERROR, now.isoformat(), cutoff]
+    if job_id is not None:
+        query += " AND id = ?"
+        params.append(job_id)
+    
+    with open_sqlite(JOB_DB_PATH, JOB_SCHEMA) as conn:
+        failed = conn.execute(query, params).rowcount
+    
+    if failed:
+        logger.warning(f"Marked {failed} interrupted forecast jobs as failed")
+    return failed
+
+def get_active_job_files():
+    """
+    Get the uploaded files that queued and running jobs still need.
+    
+    Returns:
+        set: Absolute paths of the uploads
+    """
+    if not os.path.exists(JOB_DB_PATH):
+        return set()
+    
+    with open_sqlite(JOB_DB_PATH, JOB_SCHEMA) as conn:
+        rows = conn.execute(f"SELECT job_files.file_path FROM job_files JOIN jobs ON jobs.id = job_files.job_id "
+                            f"WHERE jobs.status IN {ACTIVE_STATUSES}").fetchall()
+    
+    return {os.path.abspath(row['file_path']) for row in rows}
+
+def prune_finished_jobs(max_age_seconds, dry_run=False, now=None):
+    """
+    Delete finished and failed jobs not updated for max_age_seconds.
+    
+    Args:
+        max_age_seconds: Age after which a finished job's row is deleted
+        dry_run: Only count the jobs that would be deleted
+        now: Current time as a Unix timestamp (default: time.time())
+        
+    Returns:
+        int: Number of jobs deleted (or that would be)
+    """
+    if not os.path.exists(JOB_DB_PATH):
+        return 0
+    
+    now = now if now is not None else time.time()
+    cutoff = datetime.fromtimestamp(now - max_age_seconds).isoformat()
+    condition = f"status IN {FINISHED_STATUSES} AND updated_at < ?"
+    
+    with open_sqlite(JOB_DB_PATH, JOB_SCHEMA) as conn:
+        if dry_run:
+            return conn.execute(f"SELECT COUNT(*) FROM jobs WHERE {condition}", (cutoff,)).fetchone()[0]
+        
+        conn.execute(f"DELETE FROM job_files WHERE job_id IN (SELECT id FROM jobs WHERE {condition})", (cutoff,))
+        pruned = conn.execute(f"DELETE FROM jobs WHERE {condition}", (cutoff,)).rowcount
+    
+    if pruned:
+        logger.info(f"Pruned {pruned} finished forecast jobs")
+    return pruned
+
+def get_job(job_id):
+    """
+    Get the current state of a job.
+    
+    Args:
+        job_id: ID of the job
+        
+    Returns:
+        dict: Job state with per-metric progress, or None if the job does not exist
+    """
+    with open_sqlite(JOB_DB_PATH, JOB_SCHEMA) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    
+    if row is None:
+        return None
+    
+    # The process running this job may have been restarted since it last checked in
+    if row['status'] in ACTIVE_STATUSES and fail_stale_jobs(job_id):
+        return get_job(job_id)
+    
+    progress = json.loads(row['progress'])
+    completed = sum(1 for state in progress.values() if state != 'pending')
+    
+    return {
+        'id': row['id'],
+        'status': row['status'],
+        'metrics': progress,
+        'completed': completed,
+        'total': len(progress),
+        'forecast_id': row['forecast_id'],
+        'error': row['error'],
+        'created_at': row['created_at'],
+        'updated_at': row['updated_at']
+    }
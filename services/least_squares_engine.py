@@ -0,0 +1,210 @@
+import time
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+# Fourier orders, prior scales and interval width follow Prophet's defaults,
+# so both engines regularise the budget coefficient the same way
+SEASONALITIES = [
+    # (name, period in days, Fourier order, minimum history in days)
+    ('weekly', 7.0, 3, 14),
+    ('yearly', 365.25, 10, 730),
+]
+TREND_PRIOR_SCALE = 5.0
+SEASONALITY_PRIOR_SCALE = 10.0
+REGRESSOR_PRIOR_SCALE = 10.0
+INTERVAL_WIDTH = 0.8
+
+def fit_model(prophet_df, cache=True):
+    """
+    Fit a linear trend + Fourier seasonality + budget regressor model by regularised least squares.
+    
+    The priors Prophet places on its trend, seasonality and regressor coefficients
+    become ridge penalties, so the fit is a single linear solve instead of a Stan
+    optimisation. Seasonalities are switched on the same way Prophet does it:
+    weekly with at least two weeks of sub-weekly data, yearly with two years.
+    
+    Args:
+        prophet_df: DataFrame with 'ds', 'y' and 'budget_normalized' columns
+        cache: Accepted for the engine interface; these models are never cached
+        
+    Returns:
+        dict: Fitted model (coefficients, scaling and posterior covariance)
+    """
+    start = time.perf_counter()
+    ds = prophet_df['ds']
+    y = prophet_df['y'].to_numpy(dtype=float)
+    
+    span_days = (ds.max() - ds.min()) / pd.Timedelta(days=1)
+    spacing_days = ds.sort_values().diff().min() / pd.Timedelta(days=1) if len(ds) > 1 else 0.0
+    
+    budget = prophet_df['budget_normalized'].to_numpy(dtype=float)
+    budget_mu, budget_std = get_budget_scaling(budget)
+    
+    model = {
+        'start': ds.min(),
+        'end': ds.max(),
+        't_scale': span_days if span_days > 0 else 1.0,
+        'y_scale': float(np.abs(y).max()) or 1.0,
+        'seasonalities': [(name, period, order) for name, period, order, min_days in SEASONALITIES
+                          if span_days >= min_days and spacing_days < period],
+        'budget_mu': budget_mu,
+        'budget_std': budget_std,
+        # A budget the history never varies has no data behind its coefficient, only its prior
+        'budget_fixed': float(budget[0]) if len(budget) and np.ptp(budget) == 0 else None
+    }
+    
+    X, prior_scales = build_design_matrix(model, ds, prophet_df['budget_normalized'])
+    y_scaled = y / model['y_scale']
+    degrees_of_freedom = max(len(y) - X.shape[1], 1)
+    
+    # Noise level from an unregularised fit weights the priors against the data, like Prophet's MAP fit
+    beta, _, _, _ = np.linalg.lstsq(X, y_scaled, rcond=None)
+    sigma2 = max(np.sum((y_scaled - X @ beta) ** 2) / degrees_of_freedom, 1e-8)
+    
+    precision = X.T @ X + sigma2 * np.diag(1.0 / prior_scales ** 2)
+    beta = np.linalg.solve(precision, X.T @ y_scaled)
+    
+    model['beta'] = beta
+    model['sigma2'] = max(np.sum((y_scaled - X @ beta) ** 2) / degrees_of_freedom, 1e-8)
+    model['covariance'] = np.linalg.inv(precision)
+    model['fit_seconds'] = time.perf_counter() - start
+    
+    return model
+
+def predict(model, future, intervals='full'):
+    """
+    Predict a fitted model over the given dates and budgets.
+    
+    Intervals combine the residual noise with the uncertainty of the fitted
+    coefficients, so they widen as the trend is extrapolated. They are exact
+    rather than simulated, so 'reduced' is the same as 'full'; 'horizon' and
+    'none' leave NaN bounds where intervals are skipped. When the history never
+    varies the budget, its coefficient is known only through the priors, so its
+    uncertainty is taken at the historical budget whatever the ratio, the way
+    Prophet's intervals ignore regressor uncertainty.
+    
+    Args:
+        model: Fitted model from fit_model
+        future: DataFrame with 'ds' and 'budget_normalized' columns
+        intervals: 'full', 'reduced', 'horizon' (only dates after the training history) or 'none'
+        
+    Returns:
+        DataFrame: ds, yhat, yhat_lower, yhat_upper and the trend, seasonality and
+                   budget_normalized components, in the same layout Prophet uses
+    """
+    X, _ = build_design_matrix(model, future['ds'], future['budget_normalized'])
+    beta = model['beta']
+    y_scale = model['y_scale']
+    
+    yhat = X @ beta
+    
+    # Rows that get intervals
+    if intervals == 'none':
+        with_intervals = np.zeros(len(future), dtype=bool)
+    elif intervals == 'horizon':
+        with_intervals = (future['ds'] > model['end']).values
+    else:
+        with_intervals = np.ones(len(future), dtype=bool)
+    
+    X_intervals = X[with_intervals]
+    if model['budget_fixed'] is not None:
+        X_intervals = X_intervals.copy()
+        X_intervals[:, -1] = (model['budget_fixed'] - model['budget_mu']) / model['budget_std']
+    half_width = np.full(len(future), np.nan)
+    variance = model['sigma2'] * (1.0 + np.einsum('ij,jk,ik->i', X_intervals, model['covariance'], X_intervals))
+    half_width[with_intervals] = norm.ppf(0.5 + INTERVAL_WIDTH / 2) * np.sqrt(variance)
+    
+    forecast = pd.DataFrame({'ds': future['ds'].values})
+    forecast['trend'] = X[:, :2] @ beta[:2] * y_scale
+    
+    column = 2
+    for name, _, order in model['seasonalities']:
+        block = slice(column, column + 2 * order)
+        forecast[name] = X[:, block] @ beta[block] * y_scale
+        column += 2 * order
+    
+    forecast['budget_normalized'] = X[:, -1] * beta[-1] * y_scale
+    forecast['yhat'] = yhat * y_scale
+    forecast['yhat_lower'] = (yhat - half_width) * y_scale
+    forecast['yhat_upper'] = (yhat + half_width) * y_scale
+    
+    return forecast
+
+def get_fit_report(model):
+    """
+    Describe how a model from fit_model was obtained.
+    
+    The linear solve is cheap enough that models are neither cached nor warm-started.
+    
+    Args:
+        model: Fitted model from fit_model
+        
+    Returns:
+        dict: source, seconds spent fitting, cold_seconds and saved_seconds (always 0)
+    """
+    return {'source': 'fit', 'seconds': model['fit_seconds'], 'cold_seconds': model['fit_seconds'],
+            'saved_seconds': 0.0}
+
+def get_budget_coefficient(model):
+    """
+    Get the fitted budget_normalized coefficient on the scale of the metric.
+    
+    Args:
+        model: Fitted model from fit_model
+        
+    Returns:
+        float: Change in yhat per unit change in budget_normalized
+    """
+    return float(model['beta'][-1] * model['y_scale'] / model['budget_std'])
+
+def get_budget_scaling(budget):
+    """
+    Get the budget regressor's standardisation the way Prophet's 'auto' setting does.
+    
+    A budget that never changes (the baseline of 1.0 every history row has) or a
+    0/1 flag is left as is. A constant budget is then collinear with the intercept,
+    and the trend and regressor priors split the level between them, as in Prophet.
+    
+    Args:
+        budget: Array of historical budget_normalized values
+        
+    Returns:
+        tuple: (mean, standard deviation) the budget is standardised with
+    """
+    values = np.unique(budget)
+    if len(values) < 2 or set(values) == {0.0, 1.0}:
+        return 0.0, 1.0
+    
+    std = float(np.std(budget, ddof=1))
+    return float(np.mean(budget)), std if std > 0 else 1.0
+
+def build_design_matrix(model, ds, budget):
+    """
+    Build the regression inputs: intercept, linear trend, Fourier terms and the budget regressor.
+    
+    Args:
+        model: Model dict with start, t_scale, seasonalities and the budget scaling
+        ds: Series of dates
+        budget: Series of budget_normalized values
+        
+    Returns:
+        tuple: (design matrix, prior scale per column)
+    """
+    t = ((ds - model['start']) / pd.Timedelta(days=1)).to_numpy(dtype=float)
+    columns = [np.ones_like(t), t / model['t_scale']]
+    prior_scales = [TREND_PRIOR_SCALE, TREND_PRIOR_SCALE]
+    
+    # Fourier terms use days since the epoch, as Prophet does
+    days = (ds - pd.Timestamp(0)) / pd.Timedelta(days=1)
+    days = days.to_numpy(dtype=float)
+    for _, period, order in model['seasonalities']:
+        for k in range(1, order + 1):
+            angle = 2.0 * np.pi * k * days / period
+            columns.extend([np.sin(angle), np.cos(angle)])
+        prior_scales.extend([SEASONALITY_PRIOR_SCALE] * 2 * order)
+    
+    columns.append((np.asarray(budget, dtype=float) - model['budget_mu']) / model['budget_std'])
+    prior_scales.append(REGRESSOR_PRIOR_SCALE)
+    
+    return np.column_stack(columns), np.asarray(prior_scales)
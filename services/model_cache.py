@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import hashlib
+import prophet
+import pandas as pd
+from prophet.serialize import model_to_json, model_from_json
+from config import logger, MODEL_CACHE_ENABLED, MODEL_CACHE_FOLDER, MODEL_CACHE_MAX_BYTES
+from utils.db_utils import open_sqlite
+
+INDEX_FILENAME = 'index.sqlite'
+CACHE_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS models (key TEXT PRIMARY KEY, size INTEGER, last_used REAL)",
+    "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)",
+    # Training series of cached models, so a longer upload of the same series can find its predecessor
+    """CREATE TABLE IF NOT EXISTS fitted_series (
+        key TEXT PRIMARY KEY,
+        first_ds TEXT NOT NULL,
+        rows INTEGER NOT NULL,
+        fit_seconds REAL NOT NULL,
+        cold_seconds REAL NOT NULL
+    )""",
+)
+
+# Most candidate predecessors checked (longest first) when looking for an extended series
+MAX_PREVIOUS_FIT_CANDIDATES = 5
+
+def get_model_cache_key(prophet_df, prophet_config):
+    """
+    Build a cache key from the training series and the Prophet configuration.
+    
+    Args:
+        prophet_df: DataFrame with 'ds', 'y' and regressor columns used for fitting
+        prophet_config: Dictionary describing how the model is built (must be JSON serializable)
+        
+    Returns:
+        str: Hex digest identifying the fitted model
+    """
+    digest = hashlib.sha256()
+    
+    # Hash the raw column buffers so the key does not depend on string formatting
+    digest.update(pd.to_datetime(prophet_df['ds']).values.astype('datetime64[ns]').tobytes())
+    for col in sorted(c for c in prophet_df.columns if c != 'ds'):
+        digest.update(col.encode())
+        digest.update(prophet_df[col].to_numpy(dtype='float64').tobytes())
+    
+    # Models fitted by another Prophet version may not deserialize cleanly
+    digest.update(json.dumps(prophet_config, sort_keys=True).encode())
+    digest.update(prophet.__version__.encode())
+    
+    return digest.hexdigest()
+
+def load_cached_model(cache_key):
+    """
+    Load a fitted model from the cache.
+    
+    Args:
+        cache_key: Key from get_model_cache_key
+        
+    Returns:
+        Prophet: Fitted model, or None on a cache miss
+    """
+    if not MODEL_CACHE_ENABLED:
+        return None
+    
+    model_path = os.path.join(MODEL_CACHE_FOLDER, f"{cache_key}.json")
+    
+    try:
+        with open(model_path, 'r') as f:
+            model = model_from_json(f.read())
+    except FileNotFoundError:
+        model = None
+    except Exception as e:
+        # A corrupt entry is dropped and treated as a miss
+        logger.warning(f"Could not load cached model {cache_key}: {e}")
+        remove_cache_entry(cache_key)
+        model = None
+    
+    with open_cache_index() as conn:
+        if model is not None:
+            conn.execute("UPDATE models SET last_used = ? WHERE key = ?", (time.time(), cache_key))
+            increment_counter(conn, 'hits')
+        else:
+            increment_counter(conn, 'misses')
+    
+    logger.info(f"Model cache {'hit' if model is not None else 'miss'} for {cache_key[:12]}")
+    return model
+
+def save_cached_model(cache_key, model):
+    """
+    Store a fitted model in the cache and evict least recently used entries over the size cap.
+    
+    Args:
+        cache_key: Key from get_model_cache_key
+        model: Fitted Prophet model
+    """
+    if not MODEL_CACHE_ENABLED:
+        return
+    
+    model_path = os.path.join(MODEL_CACHE_FOLDER, f"{cache_key}.json")
+    temp_path = f"{model_path}.{os.getpid()}.tmp"
+    
+    try:
+        # Write to a temp file and rename so readers never see a partial model
+        with open(temp_path, 'w') as f:
+            f.write(model_to_json(model))
+        os.replace(temp_path, model_path)
+        size = os.path.getsize(model_path)
+        
+        with open_cache_index() as conn:
+            conn.execute("INSERT OR REPLACE INTO models (key, size, last_used) VALUES (?, ?, ?)",
+                         (cache_key, size, time.time()))
+            evict_models(conn, MODEL_CACHE_MAX_BYTES)
+    except Exception as e:
+        logger.warning(f"Could not cache model {cache_key}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def find_previous_fit(prophet_df, prophet_config):
+    """
+    Find the cached model of a series this one extends.
+    
+    A candidate is a cached fit that started on the same date with fewer rows; it
+    matches when those first rows of prophet_df hash to its cache key, i.e. the new
+    upload only appends observations to the series the model was fitted on.
+    
+    Args:
+        prophet_df: DataFrame with 'ds', 'y' and regressor columns, in upload order
+        prophet_config: Dictionary describing how the model is built
+        
+    Returns:
+        tuple: (model, cold_seconds) for the longest matching fit, where cold_seconds is how
+               long fitting its series from scratch took, or None if no cached fit matches
+    """
+    if not MODEL_CACHE_ENABLED or prophet_df.empty:
+        return None
+    
+    first_ds = pd.Timestamp(prophet_df['ds'].iloc[0]).isoformat()
+    with open_cache_index() as conn:
+        candidates = conn.execute("SELECT key, rows, cold_seconds FROM fitted_series "
+                                  "WHERE first_ds = ? AND rows < ? ORDER BY rows DESC LIMIT ?",
+                                  (first_ds, len(prophet_df), MAX_PREVIOUS_FIT_CANDIDATES)).fetchall()
+    
+    for candidate in candidates:
+        if get_model_cache_key(prophet_df.iloc[:candidate['rows']], prophet_config) != candidate['key']:
+            continue
+        
+        model_path = os.path.join(MODEL_CACHE_FOLDER, f"{candidate['key']}.json")
+        try:
+            with open(model_path, 'r') as f:
+                model = model_from_json(f.read())
+        except Exception as e:
+            logger.warning(f"Could not load previous model {candidate['key']}: {e}")
+            continue
+        
+        logger.info(f"Series extends cached fit {candidate['key'][:12]} "
+                    f"({candidate['rows']} of {len(prophet_df)} rows)")
+        return model, candidate['cold_seconds']
+    
+    return None
+
+def record_fit(cache_key, prophet_df, fit_seconds, cold_seconds):
+    """
+    Record the training series and fit time of a cached model.
+    
+    Args:
+        cache_key: Key from get_model_cache_key
+        prophet_df: DataFrame the model was fitted on
+        fit_seconds: How long the fit took
+        cold_seconds: How long a fit from scratch took (or is estimated to take)
+    """
+    if not MODEL_CACHE_ENABLED or prophet_df.empty:
+        return
+    
+    first_ds = pd.Timestamp(prophet_df['ds'].iloc[0]).isoformat()
+    with open_cache_index() as conn:
+        # Only models that made it into the cache can be found again
+        if conn.execute("SELECT 1 FROM models WHERE key = ?", (cache_key,)).fetchone() is None:
+            return
+        conn.execute("INSERT OR REPLACE INTO fitted_series (key, first_ds, rows, fit_seconds, cold_seconds) "
+                     "VALUES (?, ?, ?, ?, ?)", (cache_key, first_ds, len(prophet_df), fit_seconds, cold_seconds))
+
+def evict_models(conn, max_bytes):
+    """
+    Delete least recently used models until the cache fits in max_bytes.
+    
+    Args:
+        conn: Open cache index connection
+        max_bytes: Maximum total size of cached models
+    """
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM models").fetchone()[0]
+    if total <= max_bytes:
+        return
+    
+    for cache_key, size in conn.execute("SELECT key, size FROM models ORDER BY last_used").fetchall():
+        if total <= max_bytes:
+            break
+        
+        model_path = os.path.join(MODEL_CACHE_FOLDER, f"{cache_key}.json")
+        if os.path.exists(model_path):
+            os.remove(model_path)
+        conn.execute("DELETE FROM models WHERE key = ?", (cache_key,))
+        conn.execute("DELETE FROM fitted_series WHERE key = ?", (cache_key,))
+        increment_counter(conn, 'evictions')
+        total -= size
+        logger.info(f"Evicted cached model {cache_key[:12]} ({size} bytes)")
+
+def remove_cache_entry(cache_key):
+    """Remove a single model from the cache."""
+    model_path = os.path.join(MODEL_CACHE_FOLDER, f"{cache_key}.json")
+    if os.path.exists(model_path):
+        os.remove(model_path)
+    
+    with open_cache_index() as conn:
+        conn.execute("DELETE FROM models WHERE key = ?", (cache_key,))
+        conn.execute("DELETE FROM fitted_series WHERE key = ?", (cache_key,))
+
+def get_model_cache_stats():
+    """
+    Get model cache counters and current usage.
+    
+    Returns:
+        dict: hits, misses, evictions, hit_rate, entries, bytes and max_bytes
+    """
+    with open_cache_index() as conn:
+        counters = {row['name']: row['value'] for row in conn.execute("SELECT name, value FROM counters")}
+        entries, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM models").fetchone()
+    
+    hits = counters.get('hits', 0)
+    misses = counters.get('misses', 0)
+    
+    return {
+        'enabled': MODEL_CACHE_ENABLED,
+        'hits': hits,
+        'misses': misses,
+        'evictions': counters.get('evictions', 0),
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        'entries': entries,
+        'bytes': total_bytes,
+        'max_bytes': MODEL_CACHE_MAX_BYTES
+    }
+
+def increment_counter(conn, name):
+    """Increment a named counter in the cache index."""
+    conn.execute("INSERT INTO counters (name, value) VALUES (?, 1) "
+                 "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+def open_cache_index():
+    """
+    Open the SQLite index shared by all workers using the cache.
+    
+    Returns:
+        Context manager yielding a sqlite3.Connection inside a transaction
+    """
+    return open_sqlite(os.path.join(MODEL_CACHE_FOLDER, INDEX_FILENAME), CACHE_SCHEMA)
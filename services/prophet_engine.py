@@ -0,0 +1,193 @@
+import time
+import threading
+import numpy as np
+import pandas as pd
+from prophet import Prophet
+from prophet.utilities import regressor_coefficients
+from config import INTERVAL_REDUCED_SAMPLES
+from services.model_cache import (get_model_cache_key, load_cached_model, save_cached_model, find_previous_fit,
+                                  record_fit)
+
+# Seed for the uncertainty interval simulation, so identical inputs give identical forecasts
+UNCERTAINTY_SEED = 0
+
+# Prophet samples from the process-wide NumPy random state, so threads (forecast jobs fitting
+# serially) take turns simulating intervals while the seed is in effect
+uncertainty_lock = threading.Lock()
+
+# How every metric model is built; part of the model cache key
+PROPHET_CONFIG = {
+    'params': {},
+    'regressors': ['budget_normalized']
+}
+
+def fit_model(prophet_df, cache=True):
+    """
+    Fit a Prophet model with the budget regressor for a single metric.
+    Models are cached by training data and config, so re-runs that only change
+    the budget or forecast period skip fitting entirely. An upload that extends
+    a cached series (same first rows, new rows appended) is warm-started from
+    the earlier model's parameters. How the model was obtained is kept for
+    get_fit_report.
+    
+    Args:
+        prophet_df: DataFrame with 'ds', 'y' and 'budget_normalized' columns
+        cache: Use the model cache and warm starts; series fitted in bulk (campaigns) pass
+               False so they neither evict account models nor fill the warm-start index
+        
+    Returns:
+        Prophet: Fitted model
+    """
+    cache_key = get_model_cache_key(prophet_df, PROPHET_CONFIG) if cache else None
+    model = load_cached_model(cache_key) if cache else None
+    if model is not None:
+        model.fit_report = {'source': 'cache', 'seconds': 0.0, 'cold_seconds': None, 'saved_seconds': None}
+        return model
+    
+    # Create and fit model
+    model = Prophet(**PROPHET_CONFIG['params'])
+    
+    # Add budget as a regressor
+    for regressor in PROPHET_CONFIG['regressors']:
+        model.add_regressor(regressor)
+    
+    previous_fit = find_previous_fit(prophet_df, PROPHET_CONFIG) if cache else None
+    
+    start = time.perf_counter()
+    if previous_fit is not None:
+        previous_model, cold_seconds = previous_fit
+        model.fit(prophet_df, init=get_warm_start_params(previous_model, prophet_df))
+    else:
+        model.fit(prophet_df)
+    seconds = time.perf_counter() - start
+    
+    if previous_fit is not None:
+        # A warm fit's saving is measured against the cold fit of the series it extends
+        model.fit_report = {'source': 'warm_start', 'seconds': seconds, 'cold_seconds': cold_seconds,
+                            'saved_seconds': cold_seconds - seconds}
+    else:
+        cold_seconds = seconds
+        model.fit_report = {'source': 'fit', 'seconds': seconds, 'cold_seconds': seconds, 'saved_seconds': 0.0}
+    
+    if cache:
+        save_cached_model(cache_key, model)
+        record_fit(cache_key, prophet_df, seconds, cold_seconds)
+    
+    return model
+
+def get_warm_start_params(previous_model, prophet_df):
+    """
+    Build Stan initial values for prophet_df from a model fitted on an earlier part of the series.
+    
+    Prophet fits on y / y_scale and t = (ds - start) / t_scale, and both scales grow as
+    rows are appended, so the earlier parameters are rescaled to the new series first.
+    Parameters whose shape no longer matches (e.g. yearly seasonality switching on) are
+    replaced with Prophet's defaults by the Stan backend.
+    
+    Args:
+        previous_model: Fitted Prophet model of a prefix of prophet_df
+        prophet_df: DataFrame with 'ds', 'y' and 'budget_normalized' columns
+        
+    Returns:
+        dict: Initial values for k, m, delta, sigma_obs and beta
+    """
+    params = previous_model.params
+    
+    y_scale = float(prophet_df['y'].abs().max()) or 1.0
+    t_scale = prophet_df['ds'].max() - prophet_df['ds'].min()
+    y_ratio = previous_model.y_scale / y_scale
+    t_ratio = t_scale / previous_model.t_scale if previous_model.t_scale else 1.0
+    
+    # Levels scale with y; rates per unit of t scale with both
+    return {
+        'k': float(params['k'][0][0]) * y_ratio * t_ratio,
+        'm': float(params['m'][0][0]) * y_ratio,
+        'delta': np.asarray(params['delta'][0]) * y_ratio * t_ratio,
+        'sigma_obs': float(params['sigma_obs'][0][0]) * y_ratio,
+        'beta': np.asarray(params['beta'][0]) * y_ratio
+    }
+
+def predict(model, future, intervals='full'):
+    """
+    Predict a fitted model over the given dates and budgets.
+    
+    Interval simulation dominates predict time and scales with rows x samples, so the
+    strategy trades interval precision (or history coverage) for speed. Rows without
+    intervals get NaN bounds. Intervals are seeded, so identical inputs give identical
+    bounds: concurrent predictions in one process simulate one at a time, but other
+    code drawing from np.random's global state in another thread meanwhile would
+    still shift the samples.
+    
+    Args:
+        model: Fitted Prophet model
+        future: DataFrame with 'ds' and 'budget_normalized' columns
+        intervals: 'full', 'reduced', 'horizon' (only dates after the training history) or 'none'
+        
+    Returns:
+        DataFrame: Prophet forecast (ds, yhat, yhat_lower, yhat_upper, trend, weekly, yearly, ...)
+    """
+    full_samples = model.uncertainty_samples
+    
+    if intervals == 'horizon':
+        is_future = (future['ds'] > model.history['ds'].max()).values
+        if is_future.all() or not is_future.any():
+            return predict(model, future, 'full' if is_future.all() else 'none')
+        
+        # History without intervals, then the horizon with the full simulation
+        history = predict(model, future[~is_future], 'none')
+        horizon = predict(model, future[is_future], 'full')
+        history.index = np.flatnonzero(~is_future)
+        horizon.index = np.flatnonzero(is_future)
+        return pd.concat([history, horizon]).sort_index().reset_index(drop=True)
+    
+    samples = {'full': full_samples, 'reduced': min(INTERVAL_REDUCED_SAMPLES, full_samples), 'none': 0}[intervals]
+    
+    # Prophet samples its intervals from the global NumPy random state: seed it for this
+    # prediction only, and give other code its random state back afterwards
+    with uncertainty_lock:
+        random_state = np.random.get_state()
+        np.random.seed(UNCERTAINTY_SEED)
+        model.uncertainty_samples = samples
+        try:
+            forecast = model.predict(future)
+        finally:
+            model.uncertainty_samples = full_samples
+            np.random.set_state(random_state)
+    
+    if not samples:
+        # Keep the usual layout so callers can rely on the bound columns
+        forecast['yhat_lower'] = np.nan
+        forecast['yhat_upper'] = np.nan
+    
+    return forecast
+
+def get_fit_report(model):
+    """
+    Describe how a model from fit_model was obtained.
+    
+    Args:
+        model: Fitted Prophet model
+        
+    Returns:
+        dict: source ('cache', 'warm_start' or 'fit'), seconds spent fitting, cold_seconds
+              (a fit from scratch, None for cache hits) and saved_seconds
+    """
+    return getattr(model, 'fit_report', None)
+
+def get_budget_coefficient(model):
+    """
+    Get the fitted budget_normalized regressor coefficient on the scale of the metric.
+    
+    Args:
+        model: Fitted Prophet model with an additive 'budget_normalized' regressor
+        
+    Returns:
+        float: Change in yhat per unit change in budget_normalized
+    """
+    coefficients = regressor_coefficients(model)
+    budget_row = coefficients[coefficients['regressor'] == 'budget_normalized'].iloc[0]
+    
+    if budget_row['regressor_mode'] != 'additive':
+        raise ValueError("budget_normalized regressor is not additive")
+    
+    return float(budget_row['coef'])
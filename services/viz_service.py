@@ -1,13 +1,27 @@
+import os
+import json
+import hashlib
+import threading
+import plotly
 import plotly.graph_objects as go
 import plotly.offline as pyo
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from config import logger
+from config import logger, PLOTLY_JS_MODE, PLOT_MAX_POINTS
+
+# Shared plotly.js bundle, named by version so browsers can cache it indefinitely
+PLOTLY_JS_FOLDER = 'static/js/vendor'
+
+# Part of every plot file name; bump when figure layouts change so old files aren't re-used
+PLOT_STYLE_VERSION = 1
 
 def create_forecast_plots(prophet_df, forecast, metric, budget_change_ratio=1.0):
     """
     Create forecast and component plots using Plotly.
     
+    Plot files are named by a hash of the data they show, so an identical
+    forecast re-uses the existing files instead of rendering them again.
+    
     Args:
         prophet_df: DataFrame with historical data
         forecast: DataFrame with forecast data from Prophet
@@ -17,44 +31,80 @@ def create_forecast_plots(prophet_df, forecast, metric, budget_change_ratio=1.0)
     Returns:
         tuple: (forecast_plot_path, components_plot_path)
     """
-    # Create Plotly visualization
     # Forecast plot
-    plot_id = f"{metric}_plot_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    forecast_columns = [c for c in ['ds', 'yhat', 'yhat_lower', 'yhat_upper', 'budget_normalized_effect']
+                        if c in forecast.columns]
+    plot_path = get_plot_path('forecast', prophet_df[['ds', 'y']], forecast[forecast_columns],
+                              metric, budget_change_ratio)
+    if not reuse_plot(plot_path):
+        write_plot(build_forecast_figure(prophet_df, forecast, metric, budget_change_ratio), plot_path)
+    
+    # Components plot (trends, weekly patterns, etc.)
+    components = ['trend', 'weekly', 'yearly']
+    valid_components = [c for c in components if c in forecast.columns]
     
+    components_path = None
+    
+    if valid_components:
+        component_columns = ['ds'] + valid_components + [c for c in ['budget_normalized_effect'] if c in forecast.columns]
+        components_path = get_plot_path('components', forecast[component_columns], metric)
+        if not reuse_plot(components_path):
+            write_plot(build_components_figure(forecast, metric, valid_components), components_path)
+    
+    return plot_path.replace('static/', ''), components_path.replace('static/', '') if components_path else None
+
+def build_forecast_figure(prophet_df, forecast, metric, budget_change_ratio=1.0):
+    """Build the forecast figure: history, forecast line, uncertainty band and budget annotation."""
     # Determine the forecast period by finding future dates
     last_historical_date = prophet_df['ds'].max()
     future_dates = forecast[forecast['ds'] > last_historical_date]
     forecast_period = len(future_dates)
     
-    # Historical data
+    # Historical data, thinned to the point budget for long histories
+    history = prophet_df.sort_values('ds')
+    history_ds = history['ds'].values
+    history_y = history['y'].values
+    keep = get_lttb_indices(history_ds, history_y, PLOT_MAX_POINTS)
+    
     fig_forecast = go.Figure()
     fig_forecast.add_trace(go.Scatter(
-        x=prophet_df['ds'],
-        y=prophet_df['y'],
+        x=history_ds[keep],
+        y=history_y[keep],
         mode='markers',
         name='Historical',
         marker=dict(color='blue', size=4)
     ))
     
-    # Forecast
+    # Forecast, thinned separately before and after the forecast start so the boundary stays exact
+    ds = forecast['ds'].values
+    keep = get_segment_lttb_indices(ds, forecast['yhat'].values, ds <= last_historical_date.to_datetime64(),
+                                    PLOT_MAX_POINTS)
+    ds = ds[keep]
+    
     fig_forecast.add_trace(go.Scatter(
-        x=forecast['ds'],
-        y=forecast['yhat'],
+        x=ds,
+        y=forecast['yhat'].values[keep],
         mode='lines',
         name='Forecast',
         line=dict(color='red')
     ))
     
-    # Add confidence intervals (uncertainty)
-    fig_forecast.add_trace(go.Scatter(
-        x=forecast['ds'].tolist() + forecast['ds'].tolist()[::-1],
-        y=forecast['yhat_upper'].tolist() + forecast['yhat_lower'].tolist()[::-1],
-        fill='toself',
-        fillcolor='rgba(0,176,246,0.2)',
-        line=dict(color='rgba(255,255,255,0)'),
-        hoverinfo="skip",
-        name="95% Confidence Interval"
-    ))
+    # Add confidence intervals (uncertainty): upper bound forwards, lower bound backwards,
+    # over the dates the interval strategy computed them for
+    upper = forecast['yhat_upper'].values[keep]
+    lower = forecast['yhat_lower'].values[keep]
+    has_interval = ~(np.isnan(upper) | np.isnan(lower))
+    if has_interval.any():
+        band_ds = ds[has_interval]
+        fig_forecast.add_trace(go.Scatter(
+            x=np.concatenate([band_ds, band_ds[::-1]]),
+            y=np.concatenate([upper[has_interval], lower[has_interval][::-1]]),
+            fill='toself',
+            fillcolor='rgba(0,176,246,0.2)',
+            line=dict(color='rgba(255,255,255,0)'),
+            hoverinfo="skip",
+            name="95% Confidence Interval"
+        ))
     
     # Add a vertical line where forecast begins
     fig_forecast.add_shape(
@@ -113,63 +163,279 @@ def create_forecast_plots(prophet_df, forecast, metric, budget_change_ratio=1.0)
         )
     )
     
-    # Save as HTML
-    plot_path = f'static/plots/{plot_id}.html'
-    pyo.plot(fig_forecast, filename=plot_path, auto_open=False)
+    return fig_forecast
+
+def build_components_figure(forecast, metric, valid_components):
+    """Build the components figure: trend, seasonalities and the budget effect."""
+    fig_comp = go.Figure()
+    ds = forecast['ds'].values
     
-    # Components plot (trends, weekly patterns, etc.)
-    components = ['trend', 'weekly', 'yearly']
-    valid_components = [c for c in components if c in forecast.columns]
+    for component in valid_components:
+        keep = get_lttb_indices(ds, forecast[component].values, PLOT_MAX_POINTS)
+        fig_comp.add_trace(go.Scatter(
+            x=ds[keep],
+            y=forecast[component].values[keep],
+            mode='lines',
+            name=component
+        ))
     
-    components_path = None
+    # Add budget impact to components plot
+    if 'budget_normalized_effect' in forecast.columns:
+        keep = get_lttb_indices(ds, forecast['budget_normalized_effect'].values, PLOT_MAX_POINTS)
+        fig_comp.add_trace(go.Scatter(
+            x=ds[keep],
+            y=forecast['budget_normalized_effect'].values[keep],
+            mode='lines',
+            name='Budget Effect',
+            line=dict(color='green', width=2)
+        ))
+        
+        # Add a zero line for reference
+        fig_comp.add_shape(
+            type="line",
+            x0=forecast['ds'].min(),
+            y0=0,
+            x1=forecast['ds'].max(),
+            y1=0,
+            line=dict(color="lightgray", width=1, dash="dot"),
+        )
     
-    if valid_components:
-        fig_comp = go.Figure()
+    fig_comp.update_layout(
+        title=f'{metric} Components',
+        xaxis_title='Date',
+        yaxis_title='Value',
+        hovermode='x unified',
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+    
+    return fig_comp
+
+def create_budget_sweep_plot(sweep):
+    """
+    Create a budget response curve plot for a budget sweep.
+    
+    Each metric is plotted as the % change of its forecast total against the
+    unchanged budget, so metrics on different scales share one chart.
+    
+    Args:
+        sweep: Dictionary returned by generate_budget_sweep
+        
+    Returns:
+        str: Path of the plot relative to the static folder
+    """
+    plot_path = get_plot_path('budget_sweep', {key: value for key, value in sweep.items() if key != 'plot_path'})
+    if reuse_plot(plot_path):
+        return plot_path.replace('static/', '')
+    
+    ratios = sweep['budget_ratios']
+    
+    fig_sweep = go.Figure()
+    
+    for metric, data in sweep['metrics'].items():
+        base_total = data['base_total']
         
-        for component in valid_components:
-            fig_comp.add_trace(go.Scatter(
-                x=forecast['ds'],
-                y=forecast[component],
-                mode='lines',
-                name=component
-            ))
+        # Skip the relative view for metrics whose base forecast is too close to zero
+        if abs(base_total) <= 0.001:
+            logger.warning(f"Base forecast total for {metric} is ~0, leaving it out of the sweep plot")
+            continue
         
-        # Add budget impact to components plot
-        if 'budget_normalized_effect' in forecast.columns:
-            fig_comp.add_trace(go.Scatter(
-                x=forecast['ds'],
-                y=forecast['budget_normalized_effect'],
-                mode='lines',
-                name='Budget Effect',
-                line=dict(color='green', width=2)
-            ))
-            
-            # Add a zero line for reference
-            fig_comp.add_shape(
-                type="line",
-                x0=forecast['ds'].min(),
-                y0=0,
-                x1=forecast['ds'].max(),
-                y1=0,
-                line=dict(color="lightgray", width=1, dash="dot"),
-            )
-        
-        fig_comp.update_layout(
-            title=f'{metric} Components',
-            xaxis_title='Date',
-            yaxis_title='Value',
-            hovermode='x unified',
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            )
+        pct_change = [(total / base_total - 1) * 100 for total in data['total']]
+        
+        # Sweeps run without intervals only have the totals to show
+        if data['total_lower'] is not None:
+            customdata = list(zip(data['total'], data['total_lower'], data['total_upper']))
+            total_text = "<br>Total: %{customdata[0]:,.0f} (%{customdata[1]:,.0f} - %{customdata[2]:,.0f})"
+        else:
+            customdata = [[total] for total in data['total']]
+            total_text = "<br>Total: %{customdata[0]:,.0f}"
+        
+        fig_sweep.add_trace(go.Scatter(
+            x=ratios,
+            y=pct_change,
+            mode='lines+markers',
+            name=metric,
+            customdata=customdata,
+            hovertemplate=f"{metric}<br>Budget: %{{x:.2f}}x<br>Change: %{{y:.1f}}%" + total_text + "<extra></extra>"
+        ))
+    
+    # Mark the current budget for reference
+    fig_sweep.add_vline(x=1.0, line=dict(color="gray", width=1, dash="dash"))
+    
+    fig_sweep.update_layout(
+        title=f"Budget Response ({sweep['forecast_period']}-day forecast)",
+        xaxis_title='Budget (x current)',
+        yaxis_title='Change in forecast total (%)',
+        hovermode='closest',
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
         )
+    )
+    
+    write_plot(fig_sweep, plot_path)
+    
+    return plot_path.replace('static/', '')
+
+def get_plot_path(kind, *inputs):
+    """
+    Get the content-addressed path of a plot from everything that determines how it looks.
+    
+    Args:
+        kind: Plot kind, used as the file name prefix
+        *inputs: DataFrames and JSON-serialisable values the figure is built from
+        
+    Returns:
+        str: Path under static/plots
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([kind, PLOT_STYLE_VERSION, PLOTLY_JS_MODE, PLOT_MAX_POINTS, plotly.__version__]).encode())
+    
+    for value in inputs:
+        if isinstance(value, pd.DataFrame):
+            digest.update(json.dumps(list(value.columns)).encode())
+            digest.update(pd.util.hash_pandas_object(value, index=False).values.tobytes())
+        else:
+            digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+    
+    return f'static/plots/{kind}_{digest.hexdigest()[:32]}.html'
+
+def reuse_plot(plot_path):
+    """
+    Check whether a plot already exists, refreshing its modification time so it isn't swept as expired.
+    
+    Returns:
+        bool: True if the existing file can be served as-is
+    """
+    try:
+        os.utime(plot_path)
+        return True
+    except FileNotFoundError:
+        return False
+
+def write_plot(fig, plot_path):
+    """
+    Write a figure as a standalone HTML file under static/plots.
+    
+    The file is rendered to a temp file and renamed into place, so concurrent
+    requests never see (or overwrite each other with) a partial plot.
+    
+    Args:
+        fig: Plotly figure
+        plot_path: Destination path of the HTML file
+    """
+    temp_path = f"{plot_path}.{os.getpid()}.{threading.get_ident()}.tmp.html"
+    pyo.plot(fig, filename=temp_path, auto_open=False, include_plotlyjs=get_plotlyjs_source())
+    os.replace(temp_path, plot_path)
+
+def get_plotlyjs_source():
+    """
+    Get how plot files should load plotly.js for the configured PLOTLY_JS_MODE.
+    
+    In 'shared' mode the bundle is written to static/js/vendor once and every plot
+    file references it, so a results page downloads plotly.js a single time.
+    
+    Returns:
+        True to embed plotly.js, or the bundle URL relative to static/plots
+    """
+    if PLOTLY_JS_MODE == 'embed':
+        return True
+    
+    filename = f"plotly-{pyo.get_plotlyjs_version()}.min.js"
+    bundle_path = os.path.join(PLOTLY_JS_FOLDER, filename)
+    
+    if not os.path.exists(bundle_path):
+        os.makedirs(PLOTLY_JS_FOLDER, exist_ok=True)
+        
+        # Write to a per-thread temp file first so concurrent requests never serve a partial bundle
+        temp_path = f"{bundle_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(pyo.get_plotlyjs())
+        os.replace(temp_path, bundle_path)
+        logger.info(f"Wrote shared plotly.js bundle to {bundle_path}")
+    
+    return f"../js/vendor/{filename}"
+
+def get_lttb_indices(x, y, max_points):
+    """
+    Pick the points that best preserve a series' shape with largest-triangle-three-buckets (LTTB).
+    
+    The first and last points are always kept. Every bucket in between keeps the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket, so peaks and dips survive downsampling.
+    
+    Args:
+        x: Array of x values in ascending order (numbers or datetime64)
+        y: Array of y values
+        max_points: Maximum number of points to keep (0 = keep everything)
+        
+    Returns:
+        ndarray: Sorted indices of the points to keep
+    """
+    n = len(x)
+    if max_points <= 0 or n <= max_points or max_points < 3:
+        return np.arange(n)
+    
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('int64')
+    x = x.astype(float)
+    y = np.asarray(y, dtype=float)
+    
+    # max_points - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    indices = np.empty(max_points, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+    
+    selected = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        
+        # The last bucket looks ahead to the final point
+        if bucket == max_points - 3:
+            next_x, next_y = x[-1], y[-1]
+        else:
+            next_end = edges[bucket + 2]
+            next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        
+        areas = np.abs((x[selected] - next_x) * (y[start:end] - y[selected]) -
+                       (x[selected] - x[start:end]) * (next_y - y[selected]))
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+    
+    return indices
+
+def get_segment_lttb_indices(x, y, is_first_segment, max_points):
+    """
+    Downsample a series in two segments, keeping the points on both sides of the boundary.
+    
+    Args:
+        x: Array of x values in ascending order
+        y: Array of y values
+        is_first_segment: Boolean mask of the points in the first segment (e.g. historical dates)
+        max_points: Maximum number of points to keep overall, shared in proportion to segment length
         
-        components_id = f"{metric}_components_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        components_path = f'static/plots/{components_id}.html'
-        pyo.plot(fig_comp, filename=components_path, auto_open=False)
+    Returns:
+        ndarray: Sorted indices of the points to keep
+    """
+    n = len(x)
+    if max_points <= 0 or n <= max_points:
+        return np.arange(n)
+    
+    split = int(np.count_nonzero(is_first_segment))
+    first_points = max(3, round(max_points * split / n))
+    second_points = max(3, max_points - first_points)
+    
+    first = get_lttb_indices(x[:split], y[:split], first_points)
+    second = split + get_lttb_indices(x[split:], y[split:], second_points)
     
-    return plot_path.replace('static/', ''), components_path.replace('static/', '') if components_path else None
\ No newline at end of file
+    return np.concatenate([first, second])
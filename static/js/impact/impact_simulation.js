@@ -151,14 +151,15 @@ async function refreshMetricData() {
             throw new Error('Refresh failed');
         }
         
-        // Update the impact data with the response
+        // The response only carries each forecast's id and metrics
         const updatedData = await response.json();
         
-        // Update our global data
-        Object.assign(impactData, updatedData);
-        
-        // Update the UI with the new data
+        // Update our global data and the UI with the new metrics
         updatedData.forecasts.forEach(forecast => {
+            const existing = impactData.forecasts.find(f => f.id === forecast.id);
+            if (existing) {
+                existing.metrics = forecast.metrics;
+            }
             updateMetricDisplays(forecast.id, forecast.metrics);
         });
         
@@ -0,0 +1,27 @@
+import pytest
+from services.impact_service import read_export_csv
+
+pytest.importorskip('pyarrow')
+
+EXPORT = (
+    "Campaign performance\n"
+    "All time\n"
+    "Day,Campaign,Clicks,Cost\n"
+    "2024-01-01,A,10,1.5\n"
+    "2024-01-02,A,11\n"
+    "2024-01-03,A,12,2.5,extra\n"
+    "2024-01-04,B,13,3.5\n"
+)
+
+def test_engines_agree_on_short_and_long_lines(tmp_path):
+    file_path = tmp_path / 'export.csv'
+    file_path.write_text(EXPORT)
+    
+    c_df, c_skipped = read_export_csv(str(file_path), skiprows=2, engine='c')
+    arrow_df, arrow_skipped = read_export_csv(str(file_path), skiprows=2, engine='pyarrow')
+    
+    # The long line is skipped and counted; the short line is kept with its missing field empty
+    assert c_skipped == arrow_skipped == 1
+    assert list(c_df['Day']) == list(arrow_df['Day']) == ['2024-01-01', '2024-01-02', '2024-01-04']
+    assert c_df['Clicks'].sum() == arrow_df['Clicks'].sum() == 34
+    assert c_df['Cost'].isna().sum() == arrow_df['Cost'].isna().sum() == 1
@@ -1,9 +1,16 @@
+import numpy as np
 import pandas as pd
 from config import logger
 
+# Maximum number of distinct values used to score date formats
+DATE_SAMPLE_SIZE = 1000
+
 def parse_dates_with_format_detection(df, date_col):
     """Try to detect date format and parse dates accordingly.
     
+    Formats are scored on a bounded sample of the column's distinct values and the
+    column is converted once, with the winning format.
+    
     Args:
         df: DataFrame containing date column
         date_col: Name of the column containing dates
@@ -12,43 +19,117 @@ def parse_dates_with_format_detection(df, date_col):
         tuple: (parsed_dates, detected_format)
     """
     # If column contains strings that look like two dates separated by space/newline
-    if df[date_col].dtype == 'object':
-        sample_vals = df[date_col].dropna().astype(str).head()
-        # Check if values contain multiple dates (common in Meta exports)
-        if any(' ' in str(val) for val in sample_vals):
-            logger.info(f"Column {date_col} may contain multiple dates - trying to extract first date")
-            # Extract first date from each value (before the space)
-            df[date_col] = df[date_col].astype(str).str.split(' ').str[0]
-            
-    # First try automatic parsing
-    dates_auto = pd.to_datetime(df[date_col], errors='coerce')
-    
-    # Try explicit formats
-    dates_mdy = pd.to_datetime(df[date_col], format='%m/%d/%Y', errors='coerce')
-    dates_dmy = pd.to_datetime(df[date_col], format='%d/%m/%Y', errors='coerce')
+    extract_first_date(df, date_col)
     
-    # Try additional European format (with dots)
-    dates_dmy_dot = pd.to_datetime(df[date_col], format='%d.%m.%Y', errors='coerce')
+    # Exports repeat each date once per campaign/ad row, so work on distinct values
+    codes, uniques = pd.factorize(df[date_col])
+    
+    # Score every format on a bounded sample instead of parsing the full column four times
+    sample = sample_date_values(uniques)
+    
+    valid_auto = pd.to_datetime(sample, errors='coerce').notna().sum()
+    valid_mdy = pd.to_datetime(sample, format='%m/%d/%Y', errors='coerce').notna().sum()
+    valid_dmy = pd.to_datetime(sample, format='%d/%m/%Y', errors='coerce').notna().sum()
     
-    # Count valid dates for each method
-    valid_auto = (~dates_auto.isna()).sum()
-    valid_mdy = (~dates_mdy.isna()).sum()
-    valid_dmy = (~dates_dmy.isna()).sum()
-    valid_dmy_dot = (~dates_dmy_dot.isna()).sum()
+    # Try additional European format (with dots)
+    valid_dmy_dot = pd.to_datetime(sample, format='%d.%m.%Y', errors='coerce').notna().sum()
     
     # Choose the format that successfully parsed the most dates
     if valid_mdy >= valid_auto and valid_mdy >= valid_dmy and valid_mdy >= valid_dmy_dot:
+        detected_format = '%m/%d/%Y'
         logger.info(f"Detected American date format (MM/DD/YYYY) for column {date_col}")
-        return dates_mdy, '%m/%d/%Y'
     elif valid_dmy >= valid_auto and valid_dmy >= valid_dmy_dot:
+        detected_format = '%d/%m/%Y'
         logger.info(f"Detected European date format (DD/MM/YYYY) for column {date_col}")
-        return dates_dmy, '%d/%m/%Y'
     elif valid_dmy_dot >= valid_auto:
+        detected_format = '%d.%m.%Y'
         logger.info(f"Detected European date format with dots (DD.MM.YYYY) for column {date_col}")
-        return dates_dmy_dot, '%d.%m.%Y'
     else:
+        detected_format = 'auto'
         logger.info(f"Using auto-detected date format for column {date_col}")
-        return dates_auto, 'auto'
+    
+    # Nothing in the sample is a date, so skip converting the full column
+    if max(valid_auto, valid_mdy, valid_dmy, valid_dmy_dot) == 0:
+        return pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]'), detected_format
+    
+    # Convert the full column once, with the winning format
+    return expand_parsed_dates(uniques, codes, detected_format, df.index), detected_format
+
+def extract_first_date(df, date_col):
+    """Keep only the first date when values hold two dates separated by a space.
+    
+    Args:
+        df: DataFrame containing date column (updated in place)
+        date_col: Name of the column containing dates
+        
+    Returns:
+        bool: Whether the column was split
+    """
+    if df[date_col].dtype != 'object':
+        return False
+    
+    codes, uniques = pd.factorize(df[date_col])
+    
+    # Check if values contain multiple dates (common in Meta exports)
+    if not any(' ' in str(val) for val in uniques[:5]):
+        return False
+    
+    logger.info(f"Column {date_col} may contain multiple dates - trying to extract first date")
+    
+    # Extract first date from each distinct value (before the space)
+    first_dates = pd.Index(uniques.astype(str)).str.split(' ').str[0]
+    df[date_col] = first_dates.take(codes, allow_fill=True)
+    return True
+
+def sample_date_values(uniques):
+    """Get a bounded sample of a column's distinct values for date format scoring.
+    
+    Values whose day/month order is unambiguous (a first or second component above 12)
+    are always kept, since they are the ones that decide between MM/DD and DD/MM.
+    
+    Args:
+        uniques: Distinct non-null values of the column
+        
+    Returns:
+        Series: At most 2 * DATE_SAMPLE_SIZE distinct values
+    """
+    uniques = pd.Series(uniques)
+    if len(uniques) <= DATE_SAMPLE_SIZE:
+        return uniques
+    
+    # Evenly spaced values across the column (exports are usually sorted by date)
+    positions = np.linspace(0, len(uniques) - 1, DATE_SAMPLE_SIZE).astype(int)
+    sample = uniques.iloc[positions]
+    
+    if uniques.dtype == 'object':
+        parts = uniques.astype(str).str.extract(r'^\s*(\d{1,2})[/.](\d{1,2})[/.]')
+        first = pd.to_numeric(parts[0], errors='coerce')
+        second = pd.to_numeric(parts[1], errors='coerce')
+        decisive = uniques[(first > 12) | (second > 12)]
+        sample = pd.concat([decisive.head(DATE_SAMPLE_SIZE), sample]).drop_duplicates()
+    
+    return sample
+
+def expand_parsed_dates(uniques, codes, date_format, index):
+    """Parse distinct values and expand them back to the full column.
+    
+    Args:
+        uniques: Distinct values of the column
+        codes: Position of each row's value in uniques (-1 for missing values)
+        date_format: Format string to use for conversion, or 'auto'
+        index: Index of the original column
+        
+    Returns:
+        Series: Parsed dates (NaT where parsing failed)
+    """
+    if date_format == 'auto':
+        parsed = pd.to_datetime(pd.Series(uniques), errors='coerce')
+    else:
+        parsed = pd.to_datetime(pd.Series(uniques), format=date_format, errors='coerce')
+    
+    # Missing values have code -1 and come back as NaT
+    parsed = pd.DatetimeIndex(parsed).take(codes, allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(parsed, index=index)
 
 def convert_column_to_datetime(df, date_col, date_format='auto'):
     """Convert a column to datetime using the specified format.
@@ -61,11 +142,13 @@ def convert_column_to_datetime(df, date_col, date_format='auto'):
     Returns:
         DataFrame with converted column
     """
+    # Each distinct date is parsed once and broadcast back to its rows
+    codes, uniques = pd.factorize(df[date_col])
+    df[date_col] = expand_parsed_dates(uniques, codes, date_format, df.index)
+    
     if date_format == 'auto':
-        df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
         logger.info(f"Using automatic date parsing for column {date_col}")
     else:
-        df[date_col] = pd.to_datetime(df[date_col], format=date_format, errors='coerce')
         logger.info(f"Using format {date_format} for column {date_col}")
     
-    return df
\ No newline at end of file
+    return df
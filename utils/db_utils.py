@@ -0,0 +1,25 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+@contextmanager
+def open_sqlite(db_path, schema=()):
+    """Open a SQLite database shared between worker processes.
+    
+    Args:
+        db_path: Path to the database file (its folder is created if needed)
+        schema: CREATE TABLE IF NOT EXISTS statements to run on open
+        
+    Yields:
+        sqlite3.Connection: Connection inside a transaction that commits on exit
+    """
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        with conn:
+            for statement in schema:
+                conn.execute(statement)
+            yield conn
+    finally:
+        conn.close()
@@ -2,10 +2,17 @@ import csv
 import io
 import os
 import json
-import tempfile
 from datetime import datetime
+import numpy as np
 import pandas as pd
 import uuid
+from config import FORECAST_FOLDER
+
+# Rows formatted per chunk when streaming a CSV export
+CSV_BLOCK_ROWS = 10000
+
+# Forecast columns kept in the columnar store, in storage order
+FORECAST_FIELDS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
 
 class CustomJSONEncoder(json.JSONEncoder):
     """Custom JSON encoder that can handle pandas Timestamp objects."""
@@ -14,36 +21,35 @@ class CustomJSONEncoder(json.JSONEncoder):
             return obj.isoformat()
         return super().default(obj)
 
-def extract_forecast_data(results):
-    """Extract just the necessary forecast data for CSV export."""
-    extracted_data = {}
-    
-    for metric_name, metric_data in results.items():
-        forecast_values = []
-        for row in metric_data['forecast']:
-            # Handle both string dates and Timestamp objects
-            date_value = row['ds']
-            if isinstance(date_value, pd.Timestamp):
-                date_str = date_value.strftime('%Y-%m-%d')
-            elif isinstance(date_value, str):
-                date_str = date_value
-            else:
-                date_str = str(date_value)
-                
-            forecast_values.append({
-                'date': date_str,
-                'value': float(row['yhat'])
-            })
-        extracted_data[metric_name] = forecast_values
-    
-    return extracted_data
-
-def save_forecast_data(results, forecast_title, platform_display, estimated_budget, currency, date_range, budget_change_ratio=1.0):
+def build_forecast_data(results, forecast_title, platform_display, estimated_budget, currency, date_range,
+                        budget_change_ratio=1.0, aggregation=None, engine=None, intervals=None, campaigns=None):
     """
-    Save forecast data to a temporary file and return a unique ID.
+    Lay forecast results out the way save_forecast_data stores them, without writing anything.
+    
+    Args:
+        results: Results from generate_forecast
+        forecast_title, platform_display, estimated_budget, currency, date_range,
+        budget_change_ratio, aggregation, engine, intervals: Metadata, as for save_forecast_data
+        campaigns: Per-campaign forecasts from generate_campaign_forecasts (optional)
+        
+    Returns:
+        tuple: (forecast data with the metadata and per-metric summaries, forecast columns array),
+               which attach_forecast_columns turns into what load_forecast_data returns
     """
-    # Generate a unique ID for this forecast
-    forecast_id = str(uuid.uuid4())
+    # Lay every metric's forecast out as FORECAST_FIELDS rows, padded with NaN to the longest horizon
+    num_rows = max((len(metric_data['forecast']) for metric_data in results.values()), default=0)
+    columns = np.full((len(FORECAST_FIELDS) * len(results), num_rows), np.nan)
+    summaries = {}
+    
+    for index, (metric, metric_data) in enumerate(results.items()):
+        forecast = pd.DataFrame(metric_data['forecast'], columns=FORECAST_FIELDS)
+        block = columns[index * len(FORECAST_FIELDS):(index + 1) * len(FORECAST_FIELDS), :len(forecast)]
+        block[0] = pd.to_datetime(forecast['ds']).values.astype('datetime64[s]').astype('int64')
+        block[1:] = forecast[FORECAST_FIELDS[1:]].to_numpy(dtype=float).T
+        
+        # Plot paths, elasticity, ... stay in the sidecar
+        summaries[metric] = {key: value for key, value in metric_data.items() if key != 'forecast'}
+        summaries[metric]['rows'] = len(forecast)
     
     # Collect all data
     forecast_data = {
@@ -54,112 +60,311 @@ def save_forecast_data(results, forecast_title, platform_display, estimated_budg
             'currency': currency,
             'date_range': date_range,
             'budget_change_ratio': budget_change_ratio,
+            'aggregation': aggregation,
+            'engine': engine,
+            'intervals': intervals,
             'created_at': datetime.now().isoformat()
         },
-        'results': results
+        'results': summaries
     }
     
-    # Save to temporary file using the custom JSON encoder
-    temp_dir = 'temp_forecasts'
-    os.makedirs(temp_dir, exist_ok=True)
-    filepath = os.path.join(temp_dir, f"{forecast_id}.json")
+    if campaigns:
+        forecast_data['metadata']['campaigns'] = {
+            'names': campaigns['campaigns'],
+            'metrics': campaigns['metrics'],
+            'dates': campaigns['dates'].values.astype('datetime64[s]').astype('int64').tolist(),
+            'models': campaigns['models']
+        }
+    
+    return forecast_data, columns
+
+def save_forecast_data(results, forecast_title, platform_display, estimated_budget, currency, date_range, budget_change_ratio=1.0,
+                       aggregation=None, engine=None, intervals=None, campaigns=None):
+    """
+    Save forecast data and return a unique ID.
+    
+    Forecast columns go to {id}.npy, one contiguous row per column (dates as Unix
+    seconds, then yhat, yhat_lower and yhat_upper for every metric), so readers can
+    memory-map just the columns they need. Per-campaign forecasts from
+    generate_campaign_forecasts go to {id}.campaigns.npy (metrics x campaigns x dates).
+    Everything else goes to a {id}.meta.json sidecar, written last so its presence
+    marks a complete forecast.
+    """
+    # Generate a unique ID for this forecast
+    forecast_id = str(uuid.uuid4())
+    
+    forecast_data, columns = build_forecast_data(results, forecast_title, platform_display, estimated_budget, currency,
+                                                 date_range, budget_change_ratio, aggregation, engine, intervals,
+                                                 campaigns)
+    
+    os.makedirs(FORECAST_FOLDER, exist_ok=True)
+    columns_path = os.path.join(FORECAST_FOLDER, f"{forecast_id}.npy")
+    metadata_path = os.path.join(FORECAST_FOLDER, f"{forecast_id}.meta.json")
+    
+    # Write through temp files so a reader never sees a partial forecast
+    with open(f"{columns_path}.tmp", 'wb') as f:
+        np.save(f, columns)
+    os.replace(f"{columns_path}.tmp", columns_path)
+    
+    if campaigns:
+        campaigns_path = os.path.join(FORECAST_FOLDER, f"{forecast_id}.campaigns.npy")
+        with open(f"{campaigns_path}.tmp", 'wb') as f:
+            np.save(f, campaigns['forecasts'])
+        os.replace(f"{campaigns_path}.tmp", campaigns_path)
     
-    with open(filepath, 'w') as f:
+    with open(f"{metadata_path}.tmp", 'w') as f:
         json.dump(forecast_data, f, cls=CustomJSONEncoder)
+    os.replace(f"{metadata_path}.tmp", metadata_path)
     
     return forecast_id
 
 def load_forecast_data(forecast_id):
-    """Load forecast data from a temporary file."""
-    temp_dir = 'temp_forecasts'  # Changed from tempfile.gettempdir()/unyte_forecasts to match save_forecast_data
+    """
+    Load a saved forecast's metadata, with its forecast columns memory-mapped.
+    
+    Args:
+        forecast_id: ID of the saved forecast data
+        
+    Returns:
+        dict: 'metadata' and per-metric 'results', where each metric's 'columns' maps
+              FORECAST_FIELDS to arrays ('ds' in Unix seconds), or None if not found
+    """
+    metadata_path = os.path.join(FORECAST_FOLDER, f"{forecast_id}.meta.json")
+    
+    if not os.path.exists(metadata_path):
+        return load_legacy_forecast_data(forecast_id)
+    
+    try:
+        with open(metadata_path, 'r') as f:
+            forecast_data = json.load(f)
+        
+        # Only pages of the columns that are actually read come off disk
+        columns = np.load(os.path.join(FORECAST_FOLDER, f"{forecast_id}.npy"), mmap_mode='r')
+    except FileNotFoundError:
+        # Removed by the artifact sweeper in the meantime
+        return None
+    
+    return attach_forecast_columns(forecast_data, columns)
+
+def attach_forecast_columns(forecast_data, columns):
+    """
+    Give every metric of stored forecast data its 'columns' views into the forecast columns array.
+    
+    Args:
+        forecast_data: Forecast data laid out by build_forecast_data (updated in place)
+        columns: Forecast columns array (or its memory map)
+        
+    Returns:
+        dict: forecast_data, in the shape load_forecast_data returns
+    """
+    for index, metric_data in enumerate(forecast_data['results'].values()):
+        num_rows = metric_data.pop('rows')
+        metric_data['columns'] = {
+            field: columns[index * len(FORECAST_FIELDS) + offset, :num_rows]
+            for offset, field in enumerate(FORECAST_FIELDS)
+        }
     
-    filepath = os.path.join(temp_dir, f"{forecast_id}.json")
+    return forecast_data
+
+def remove_forecast_data(forecast_id):
+    """Remove a saved forecast's files (metadata sidecar first, so it stops counting as complete)."""
+    for suffix in ('.meta.json', '.npy', '.campaigns.npy', '.json'):
+        path = os.path.join(FORECAST_FOLDER, f"{forecast_id}{suffix}")
+        if os.path.exists(path):
+            os.remove(path)
+
+def load_legacy_forecast_data(forecast_id):
+    """Load a forecast saved as a single JSON file, in the same shape as load_forecast_data."""
+    filepath = os.path.join(FORECAST_FOLDER, f"{forecast_id}.json")
     
     if not os.path.exists(filepath):
         return None
     
     with open(filepath, 'r') as f:
-        return json.load(f)
+        forecast_data = json.load(f)
+    
+    for metric_data in forecast_data['results'].values():
+        forecast = pd.DataFrame(metric_data.pop('forecast'), columns=FORECAST_FIELDS)
+        metric_data['columns'] = {field: forecast[field].to_numpy(dtype=float) for field in FORECAST_FIELDS[1:]}
+        metric_data['columns']['ds'] = pd.to_datetime(forecast['ds']).values.astype('datetime64[s]').astype('int64')
+    
+    return forecast_data
 
-def generate_forecast_csv_from_file(forecast_id):
+def get_forecast_dates(columns):
+    """Convert a forecast's stored 'ds' column (Unix seconds) to a DatetimeIndex."""
+    return pd.to_datetime(np.asarray(columns['ds'], dtype='int64'), unit='s')
+
+def load_forecast_results(forecast_id):
     """
-    Generate a CSV file with forecast results in the specified format.
+    Load saved forecast data in the shape generate_forecast returns it.
     
     Args:
         forecast_id: ID of the saved forecast data
         
     Returns:
-        BytesIO object containing the CSV data or None if forecast not found
+        tuple: (metadata, results) with forecast dates as Timestamps, or (None, None) if not found
     """
-    # Load the forecast data
     forecast_data = load_forecast_data(forecast_id)
     if not forecast_data:
-        return None
+        return None, None
+    
+    results = forecast_data['results']
+    for metric_data in results.values():
+        columns = metric_data.pop('columns')
+        forecast = pd.DataFrame({field: np.asarray(columns[field]) for field in FORECAST_FIELDS[1:]})
+        forecast.insert(0, 'ds', get_forecast_dates(columns))
+        metric_data['forecast'] = forecast.to_dict('records')
+    
+    return forecast_data['metadata'], results
+
+def generate_forecast_csv(forecast_data, include_bounds=False, block_rows=None):
+    """
+    Stream forecast results as CSV: the metadata header, then the data in vectorized blocks.
+    
+    Args:
+        forecast_data: Saved forecast data from load_forecast_data
+        include_bounds: Add {metric}_lower and {metric}_upper columns after each metric
+        block_rows: Rows formatted per chunk (default: CSV_BLOCK_ROWS)
+        
+    Yields:
+        str: CSV text chunks
+    """
+    block_rows = block_rows or CSV_BLOCK_ROWS
     
     # Extract metadata
     metadata = forecast_data['metadata']
-    
-    # Convert results to the extracted format needed for CSV
-    results = extract_forecast_data(forecast_data['results'])
+    results = forecast_data['results']
     
     # Parse date range
     start_date, end_date = [date.strip() for date in metadata['date_range'].split('-')]
-    start_date = datetime.strptime(start_date, '%d/%m/%Y').strftime('%Y-%m-%d')
-    end_date = datetime.strptime(end_date, '%d/%m/%Y').strftime('%Y-%m-%d')
+    start_obj = datetime.strptime(start_date, '%d/%m/%Y')
+    end_obj = datetime.strptime(end_date, '%d/%m/%Y')
     
     # Calculate forecast period in days
-    start_obj = datetime.strptime(start_date, '%Y-%m-%d')
-    end_obj = datetime.strptime(end_date, '%Y-%m-%d')
     forecast_period = (end_obj - start_obj).days
     
-    # Create CSV buffer
-    csv_buffer = io.StringIO()
-    writer = csv.writer(csv_buffer)
-    
     # Write metadata header
+    header_buffer = io.StringIO()
+    writer = csv.writer(header_buffer)
     writer.writerow(['forecast_title', metadata['forecast_title']])
     writer.writerow(['platform', metadata['platform']])
     writer.writerow(['budget', metadata['budget']])
     writer.writerow(['currency', metadata['currency']])
     writer.writerow(['forecast_period', f'{forecast_period} days'])
-    writer.writerow(['start_date', start_date])
-    writer.writerow(['end_date', end_date])
-    writer.writerow(['generated_on', metadata.get('created_at', datetime.now().isoformat())])  # Fixed key name
+    writer.writerow(['start_date', start_obj.strftime('%Y-%m-%d')])
+    writer.writerow(['end_date', end_obj.strftime('%Y-%m-%d')])
+    writer.writerow(['generated_on', metadata.get('created_at', datetime.now().isoformat())])
     
-    # Prepare data rows
     if not results:
         # No results to export
         writer.writerow([])
-        return io.BytesIO(csv_buffer.getvalue().encode())
+        yield header_buffer.getvalue()
+        return
+    
+    # Every metric is forecast over the same horizon, so rows line up with the first metric's dates
+    first_columns = next(iter(results.values()))['columns']
+    columns = {
+        'date': get_forecast_dates(first_columns).strftime('%Y-%m-%dT%H:%M:%S'),
+        'metric_type': 'forecast'
+    }
+    
+    value_fields = [('yhat', '')]
+    if include_bounds:
+        value_fields += [('yhat_lower', '_lower'), ('yhat_upper', '_upper')]
     
-    # Get all dates from the first metric
-    first_metric = list(results.values())[0]
-    dates = [item['date'] for item in first_metric]
+    # Only the columns being exported are read from the store
+    for metric_name, metric_data in results.items():
+        for field, suffix in value_fields:
+            columns[f'{metric_name}{suffix}'] = np.asarray(metric_data['columns'][field])
+    
+    df = pd.DataFrame(columns)
+    
+    # Write column headers
+    writer.writerow(df.columns)
+    yield header_buffer.getvalue()
     
-    # Create a DataFrame to hold all metrics data
-    all_data = {}
+    # Write data rows a block at a time (csv.writer line endings, so the layout is unchanged)
+    for start in range(0, len(df), block_rows):
+        yield df.iloc[start:start + block_rows].to_csv(header=False, index=False, lineterminator='\r\n')
+
+def generate_forecast_csv_from_file(forecast_id, include_bounds=False):
+    """
+    Generate a saved forecast's CSV in one buffer (generate_forecast_csv streams it instead).
+    
+    Args:
+        forecast_id: ID of the saved forecast data
+        include_bounds: Add {metric}_lower and {metric}_upper columns after each metric
+        
+    Returns:
+        BytesIO object containing the CSV data or None if forecast not found
+    """
+    forecast_data = load_forecast_data(forecast_id)
+    if not forecast_data:
+        return None
     
-    # Add dates and metric_type columns
-    all_data['date'] = dates
-    all_data['metric_type'] = ['forecast'] * len(dates)
+    return io.BytesIO(''.join(generate_forecast_csv(forecast_data, include_bounds=include_bounds)).encode())
+
+def extract_forecast_data(results):
+    """Extract just the dates and forecast values of each metric from generate_forecast results."""
+    extracted_data = {}
     
-    # Add each metric's forecast values
     for metric_name, metric_data in results.items():
-        all_data[metric_name] = [item['value'] for item in metric_data]
+        forecast_values = []
+        for row in metric_data['forecast']:
+            # Handle both string dates and Timestamp objects
+            date_value = row['ds']
+            if isinstance(date_value, pd.Timestamp):
+                date_str = date_value.strftime('%Y-%m-%d')
+            elif isinstance(date_value, str):
+                date_str = date_value
+            else:
+                date_str = str(date_value)
+            
+            forecast_values.append({
+                'date': date_str,
+                'value': float(row['yhat'])
+            })
+        extracted_data[metric_name] = forecast_values
     
-    # Convert to DataFrame for easier manipulation
-    df = pd.DataFrame(all_data)
+    return extracted_data
+
+def generate_campaign_csv(forecast_id, forecast_data, block_rows=None, forecasts=None):
+    """
+    Stream a forecast's reconciled per-campaign forecasts as CSV, one row per date and campaign.
     
-    # Get all column names
-    column_names = ['date', 'metric_type'] + [m for m in results.keys()]
+    Args:
+        forecast_id: ID of the saved forecast data (unused when forecasts is given)
+        forecast_data: Saved forecast data from load_forecast_data (with campaign metadata)
+        block_rows: Rows formatted per chunk (default: CSV_BLOCK_ROWS)
+        forecasts: Campaign forecasts array to export instead of the saved one
+        
+    Yields:
+        str: CSV text chunks
+    """
+    block_rows = block_rows or CSV_BLOCK_ROWS
+    campaign_metadata = forecast_data['metadata']['campaigns']
+    names = np.asarray(campaign_metadata['names'], dtype=object)
+    dates = pd.to_datetime(np.asarray(campaign_metadata['dates'], dtype='int64'), unit='s').strftime('%Y-%m-%d')
     
-    # Write column headers
-    writer.writerow(column_names)
+    # metrics x campaigns x dates, memory-mapped so only one block of rows is in memory at a time
+    if forecasts is None:
+        forecasts = np.load(os.path.join(FORECAST_FOLDER, f"{forecast_id}.campaigns.npy"), mmap_mode='r')
     
-    # Write data rows
-    for _, row in df.iterrows():
-        writer.writerow([row[col] for col in column_names])
+    header_buffer = io.StringIO()
+    csv.writer(header_buffer).writerow(['date', 'campaign', *campaign_metadata['metrics']])
+    yield header_buffer.getvalue()
     
-    # Return as BytesIO object
-    csv_buffer.seek(0)
-    return io.BytesIO(csv_buffer.getvalue().encode())
\ No newline at end of file
+    # Rows run date by date, campaigns in their stored order within each date
+    dates_per_block = max(1, block_rows // max(len(names), 1))
+    for date_start in range(0, len(dates), dates_per_block):
+        date_slice = slice(date_start, date_start + dates_per_block)
+        block_dates = dates[date_slice]
+        columns = {
+            'date': np.repeat(block_dates.values, len(names)),
+            'campaign': np.tile(names, len(block_dates))
+        }
+        for metric_index, metric in enumerate(campaign_metadata['metrics']):
+            # dates x campaigns, flattened date-major
+            columns[metric] = np.asarray(forecasts[metric_index, :, date_slice]).T.ravel()
+        
+        yield pd.DataFrame(columns).to_csv(header=False, index=False, lineterminator='\r\n')